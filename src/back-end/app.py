@@ -1,16 +1,18 @@
 # THIS CODE IS USED TO RECEIVE FORM DATA FROM THE HTML 
-from flask import Flask, render_template, request, g, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, g, jsonify, session, redirect, url_for, stream_with_context
 import sqlite3, sys, os
 from datetime import datetime, date
 from functools import wraps
 from flask_cors import CORS
 
+from models.base_model import BaseModel
 from models.payment_model import Payment
 from models.customer_model import Customer
 from models.product_model import Product
 from models.payment_product_model import PaymentProduct
 from models.admin_model import Admin
 from models.product_item_model import ProductItem
+from models.inventory_movement_model import InventoryMovement
 from models.exceptions.database_insert_exception import DatabaseInsertException
 from models.exceptions.database_delete_exception import DatabaseDeleteException
 from models.exceptions.database_read_exception import DatabaseReadException
@@ -24,8 +26,16 @@ try:
     from utils.email_service import EmailService
     from utils.pareto_anywhere_service import ParetoAnywhereService
     from utils.password_reset import password_reset_bp
+    from utils.sensor_registry import SensorRegistry
+    from utils.latest_reading_cache import LatestReadingCache
+    from utils.event_broadcaster import EventBroadcaster
+    from utils.ambient_context_poller import AmbientContextPoller
+    from utils.stock_alert_service import StockAlertService
+    from utils.sensor_retention_service import SensorRetentionService
+    from utils.json_stream import JsonStream
     from models.sensor_model import Sensor
     from models.sensor_data_point_model import SensorDataPoint
+    from models.sensor_data_rollup_model import SensorDataRollup
     from models.customer_model import Customer
     from models.product_model import Product
     from models.exceptions.database_insert_exception import DatabaseInsertException
@@ -37,8 +47,16 @@ except ImportError:
     from .utils.email_service import EmailService
     from .utils.pareto_anywhere_service import ParetoAnywhereService
     from .utils.password_reset import password_reset_bp
+    from .utils.sensor_registry import SensorRegistry
+    from .utils.latest_reading_cache import LatestReadingCache
+    from .utils.event_broadcaster import EventBroadcaster
+    from .utils.ambient_context_poller import AmbientContextPoller
+    from .utils.stock_alert_service import StockAlertService
+    from .utils.sensor_retention_service import SensorRetentionService
+    from .utils.json_stream import JsonStream
     from models.sensor_model import Sensor
     from models.sensor_data_point_model import SensorDataPoint
+    from models.sensor_data_rollup_model import SensorDataRollup
     from models.customer_model import Customer
     from models.product_model import Product
     from models.exceptions.database_insert_exception import DatabaseInsertException
@@ -57,20 +75,128 @@ db_path = os.path.join(os.path.dirname(__file__), "..", "db", "sql_connected_sma
 # # Make the path absolute
 # db_path = os.path.abspath(db_path)
 
+# Bring the database schema up to date (indexes, new tables) before anything queries it
+BaseModel.migrate_schema()
+
 mqtt_broker = os.getenv('MQTT_BROKER', 'localhost')
 mqtt_port = int(os.getenv('MQTT_PORT', '1883'))
-mqtt_service = MQTTService(mqtt_broker, mqtt_port)
+sensor_registry = SensorRegistry()
+mqtt_service = MQTTService(mqtt_broker, mqtt_port, sensor_registry=sensor_registry)
+
+# Latest reading per sensor and data type, kept up to date by the ingestion writer
+latest_readings = LatestReadingCache()
+mqtt_service.ingestion_service.add_listener(latest_readings.update)
+
+# Prune old sensor readings and rollups in the background
+sensor_retention = SensorRetentionService()
+sensor_retention.start()
+
+# Build the in-memory EPC index used by the self-checkout scans
+ProductItem.load_epc_index()
 
 email_service = EmailService()
 
 pareto_service = ParetoAnywhereService()
 
+# Live updates pushed to the dashboards over server-sent events
+event_broadcaster = EventBroadcaster()
+ambient_poller = AmbientContextPoller(pareto_service, event_broadcaster)
+ambient_poller.start()
+
+def get_sensor_snapshot(sensor_ids: list[int] = None) -> dict:
+    """
+    Get the latest temperature and humidity of sensors, as returned by /api/sensors.
+
+    Args:
+        sensor_ids (list[int], optional): The sensors to include. Defaults to every registered sensor.
+
+    Returns:
+        dict: The readings keyed by 'sensor<id>'.
+    """
+    if sensor_ids is None:
+        sensor_ids = [sensor.sensor_id for sensor in sensor_registry.all()]
+
+    # One read of the latest reading cache for every sensor
+    readings = latest_readings.snapshot()
+
+    response = {}
+    for sensor_id in sensor_ids:
+        temp_data = readings.get((sensor_id, "temperature"))
+        humidity_data = readings.get((sensor_id, "humidity"))
+        response[f'sensor{sensor_id}'] = {
+            'temperature': float(temp_data.value) if temp_data else 0,
+            'humidity': float(humidity_data.value) if humidity_data else 0
+        }
+    return response
+
+def publish_sensor_readings(sensor_data_points: list):
+    """Push the new values of the sensors that just reported. Used as an ingestion listener."""
+    if event_broadcaster.connection_count == 0:
+        return
+    sensor_ids = sorted({point.sensor_id for point in sensor_data_points if point.data_type in ("temperature", "humidity")})
+    if sensor_ids:
+        event_broadcaster.publish("sensors", get_sensor_snapshot(sensor_ids))
+
+# Stock thresholds evaluated when a stock changes, pushed to the dashboards and emailed to the admins
+stock_alerts = StockAlertService(email_service, event_broadcaster, Admin.fetch_all_admin_emails)
+
+# Registered after the latest reading cache so that the published values include the batch
+mqtt_service.ingestion_service.add_listener(publish_sensor_readings)
+Product.add_stock_change_listener(stock_alerts.on_stock_change)
+
 # Temperature thresholds for alerts (in Celsius)
 TEMP_THRESHOLD_HIGH = 25.0  # Alert if temperature exceeds this
 TEMP_THRESHOLD_LOW = -5.0   # Alert if temperature drops below this
 TEMP_LAST_ALERT_TIME = {}  # To track last alert time per sensor
 TEMP_ALERT_INTERVAL = 60 * 5  # 5 minutes
 
+# Encoder of the large listings and reports, streamed instead of built in memory
+json_stream = JsonStream(int(os.getenv('JSON_STREAM_CHUNK_SIZE', '16384')))
+
+# Minimum number of points plotted by the environmental report
+ENV_REPORT_MIN_POINTS = int(os.getenv('ENV_REPORT_MIN_POINTS', '24'))
+
+# Maximum number of EPCs resolved by a single batch request
+EPC_RESOLVE_MAX_BATCH = int(os.getenv('EPC_RESOLVE_MAX_BATCH', '1000'))
+
+# Page sizes of the paginated customer and product listings
+LISTING_DEFAULT_PAGE_SIZE = int(os.getenv('LISTING_DEFAULT_PAGE_SIZE', '50'))
+LISTING_MAX_PAGE_SIZE = int(os.getenv('LISTING_MAX_PAGE_SIZE', '500'))
+LISTING_PAGE_ARGS = ('after_id', 'limit', 'q', 'sort', 'order', 'category')
+
+def get_listing_page_args() -> dict | None:
+    """
+    Parse the pagination, search and sort arguments of a listing request.
+
+    Returns:
+        dict | None: The arguments, or None if the request asks for the full (unpaginated) listing.
+
+    Raises:
+        ValueError: If an argument is invalid.
+    """
+    if not any(arg in request.args for arg in LISTING_PAGE_ARGS):
+        return None
+
+    after_id = request.args.get('after_id', type=int)
+    if 'after_id' in request.args and after_id is None:
+        raise ValueError("after_id must be an integer.")
+
+    limit = request.args.get('limit', LISTING_DEFAULT_PAGE_SIZE, type=int)
+    if limit is None or not 1 <= limit <= LISTING_MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be an integer between 1 and {LISTING_MAX_PAGE_SIZE}.")
+
+    order = request.args.get('order', 'asc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be 'asc' or 'desc'.")
+
+    return {
+        "after_id": after_id,
+        "limit": limit,
+        "search": request.args.get('q', '').strip() or None,
+        "sort": request.args.get('sort'),
+        "descending": order == 'desc'
+    }
+
 def check_temperature_threshold(sensor_id: int, temperature: float, location: str):
     """
     Check if temperature exceeds thresholds and send email alert if needed.
@@ -222,10 +348,26 @@ def logout():
 
 @app.route('/customers/data', methods=['GET'])
 def get_customers():
+    """
+    Get the customers. With any of after_id, limit, q, sort or order, a single page is returned
+    as {"items": [...], "next_after_id": ..., "has_more": ...}; the full list otherwise.
+    """
     try:
-        customers = Customer.fetch_all_customers()
-        customers_list = [customer.to_dict() for customer in customers]
-        return jsonify(customers_list), 200
+        page_args = get_listing_page_args()
+        if page_args is None:
+            # Stream the full list straight from the cursor
+            return json_stream.response(customer.to_dict() for customer in Customer.iter_all_customers())
+
+        customers, next_after_id = Customer.fetch_customers_page(
+            page_args["after_id"], page_args["limit"], page_args["search"], page_args["sort"] or "customer_id", page_args["descending"]
+        )
+        return jsonify({
+            "items": [customer.to_dict() for customer in customers],
+            "next_after_id": next_after_id,
+            "has_more": next_after_id is not None
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except DatabaseReadException as e:
         return jsonify({'error': str(e)}), 500
 
@@ -426,10 +568,8 @@ def process_payment():
 
     
     try:
-        # Insert the payment
-        Payment.insert_payment(payment)
-        # Delete the Product items
-        ProductItem.delete_items_from_epcs(all_epcs)
+        # Insert the payment and delete the sold product items in one transaction
+        Payment.insert_payment(payment, all_epcs)
     except DatabaseInsertException as e:
         print(e)
         return jsonify({"success": False, "error": str(e)}), 500
@@ -446,7 +586,7 @@ def process_payment():
 
 @app.route('/api/payments/filtered', methods=['GET'])
 def get_filtered_payments():
-    """Get payments for the logged-in customer filtered by date range."""
+    """Get payments for the logged-in customer filtered by date range, one page at a time with ?after_id and ?limit."""
     if "user_id" not in session:
         return jsonify({"error": "Unauthorized"}), 401
     
@@ -465,9 +605,14 @@ def get_filtered_payments():
     
     try:
         customer_id = int(session["user_id"])
+        page_args = get_listing_page_args()
         
         # Use the Payment model method to fetch filtered payments
-        payments = Payment.fetch_payments_of_customer_by_date(customer_id, start_date, end_date)
+        next_after_id = None
+        if page_args is None:
+            payments = Payment.fetch_payments_of_customer_by_date(customer_id, start_date, end_date)
+        else:
+            payments, next_after_id = Payment.fetch_payments_page(customer_id, page_args["after_id"], page_args["limit"], start_date, end_date)
         
         # Convert to JSON-serializable format
         payments_list = []
@@ -490,9 +635,13 @@ def get_filtered_payments():
         
         return jsonify({
             "success": True,
-            "payments": payments_list
+            "payments": payments_list,
+            "next_after_id": next_after_id,
+            "has_more": next_after_id is not None
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"ERROR: Failed to get filtered payments: {e}")
         return jsonify({'error': str(e)}), 500
@@ -528,10 +677,10 @@ def get_sold_products():
         end_date = "9999-12-31 23:59:59"
     
     try:
-        sold_products = Product.fetch_products_sold(start_date, end_date, include_not_sold)
-        products_list = [{"product": item["product"].to_dict(), "number_sold": item["number_sold"]} for item in sold_products]
+        sold_products = Product.iter_products_sold(start_date, end_date, include_not_sold)
+        products_list = ({"product": item["product"].to_dict(), "number_sold": item["number_sold"]} for item in sold_products)
 
-        return jsonify(products_list), 200
+        return json_stream.response(products_list)
     except DatabaseReadException as e:
         return jsonify({'error': str(e)}), 500
 
@@ -629,10 +778,28 @@ def validate_date_format(date_string: str) -> bool:
 
 @app.route('/products/data', methods=['GET'])
 def get_products():
+    """
+    Get the products. With any of after_id, limit, q, category, sort or order, a single page is
+    returned as {"items": [...], "next_after_id": ..., "has_more": ...}; the full list otherwise.
+    """
     try:
-        products = Product.fetch_all_products()
-        products_list = [product.to_dict() for product in products]
-        return jsonify(products_list), 200
+        page_args = get_listing_page_args()
+        if page_args is None:
+            products = Product.fetch_all_products()
+            products_list = [product.to_dict() for product in products]
+            return jsonify(products_list), 200
+
+        products, next_after_id = Product.fetch_products_page(
+            page_args["after_id"], page_args["limit"], page_args["search"], request.args.get('category') or None,
+            page_args["sort"] or "product_id", page_args["descending"]
+        )
+        return jsonify({
+            "items": [product.to_dict() for product in products],
+            "next_after_id": next_after_id,
+            "has_more": next_after_id is not None
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except DatabaseReadException as e:
         return jsonify({'error': str(e)}), 500
 
@@ -731,6 +898,8 @@ def update_product(product_id):
         product.low_stock_threshold = low_thr
         product.moderate_stock_threshold = mod_thr
         Product.update_product(product)
+        # New thresholds may change the stock level of the product
+        stock_alerts.on_stock_change(product.product_id)
         return jsonify({'message': 'Product updated successfully'}), 200
     except DatabaseReadException as e:
         return jsonify({'error': str(e)}), 500
@@ -766,7 +935,10 @@ def delete_product(product_id):
 @app.route('/api/products/<int:product_id>/epcs', methods=['GET'])
 @login_required(role="admin")
 def get_product_epcs(product_id):
-    """Get all EPCs for a specific product."""
+    """
+    Get all EPCs for a specific product: {"epcs": [...], "epc_ranges": [{"prefix", "width", "start", "end", "first_epc", "last_epc", "count"}]}.
+    Runs of sequential EPCs are returned as ranges, as they are stored, instead of one EPC each.
+    """
     try:
         # Check if product exists
         product = Product.fetch_product_by_id(product_id)
@@ -774,28 +946,166 @@ def get_product_epcs(product_id):
             return jsonify({'error': 'Product not found'}), 404
         
         # Fetch EPCs
-        epcs = ProductItem.fetch_by_product_id(product_id)
-        epcs = [item.epc for item in epcs]
+        epcs, epc_ranges = ProductItem.fetch_epcs_by_product_id(product_id)
         
-        return jsonify({'epcs': epcs}), 200
+        return jsonify({'epcs': epcs, 'epc_ranges': epc_ranges}), 200
     except Exception as e:
         print(f"ERROR: Failed to fetch product EPCs: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/products/<int:product_id>/inventory', methods=['GET'])
+@login_required(role="admin")
+def get_product_inventory(product_id):
+    """Get the current stock of a product, or its stock at a point in time with ?at=YYYY-MM-DD HH:MM:SS (local time)."""
+    try:
+        product = Product.fetch_product_by_id(product_id)
+        if not product:
+            return jsonify({'error': 'Product not found'}), 404
+
+        at = request.args.get('at')
+        stock = Product.get_inventory_at(product_id, at) if at else product.available_stock
+
+        return jsonify({'product_id': product_id, 'stock': stock, 'at': at}), 200
+    except Exception as e:
+        print(f"ERROR: Failed to fetch product inventory: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/products/<int:product_id>/inventory/movements', methods=['GET'])
+@login_required(role="admin")
+def get_product_inventory_movements(product_id):
+    """Get the inventory ledger of a product, optionally between ?start_date and ?end_date (local time)."""
+    try:
+        product = Product.fetch_product_by_id(product_id)
+        if not product:
+            return jsonify({'error': 'Product not found'}), 404
+
+        movements = InventoryMovement.fetch_movements(product_id, request.args.get('start_date'), request.args.get('end_date'))
+
+        return jsonify({'movements': [movement.to_dict() for movement in movements]}), 200
+    except Exception as e:
+        print(f"ERROR: Failed to fetch inventory movements: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/products/<int:product_id>/inventory/batches', methods=['GET'])
+@login_required(role="admin")
+def get_product_inventory_batches(product_id):
+    """Get the inventory batches of a product still in stock, oldest first."""
+    try:
+        product = Product.fetch_product_by_id(product_id)
+        if not product:
+            return jsonify({'error': 'Product not found'}), 404
+
+        return jsonify({'batches': Product.fetch_inventory_batches(product_id)}), 200
+    except Exception as e:
+        print(f"ERROR: Failed to fetch inventory batches: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/inventory/aging', methods=['GET'])
+@login_required(role="admin")
+def get_aging_inventory():
+    """Get the inventory batches still in stock, oldest first, optionally ?min_age_days=N and ?category=name."""
+    min_age_days = request.args.get('min_age_days', 0, type=int)
+    if min_age_days < 0:
+        return jsonify({'error': 'min_age_days must be a non-negative integer'}), 400
+
+    try:
+        batches = Product.fetch_aging_inventory(min_age_days, request.args.get('category'))
+        return jsonify({'batches': batches}), 200
+    except Exception as e:
+        print(f"ERROR: Failed to fetch aging inventory: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/products/<int:product_id>/inventory/adjustments', methods=['POST'])
+@login_required(role="admin")
+def adjust_product_inventory(product_id):
+    """Correct the stock of a product. Expects {"quantity": signed change, "note": reason}."""
+    data = request.get_json(silent=True) or {}
+    quantity = data.get('quantity')
+    if type(quantity) != int or quantity == 0:
+        return jsonify({'error': 'quantity must be a non-zero integer'}), 400
+
+    try:
+        stock = Product.adjust_inventory(product_id, quantity, data.get('note'))
+        return jsonify({'product_id': product_id, 'stock': stock}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except DatabaseInsertException as e:
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        print(f"ERROR: Failed to adjust product inventory: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/products/epcs/resolve', methods=['POST'])
+def resolve_product_epcs():
+    """
+    Resolve a batch of EPCs (e.g. one RFID portal read) in one request.
+
+    Expects {"epcs": [...]} and returns the product of every EPC, the products
+    grouped with their quantity, and the unknown and duplicate EPCs.
+    """
+    data = request.get_json(silent=True) or {}
+    epcs = data.get("epcs")
+
+    if not isinstance(epcs, list) or not all(isinstance(epc, str) for epc in epcs):
+        return jsonify({'success': False, 'error': 'epcs must be a list of EPC strings.'}), 400
+
+    epcs = [epc.strip() for epc in epcs if epc.strip()]
+    if len(epcs) > EPC_RESOLVE_MAX_BATCH:
+        return jsonify({'success': False, 'error': f'At most {EPC_RESOLVE_MAX_BATCH} EPCs can be resolved at once.'}), 400
+
+    try:
+        products_by_epc = ProductItem.resolve_products(epcs)
+    except DatabaseReadException as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    items = []
+    groups = {}
+    unknown_epcs = []
+    duplicate_epcs = []
+    seen = set()
+    for epc in epcs:
+        # A tag read twice is only counted once
+        if epc in seen:
+            if epc not in duplicate_epcs:
+                duplicate_epcs.append(epc)
+            continue
+        seen.add(epc)
+
+        product = products_by_epc.get(epc)
+        items.append({'epc': epc, 'product_id': product.product_id if product else None})
+        if product is None:
+            unknown_epcs.append(epc)
+            continue
+
+        group = groups.get(product.product_id)
+        if group is None:
+            group = groups[product.product_id] = {'product': product.to_dict(), 'quantity': 0, 'epcs': []}
+        group['quantity'] += 1
+        group['epcs'].append(epc)
+
+    return jsonify({
+        'success': True,
+        'items': items,
+        'products': list(groups.values()),
+        'unknown_epcs': unknown_epcs,
+        'duplicate_epcs': duplicate_epcs
+    }), 200
+
+
 @app.route('/api/products/epc/<string:epc>', methods=['GET'])
 def get_product_by_epc(epc):
     """Get product details by EPC (product item)."""
     try:
-        # Fetch the product item
-        product_item = ProductItem.fetch_by_epc(epc)
-        if not product_item:
-            return jsonify({'error': 'EPC not found'}), 404
-        
-        # Fetch the associated product
-        product = product_item.product
+        # Resolve the EPC and its product in one lookup
+        product = ProductItem.resolve_product(epc)
         if not product:
-            return jsonify({'error': 'Product not found for this EPC'}), 404
+            return jsonify({'error': 'EPC not found'}), 404
         
         return jsonify(product.to_dict()), 200
     except DatabaseReadException as e:
@@ -810,16 +1120,10 @@ def get_product_by_epc(epc):
 def delete_product_epc(epc):
     """Delete a specific EPC (product item)."""
     try:
-        # Fetch the product item
-        product_item = ProductItem.fetch_by_epc(epc)
-        if not product_item:
+        # Delete the product item and take it out of the stock of its batch in one transaction
+        if not ProductItem.remove_items_from_stock([epc], note=f"EPC {epc} deleted"):
             return jsonify({'error': 'EPC not found'}), 404
-        
-        # Delete the product item
-        ProductItem.delete_items_from_epcs([epc])
 
-        Product.decrease_inventory(product_item.product.product_id, 1)
-        
         return jsonify({'message': 'EPC deleted successfully'}), 200
     except DatabaseDeleteException as e:
         return jsonify({'error': str(e)}), 500
@@ -832,14 +1136,12 @@ def delete_product_epc(epc):
 def receipt_details(payment_id):
     # Get the logged-in customer id from the session (if available)
     customer_id = session.get("user_id")
-    all_payments: list[Payment] = Payment.fetch_payment_by_customer_id(customer_id)
-    
-    print("---- DEBUG ----")
-    print("Payment ID requested:", payment_id)
-    print("Payments available:", [p.payment_id for p in all_payments])
-    
-    # Find the exact payment
-    payment = Payment.get_payment_from_list(all_payments, payment_id)
+
+    # Fetch the payment only if it belongs to the customer
+    try:
+        payment = Payment.fetch_payment_by_id(payment_id, customer_id)
+    except DatabaseReadException as e:
+        return jsonify(success=False, error=str(e)), 500
 
     if not payment:
         return jsonify(success=False, error="Payment not found")
@@ -881,28 +1183,9 @@ def receipt_details(payment_id):
 
 @app.route('/api/sensors', methods=['GET'])
 def get_sensors_data():
-    """Get latest sensor data for both fridges."""
+    """Get latest sensor data for every registered fridge."""
     try:
-        # Fetch latest data for Sensor 1 (Frig1)
-        sensor1_temp = SensorDataPoint.fetch_latest_sensor_data(1, "temperature")
-        sensor1_humidity = SensorDataPoint.fetch_latest_sensor_data(1, "humidity")
-        
-        # Fetch latest data for Sensor 2 (Frig2)
-        sensor2_temp = SensorDataPoint.fetch_latest_sensor_data(2, "temperature")
-        sensor2_humidity = SensorDataPoint.fetch_latest_sensor_data(2, "humidity")
-        
-        response = {
-            'sensor1': {
-                'temperature': float(sensor1_temp.value) if sensor1_temp else 0,
-                'humidity': float(sensor1_humidity.value) if sensor1_humidity else 0
-            },
-            'sensor2': {
-                'temperature': float(sensor2_temp.value) if sensor2_temp else 0,
-                'humidity': float(sensor2_humidity.value) if sensor2_humidity else 0
-            }
-        }
-        
-        return jsonify(response), 200
+        return jsonify(get_sensor_snapshot()), 200
     except Exception as e:
         print(f"ERROR: Failed to fetch sensor data: {e}")
         return jsonify({'error': str(e)}), 500
@@ -912,13 +1195,13 @@ def get_sensor_values(sensor_id):
     """Get all recent values for a specific sensor."""
     try:
         # Fetch sensor info
-        sensor = Sensor.fetch_sensor_by_id(sensor_id)
+        sensor = sensor_registry.get_by_id(sensor_id)
         if not sensor:
             return jsonify({'error': 'Sensor not found'}), 404
         
         # Fetch latest temperature and humidity
-        temp_data = SensorDataPoint.fetch_latest_sensor_data(sensor_id, "temperature")
-        humidity_data = SensorDataPoint.fetch_latest_sensor_data(sensor_id, "humidity")
+        temp_data = latest_readings.get(sensor_id, "temperature")
+        humidity_data = latest_readings.get(sensor_id, "humidity")
         
         response = {
             'sensor_id': sensor_id,
@@ -944,17 +1227,39 @@ def get_sensor_values(sensor_id):
 def get_ambient_context():
     """Get ambient context data from Pareto Anywhere (temperature, humidity, lux, battery)."""
     try:
-        # Optional: allow specifying a device ID in query parameters
-        device_id = request.args.get('device_id', None)
-        
-        # Fetch ambient context from Pareto Anywhere
-        context_data = pareto_service.get_ambient_context(device_id)
+        # Fetch ambient context from Pareto Anywhere (the device is fixed by the service), shared with the other dashboards
+        context_data = ambient_poller.get_latest()
         
         return jsonify(context_data), 200
     except Exception as e:
         print(f"ERROR: Failed to fetch ambient context: {e}")
         return jsonify({'error': str(e)}), 500
 
+# ============= LIVE UPDATES STREAM =============
+
+@app.route('/api/stream', methods=['GET'])
+@login_required(role="admin")
+def get_event_stream():
+    """Stream sensor readings, ambient context and stock changes as server-sent events."""
+    subscriber = event_broadcaster.subscribe()
+
+    # Start with the current state so the dashboard does not wait for the next reading
+    initial_events = []
+    try:
+        initial_events.append(EventBroadcaster.format_event("sensors", get_sensor_snapshot()))
+    except Exception as e:
+        print(f"WARNING: Could not load the initial sensor data of the event stream: {e}")
+    if ambient_poller.latest is not None:
+        initial_events.append(EventBroadcaster.format_event("ambient", ambient_poller.latest))
+
+    response = Response(
+        stream_with_context(event_broadcaster.stream(subscriber, initial_events)),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # ============= THRESHOLD API ROUTES =============
 
 @app.route('/api/threshold', methods=['GET'])
@@ -1011,14 +1316,10 @@ def turn_fan_on():
         sensor_id = request.args.get('sensor_id', default=1, type=int)
         
         # Determine which fridge based on sensor_id
-        if sensor_id == 1:
-            topic = "Frig1/fanControl"
-            location = "Frig1"
-        elif sensor_id == 2:
-            topic = "Frig2/fanControl"
-            location = "Frig2"
-        else:
+        topic = mqtt_service.get_fan_control_topic(sensor_id)
+        if topic is None:
             return jsonify({'error': 'Invalid sensor_id'}), 400
+        location = topic.split("/")[0]
         
         # Activate the fan via MQTT
         mqtt_service.activate_fan(topic)
@@ -1037,14 +1338,10 @@ def turn_fan_off():
         sensor_id = request.args.get('sensor_id', default=1, type=int)
         
         # Determine which fridge based on sensor_id
-        if sensor_id == 1:
-            topic = "Frig1/fanControl"
-            location = "Frig1"
-        elif sensor_id == 2:
-            topic = "Frig2/fanControl"
-            location = "Frig2"
-        else:
+        topic = mqtt_service.get_fan_control_topic(sensor_id)
+        if topic is None:
             return jsonify({'error': 'Invalid sensor_id'}), 400
+        location = topic.split("/")[0]
         
         # Deactivate the fan via MQTT
         mqtt_service.deactivate_fan(topic)
@@ -1093,35 +1390,44 @@ def reset_password():
 @app.route('/api/inventory/add-batch', methods=['POST'])
 @login_required(role="admin")
 def add_inventory_batch():
-    """Add a new inventory batch for a product."""
+    """
+    Add a new inventory batch for a product.
+
+    Expects {"product_id", "epcs": [...], "epc_ranges": [{"prefix", "start", "end"}], "received_date"}
+    with EPCs, EPC ranges or both. Ranges are stored without generating their EPCs.
+    """
     try:
         data = request.get_json()
         product_id = data.get('product_id')
-        epcs = data.get('epcs')
+        epcs = data.get('epcs') or []
+        epc_ranges = data.get('epc_ranges') or []
         received_date = data.get('received_date')
         
         # Validate inputs
-        if not product_id or not epcs:
+        if not product_id or not (epcs or epc_ranges):
             return jsonify({'error': 'Product ID and EPCs are required'}), 400
         
-        if type(epcs) != list or len(epcs) == 0:
-            return jsonify({'error': 'At least one EPC must be provided'}), 400
-        
-        # Determine quantity from EPCs
-        quantity = len(epcs)
-
-        # Validate the epcs
-        duplicate_epc = ProductItem.exists_product_item_with_epc_bulk(epcs)
-        if duplicate_epc:
-            return jsonify({'error': f'One or many duplicate EPCs found. First occurrence: {duplicate_epc}'}), 400
-        
-        # Add inventory batch
-        inv_batch_id = Product.add_inventory_batch(int(product_id), quantity, received_date)
-
-        # Add each product item
-        ProductItem.insert_bulk_items(epcs, inv_batch_id)
+        if type(epcs) != list or not all(isinstance(epc, str) for epc in epcs):
+            return jsonify({'error': 'epcs must be a list of EPC strings'}), 400
+
+        if type(epc_ranges) != list or not all(
+            isinstance(epc_range, dict) and isinstance(epc_range.get('prefix'), str)
+            and type(epc_range.get('start')) == int and type(epc_range.get('end')) == int
+            for epc_range in epc_ranges
+        ):
+            return jsonify({'error': 'epc_ranges must be a list of {prefix, start, end} ranges'}), 400
+
+        # Add the inventory batch and its items in one transaction, checking for duplicate EPCs
+        ProductItem.receive_inventory_batch(
+            int(product_id),
+            epcs,
+            [(epc_range['prefix'], epc_range['start'], epc_range['end']) for epc_range in epc_ranges],
+            received_date
+        )
         
         return jsonify({'message': 'Inventory batch added successfully'}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except DatabaseInsertException as e:
         return jsonify({'error': str(e)}), 500
     except Exception as e:
@@ -1142,33 +1448,30 @@ def get_environmental_report():
         return jsonify({'error': 'start_date and sensor_id are required parameters.'}), 400
 
     try:
-        temp_data_points = SensorDataPoint.fetch_sensor_data_over_time("temperature", start_date, end_date)
-        temp_data_list = [
-            {
-                'sensor_id': dp.sensor_id,
-                'value': float(dp.value),
-                'timestamp': dp.created_at
-            }
-            for dp in temp_data_points
-        ]
-
-        humidity_data_points = SensorDataPoint.fetch_sensor_data_over_time("humidity", start_date, end_date)
-        humidity_data_list = [
-            {
-                'sensor_id': dp.sensor_id,
-                'value': float(dp.value),
-                'timestamp': dp.created_at
-            }
-            for dp in humidity_data_points
-        ]
+        # Read the pre-aggregated rollups at the coarsest resolution that still shows a trend
+        resolution = request.args.get('resolution') or SensorDataRollup.choose_resolution(start_date, end_date, ENV_REPORT_MIN_POINTS)
+        if resolution not in SensorDataRollup.RESOLUTION_TABLES:
+            return jsonify({'error': f'Invalid resolution: {resolution}'}), 400
+
+        def rollup_points(data_type: str):
+            for rollup in SensorDataRollup.iter_rollups_over_time(data_type, start_date, end_date, resolution):
+                yield {
+                    'sensor_id': rollup.sensor_id,
+                    'value': round(rollup.mean_value, 2),
+                    'min': rollup.min_value,
+                    'max': rollup.max_value,
+                    'last': rollup.last_value,
+                    'count': rollup.sample_count,
+                    'timestamp': rollup.bucket_start
+                }
 
-        print(str(len(humidity_data_list)) + " " + str(len(temp_data_list)))
-        
-        return jsonify({
+        # Stream the points as they are read, instead of building both lists first
+        return json_stream.response({
             'success': True,
-            'temperature_data': temp_data_list,
-            'humidity_data': humidity_data_list
-        }), 200
+            'resolution': resolution,
+            'temperature_data': rollup_points("temperature"),
+            'humidity_data': rollup_points("humidity")
+        })
     except Exception as e:
         print(f"ERROR: Failed to get environmental report: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1323,13 +1626,8 @@ def get_system_performance_report():
         # Average transaction value
         avg_transaction = total_revenue / total_transactions if total_transactions > 0 else 0
         
-        # Device uptime (mock data - based on sensor data availability)
-        cursor.execute("""
-            SELECT COUNT(DISTINCT DATE(created_at)) as days_active
-            FROM SensorDataPoints
-            WHERE created_at BETWEEN ? AND ?
-        """, (start_date, end_date))
-        days_active = cursor.fetchone()['days_active'] or 0
+        # Device uptime, from the day rollups that outlive the raw readings
+        days_active = SensorDataRollup.count_active_days(start_date, end_date)
         
         return jsonify({
             'success': True,
@@ -1345,38 +1643,47 @@ def get_system_performance_report():
 @app.route('/api/reports/fan-usage', methods=['GET'])
 @login_required(role="admin")
 def get_fan_usage_report():
-    """Get fan usage history (mock data for now)."""
+    """Get the daily fan usage history, with the temperature readings of each day."""
     try:
         start_date = request.args.get('start_date', '2024-01-01')
         end_date = request.args.get('end_date', str(date.today()))
         
-        db = get_db()
-        db.row_factory = sqlite3.Row
-        cursor = db.cursor()
-        
-        # Fan usage data from sensor activations (based on temperature spikes)
-        cursor.execute("""
-            SELECT 
-                DATE(created_at) as date,
-                COUNT(*) as sensor_readings,
-                AVG(CAST(value as FLOAT)) as avg_temperature
-            FROM SensorDataPoints
-            WHERE data_type = 'temperature' AND created_at BETWEEN ? AND ?
-            GROUP BY DATE(created_at)
-            ORDER BY date DESC
-        """, (start_date, end_date))
-        
-        daily_usage = [dict(row) for row in cursor.fetchall()]
+        # Day rollups are never pruned, unlike the raw readings
+        daily_usage = SensorDataRollup.fetch_daily_fan_usage(start_date, end_date)
         
         return jsonify({
             'success': True,
             'fan_usage_data': daily_usage,
-            'note': 'Fan usage estimated based on temperature readings exceeding threshold'
+            'note': 'fan_on_ratio is the share of fan status readings of the day that reported the fan on'
         }), 200
     except Exception as e:
         print(f"ERROR: Failed to get fan usage report: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ============= METRICS API ROUTES =============
+
+@app.route('/api/metrics', methods=['GET'])
+@login_required(role="admin")
+def get_metrics():
+    """Get internal performance counters (connection pool, caches, sensor ingestion and live updates)."""
+    try:
+        return jsonify({
+            'db_pool': BaseModel.get_connection_pool_stats(),
+            'sensor_ingestion': mqtt_service.ingestion_service.stats(),
+            'mqtt_router': mqtt_service.topic_router.stats(),
+            'sensor_registry': sensor_registry.stats(),
+            'latest_readings': latest_readings.stats(),
+            'event_stream': event_broadcaster.stats(),
+            'ambient_poller': ambient_poller.stats(),
+            'stock_alerts': stock_alerts.stats(),
+            'sensor_retention': sensor_retention.stats(),
+            'product_cache': Product.get_cache_stats(),
+            'epc_index': ProductItem.get_epc_index_stats()
+        }), 200
+    except Exception as e:
+        print(f"ERROR: Failed to get metrics: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # ============= HELPER FUNCTIONS =============
 
 if __name__ == '__main__':
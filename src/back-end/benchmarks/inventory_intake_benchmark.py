@@ -0,0 +1,74 @@
+"""
+Benchmark of inventory batch intake through ProductItem.receive_inventory_batch.
+
+Receives batches of 1k, 100k and 1M sequential items into a scratch database,
+once as an explicit EPC list (what the browser used to send) and once as a
+(prefix, start, end) number range, then reports the time per batch, the items
+per second and the size of the database files.
+
+Usage (from the src folder):
+    python back-end/benchmarks/inventory_intake_benchmark.py [batch_size ...]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+sys.path.insert(0, BACKEND_DIR)
+
+from models.base_model import BaseModel
+from models.product_item_model import ProductItem
+
+BATCH_SIZES = [1_000, 100_000, 1_000_000]
+PRODUCT_ID = 1
+
+
+def create_database(path: str) -> None:
+    # Same setup as a fresh install: base schema, then the migrations
+    with open(os.path.join(BaseModel.PROJECT_ROOT, "db", "sql_connected_smarties.sql"), encoding="utf-8") as schema_file:
+        connection = sqlite3.connect(path)
+        connection.executescript(schema_file.read())
+        connection.close()
+
+    BaseModel.DB_NAME = path
+    BaseModel.migrate_schema()
+    ProductItem.load_epc_index(background=False)
+
+
+def wait_for_epc_index() -> None:
+    # Large list batches fill the EPC index, which is then rebuilt in the background
+    while ProductItem.get_epc_index_stats()["loading"]:
+        time.sleep(0.05)
+
+
+def run(batch_size: int, mode: str, prefix: str) -> float:
+    wait_for_epc_index()
+    if mode == "list":
+        # The list is built by the client, so it is not part of the measured time
+        epcs = ProductItem.generate_bulk_epcs(1, batch_size, prefix)
+        started = time.perf_counter()
+        ProductItem.receive_inventory_batch(PRODUCT_ID, epcs)
+    else:
+        started = time.perf_counter()
+        ProductItem.receive_inventory_batch(PRODUCT_ID, [], [(prefix, 1, batch_size)])
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    batch_sizes = [int(arg) for arg in sys.argv[1:]] or BATCH_SIZES
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "intake_benchmark.db")
+        create_database(database)
+
+        print(f"{'mode':>6} {'items':>10} {'seconds':>10} {'items/sec':>14} {'db size (KB)':>14}")
+        for index, batch_size in enumerate(batch_sizes):
+            for mode in ("list", "range"):
+                # A new letter prefix per batch, so that every batch is free of collisions
+                elapsed = run(batch_size, mode, f"{mode[0].upper()}{chr(ord('A') + index)}")
+                # Committed pages may still be in the write-ahead log
+                size_kb = sum(os.path.getsize(path) for path in (database, f"{database}-wal") if os.path.exists(path)) // 1024
+                print(f"{mode:>6} {batch_size:>10,} {elapsed:>10.3f} {batch_size / elapsed:>14,.0f} {size_kb:>14,}")
@@ -0,0 +1,66 @@
+"""
+Benchmark of MQTT message dispatch through MQTTTopicRouter.
+
+Simulates N fridges publishing temperature, humidity and fan status readings
+and measures how many messages per second the router resolves and dispatches.
+Handlers are no-ops so the numbers isolate routing cost from validation and I/O.
+
+Usage (from the src folder):
+    python back-end/benchmarks/mqtt_router_benchmark.py [message_count]
+"""
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(BACKEND_DIR))
+sys.path.insert(0, BACKEND_DIR)
+
+from models.sensor_model import Sensor
+from utils.sensor_registry import SensorRegistry
+from utils.mqtt_topic_router import MQTTTopicRouter
+
+FRIDGE_COUNTS = [1, 10, 500]
+MEASUREMENTS = ["temperature", "humidity", "fanControl/status"]
+
+
+def build_router(fridge_count: int) -> tuple[MQTTTopicRouter, list[tuple[str, str]]]:
+    sensors = []
+    for sensor_id in range(1, fridge_count + 1):
+        sensor = Sensor("temperature/humidity", f"Store 1: Fridge {sensor_id}", f"Frig{sensor_id}")
+        sensor.sensor_id = sensor_id
+        sensors.append(sensor)
+
+    registry = SensorRegistry(autoload=False)
+    registry.replace(sensors)
+
+    router = MQTTTopicRouter(registry)
+    for measurement in MEASUREMENTS:
+        router.add_route(measurement, lambda sensor, topic, payload: None)
+
+    messages = [(f"{sensor.topic}/{measurement}", f"{sensor.sensor_id}:4.5") for sensor in sensors for measurement in MEASUREMENTS]
+    return router, messages
+
+
+def run(fridge_count: int, message_count: int) -> float:
+    router, messages = build_router(fridge_count)
+    dispatch = router.dispatch
+    message_total = len(messages)
+
+    started = time.perf_counter()
+    for index in range(message_count):
+        topic, payload = messages[index % message_total]
+        dispatch(topic, payload)
+    elapsed = time.perf_counter() - started
+
+    assert router.dispatched == message_count
+    router.sensor_registry.close()
+    return message_count / elapsed
+
+
+if __name__ == "__main__":
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    print(f"{'fridges':>8} {'subscriptions':>14} {'messages/sec':>14}")
+    for fridge_count in FRIDGE_COUNTS:
+        rate = run(fridge_count, message_count)
+        print(f"{fridge_count:>8} {len(MEASUREMENTS):>14} {rate:>14,.0f}")
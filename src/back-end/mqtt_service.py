@@ -1,17 +1,37 @@
+import functools
 import paho.mqtt.client as mqtt
 from .utils.validation_utils import ValidationUtils
+from .utils.sensor_ingestion_service import SensorIngestionService
+from .utils.sensor_registry import SensorRegistry
+from .utils.mqtt_topic_router import MQTTTopicRouter
 from models.sensor_data_point_model import SensorDataPoint
 from models.sensor_model import Sensor
 
 class MQTTService:
+
+    # Measurement topic suffix -> stored data type
+    MEASUREMENT_DATA_TYPES = {
+        "temperature": "temperature",
+        "humidity": "humidity",
+        "fanControl/status": "fan_status",
+    }
     
-    def __init__(self, server, port = 1883):
+    def __init__(self, server, port = 1883, ingestion_service: SensorIngestionService = None, sensor_registry: SensorRegistry = None):
         # Save server and port
         self.mqtt_server = server
         self.port = port
         
         # Callback for threshold checking (will be set by app.py)
         self.threshold_callback = None
+
+        # Readings are queued here and written in batches off the network thread
+        self.ingestion_service = ingestion_service or SensorIngestionService()
+        self.ingestion_service.add_listener(self._on_sensor_data_written)
+
+        # Devices are resolved from the Sensors table and messages routed by measurement
+        self.sensor_registry = sensor_registry or SensorRegistry()
+        self.topic_router = MQTTTopicRouter(self.sensor_registry)
+        self._setup_topic_routes()
         
         self.is_connected = False
         
@@ -44,11 +64,16 @@ class MQTTService:
             print(f"INFO: Flask app will continue running without MQTT functionality")
             self.is_connected = False
     
+    def _setup_topic_routes(self):
+        # One route per measurement, shared by every device: '<device>/<measurement>'
+        for measurement, data_type in self.MEASUREMENT_DATA_TYPES.items():
+            self.topic_router.add_route(measurement, functools.partial(self._receive_sensor_data, data_type))
+    
+
     def _setup_topic_callbacks(self):
-        self.mqtt_client.subscribe("Frig1/#")
-        self.mqtt_client.message_callback_add("Frig1/#", self._receive_fridge1_sensor_data)
-        self.mqtt_client.subscribe("Frig2/#")
-        self.mqtt_client.message_callback_add("Frig2/#", self._receive_fridge2_sensor_data)
+        for topic_filter in self.topic_router.subscriptions:
+            self.mqtt_client.subscribe(topic_filter)
+            self.mqtt_client.message_callback_add(topic_filter, self._on_device_message)
     
 
     def _on_connect(self, client, userdata, flags, rc):
@@ -56,28 +81,13 @@ class MQTTService:
             print(f"Connected to MQTT server at address/host: {self.mqtt_server} , port: {self.port}")
         else:
             print(f"Failed to connect to the MQTT server. Code: {rc}")
+    
+
+    def _on_device_message(self, client, userdata, message):
+        self.topic_router.dispatch(message.topic, message.payload.decode())
              
         
-    def _receive_fridge1_sensor_data(self, client, userdata, message):
-        # Map the sensor type
-        data_type = None
-        topic = message.topic
-
-        if topic == "Frig1/temperature":
-            data_type = "temperature"
-        elif topic == "Frig1/humidity":
-            data_type = "humidity"
-        elif topic == "Frig1/fanControl/status":
-            data_type = "fan_status"
-        elif topic == "Frig1/fanControl":
-            return # Ignore fanControl commands
-        else:
-            print(f"Unrecognized topic: {topic}")
-            return
-        
-        # Decode the data as string
-        sensor_message = message.payload.decode()
-
+    def _receive_sensor_data(self, data_type: str, sensor: Sensor, topic: str, sensor_message: str):
         # Validate the sensor message
         if data_type == "temperature" or data_type == "humidity":
             if not ValidationUtils.is_numeric_sensor_message_valid(sensor_message):
@@ -93,10 +103,9 @@ class MQTTService:
         sensor_id = int(message_parts[0])
         sensor_value = message_parts[1]
 
-        # Validate the sensor ID
-        sensor = Sensor.fetch_sensor_by_id(sensor_id)
-        if sensor == None:
-            print(f"WARNING: Received '{sensor_message}' from unknown sensor with declared ID: {sensor_id}")
+        # Validate the sensor ID against the device that published it
+        if sensor_id != sensor.sensor_id:
+            print(f"WARNING: Received '{sensor_message}' on '{topic}' with declared ID {sensor_id}, expected {sensor.sensor_id}")
             return
 
         # Check for sensor type and validate sensor value
@@ -114,90 +123,40 @@ class MQTTService:
                 return # Do not insert in DB
             sensor_value = sensor_value.lower()
         
-        print(f"INFO: Received sensor value from Fridge 1 '{sensor_value}' on topic '{topic}'")
+        print(f"INFO: Received sensor value from {sensor.topic} '{sensor_value}' on topic '{topic}'")
         
-        try:
-            sensor_data_point = SensorDataPoint(sensor_id=sensor_id, data_type=data_type, value=sensor_value)
-            SensorDataPoint.insert_sensor_data_point(sensor_data_point)
-            print(f"INFO: Saved Frig1 {data_type} data to database: {sensor_value}")
-            
-            if data_type == "temperature" and self.threshold_callback:
-                self.threshold_callback(1, float(sensor_value), "Frig1")
-                
-        except Exception as e:
-            print(f"ERROR: Failed to save sensor data to database: {e}")
+        # Queue the reading; it is written to the database by the ingestion writer
+        sensor_data_point = SensorDataPoint(sensor_id=sensor_id, data_type=data_type, value=sensor_value)
+        if not self.ingestion_service.enqueue(sensor_data_point):
+            print(f"WARNING: Sensor ingestion queue is full, dropped {sensor.topic} {data_type} reading: {sensor_value}")
     
 
-    def _receive_fridge2_sensor_data(self, client, userdata, message):
-        # Map the sensor type
-        data_type = None
-        topic = message.topic
-
-        if topic == "Frig2/temperature":
-            data_type = "temperature"
-        elif topic == "Frig2/humidity":
-            data_type = "humidity"
-        elif topic == "Frig2/fanControl/status":
-            data_type = "fan_status"
-        elif topic == "Frig2/fanControl":
-            return # Ignore fanControl commands
-        else:
-            print(f"Unrecognized topic: {topic}")
+    def _on_sensor_data_written(self, sensor_data_points: list[SensorDataPoint]) -> None:
+        # Runs on the ingestion writer thread once a batch is committed
+        if not self.threshold_callback:
             return
-        
-        # Decode the data as string
-        sensor_message = message.payload.decode()
 
-        # Validate the sensor message
-        if data_type == "temperature" or data_type == "humidity":
-            if not ValidationUtils.is_numeric_sensor_message_valid(sensor_message):
-                print(f"WARNING: Invalid sensor message received: {sensor_message}")
-                return
-        else:
-            if not ValidationUtils.is_boolean_sensor_message_valid(sensor_message):
-                print(f"WARNING: Invalid sensor message received: {sensor_message}")
-                return
-        
-        # Split the message into two parts
-        message_parts = sensor_message.split(":")
-        sensor_id = int(message_parts[0])
-        sensor_value = message_parts[1]
+        for sensor_data_point in sensor_data_points:
+            if sensor_data_point.data_type == "temperature":
+                sensor = self.sensor_registry.get_by_id(sensor_data_point.sensor_id)
+                location = sensor.topic if sensor else f"Sensor {sensor_data_point.sensor_id}"
+                self.threshold_callback(sensor_data_point.sensor_id, float(sensor_data_point.value), location)
+    
 
-        # Validate the sensor ID
-        sensor = Sensor.fetch_sensor_by_id(sensor_id)
-        if sensor == None:
-            print(f"WARNING: Received '{sensor_message}' from unknown sensor with declared ID: {sensor_id}")
-            return
+    def get_fan_control_topic(self, sensor_id: int) -> str | None:
+        """
+        Get the topic the fan controller of a sensor's fridge is subscribed to.
 
-        # Check for sensor type and validate sensor value
-        if data_type == "temperature":
-            if not ValidationUtils.is_string_numeric(sensor_value, 0):
-                print(f"WARNING: Invalid sensor data received: {sensor_value}")
-                return # Do not insert in DB
-        elif data_type == "humidity":
-            if not ValidationUtils.is_string_numeric(sensor_value, 0) or float(sensor_value) > 100:
-                print(f"WARNING: Invalid sensor data received: {sensor_value}")
-                return # Do not insert in DB
-        elif data_type == "fan_status":
-            if not ValidationUtils.is_boolean(sensor_value):
-                print(f"WARNING: Invalid sensor data received: {sensor_value}")
-                return # Do not insert in DB
-            sensor_value = sensor_value.lower()
-        else:
-            return # Unrecognized sensor type, do not insert
-        
-        print(f"INFO: Received sensor value from fridge 2 '{sensor_value}' on topic '{topic}'")
-        
-        try:
-            sensor_data_point = SensorDataPoint(sensor_id=sensor_id, data_type=data_type, value=sensor_value)
-            SensorDataPoint.insert_sensor_data_point(sensor_data_point)
-            print(f"INFO: Saved Frig2 {data_type} data to database: {sensor_value}")
-            
-            if data_type == "temperature" and self.threshold_callback:
-                self.threshold_callback(2, float(sensor_value), "Frig2")
-                
-        except Exception as e:
-            print(f"ERROR: Failed to save sensor data to database: {e}")
+        Args:
+            sensor_id (int): The ID of the sensor.
+
+        Returns:
+            str | None: The control topic, or None if the sensor is unknown.
+        """
+        sensor = self.sensor_registry.get_by_id(sensor_id)
+        if sensor is None:
+            return None
+        return f"{sensor.topic}/fanControl"
     
 
     def activate_fan(self, topic: str) -> None:
@@ -1,4 +1,5 @@
 import { showToast } from './notifications.js';
+import { t } from './i18n.js';
 
 const fanStatus = "off"
 
@@ -86,7 +87,85 @@ function updateHumidityGauge(humidity, gaugeId) {
   humidityValueElement.textContent = Math.round(clampedHumidity)
 
   // Update the CSS variable for the gauge fill
-  document.documentElement.style.setProperty(`--humidity-${gaugeId}`, clampedHumidity)
+  document.getElementById(`humidity-gauge-${gaugeId}`).style.setProperty("--humidity", clampedHumidity)
+}
+
+// Sensor numbers of the fridge cards on the page, in display order
+const fridgeCards = []
+
+function createFridgeCard(sensorNumber) {
+  const card = document.createElement("div")
+  card.className = "dashboard-card fridge-card"
+  card.id = `fridge-card-${sensorNumber}`
+  card.innerHTML = `
+    <h2 class="fridge-title"><span data-i18n="fridge">${t("fridge")}</span> ${sensorNumber} (DHT11)</h2>
+    <div class="fridge-monitors">
+      <!-- Thermometer -->
+      <div class="monitor-card">
+        <h3 data-i18n="temperature">${t("temperature")}</h3>
+        <div id="thermometer-wrapper-${sensorNumber}">
+          <div id="termometer-${sensorNumber}" class="termometer">
+            <div id="temperature-${sensorNumber}" class="temperature" style="height:0" data-value="0°C"></div>
+            <div class="graduations"></div>
+          </div>
+        </div>
+        <div class="sensor-status" id="sensor${sensorNumber}-temp-status">
+          <span class="status-dot"></span>
+          <span data-i18n="reading">${t("reading")}</span>
+        </div>
+      </div>
+
+      <!-- Humidity Gauge -->
+      <div class="monitor-card">
+        <h3 data-i18n="humidity">${t("humidity")}</h3>
+        <div class="humidity-gauge-container">
+          <div id="humidity-gauge-${sensorNumber}" class="humidity-gauge">
+            <div class="humidity-gauge-label">
+              <span class="humidity-value" id="humidity-value-${sensorNumber}">0</span>
+              <span class="humidity-unit">%</span>
+            </div>
+          </div>
+        </div>
+        <div class="sensor-status" id="sensor${sensorNumber}-humidity-status">
+          <span class="status-dot"></span>
+          <span data-i18n="reading">${t("reading")}</span>
+        </div>
+
+        <!-- Fan control under humidity -->
+        <div class="fan-control-compact">
+          <div class="fan-visual-compact">
+            <img src="../static/images/electric_fan.gif" id="fan-${sensorNumber}-img" width="60" height="60" alt="Electric Fan" />
+            <div class="sensor-status">
+              <span class="status-dot" id="fan-dot-${sensorNumber}"></span>
+              <span id="fan-status-text-${sensorNumber}" data-i18n="deactivated">${t("deactivated")}</span>
+            </div>
+          </div>
+          <div class="fan-controls-compact">
+            <button class="btn btn-sm btn-success" onclick="controlFan('on', '${sensorNumber}')" data-i18n="turnOn">${t("turnOn")}</button>
+            <button class="btn btn-sm btn-danger" onclick="controlFan('off', '${sensorNumber}')" data-i18n="turnOff">${t("turnOff")}</button>
+          </div>
+        </div>
+      </div>
+    </div>
+  `
+  return card
+}
+
+// Add the card of a sensor the first time it shows up, keeping the cards ordered by sensor number
+function ensureFridgeCard(sensorNumber) {
+  if (fridgeCards.includes(sensorNumber)) return
+
+  const card = createFridgeCard(sensorNumber)
+  const nextSensorNumber = fridgeCards.find((number) => number > sensorNumber)
+  const nextCard = nextSensorNumber === undefined ? null : document.getElementById(`fridge-card-${nextSensorNumber}`)
+  document.getElementById("dashboard-row").insertBefore(card, nextCard)
+
+  fridgeCards.push(sensorNumber)
+  fridgeCards.sort((a, b) => a - b)
+
+  // Fans start off (Deactivated)
+  window.fanStatuses[sensorNumber] = "off"
+  updateFanUI(sensorNumber, false)
 }
 
 async function fetchSensorData() {
@@ -94,25 +173,7 @@ async function fetchSensorData() {
     const response = await fetch("/api/sensors")
     if (response.ok) {
       const data = await response.json()
-
-      const sensor1Temp = Number.parseFloat(data.sensor1.temperature)
-      const sensor1Humidity = Number.parseFloat(data.sensor1.humidity)
-      updateThermometer(sensor1Temp, 1)
-      updateHumidityGauge(sensor1Humidity, 1)
-
-      const sensor2Temp = Number.parseFloat(data.sensor2.temperature)
-      const sensor2Humidity = Number.parseFloat(data.sensor2.humidity)
-      updateThermometer(sensor2Temp, 2)
-      updateHumidityGauge(sensor2Humidity, 2)
-
-      // This function is now only responsible for Fridge 1 and Fridge 2
-      
-      document.getElementById("sensor1-temp-status").innerHTML = '<span class="status-dot"></span><span>Active</span>'
-      document.getElementById("sensor1-humidity-status").innerHTML =
-        '<span class="status-dot"></span><span>Active</span>'
-      document.getElementById("sensor2-temp-status").innerHTML = '<span class="status-dot"></span><span>Active</span>'
-      document.getElementById("sensor2-humidity-status").innerHTML =
-        '<span class="status-dot"></span><span>Active</span>'
+      renderSensorData(data)
     } else {
       throw new Error("Failed to fetch sensor data")
     }
@@ -120,10 +181,30 @@ async function fetchSensorData() {
     console.error("Error fetching sensor data:", error)
     showToast("Sensor Error", "Failed to fetch sensor data", "error")
 
-    document.getElementById("sensor1-temp-status").innerHTML = "<span>Error</span>"
-    document.getElementById("sensor1-humidity-status").innerHTML = "<span>Error</span>"
-    document.getElementById("sensor2-temp-status").innerHTML = "<span>Error</span>"
-    document.getElementById("sensor2-humidity-status").innerHTML = "<span>Error</span>"
+    for (const sensorNumber of fridgeCards) {
+      document.getElementById(`sensor${sensorNumber}-temp-status`).innerHTML = "<span>Error</span>"
+      document.getElementById(`sensor${sensorNumber}-humidity-status`).innerHTML = "<span>Error</span>"
+    }
+  }
+}
+
+// Update the gauges of the fridges present in the data (streamed events may only contain some of them),
+// adding a card for every sensor seen for the first time
+function renderSensorData(data) {
+  for (const [key, sensor] of Object.entries(data)) {
+    const match = /^sensor(\d+)$/.exec(key)
+    if (!match || !sensor) continue
+
+    const sensorNumber = Number.parseInt(match[1])
+    ensureFridgeCard(sensorNumber)
+
+    updateThermometer(Number.parseFloat(sensor.temperature), sensorNumber)
+    updateHumidityGauge(Number.parseFloat(sensor.humidity), sensorNumber)
+
+    document.getElementById(`sensor${sensorNumber}-temp-status`).innerHTML =
+      '<span class="status-dot"></span><span>Active</span>'
+    document.getElementById(`sensor${sensorNumber}-humidity-status`).innerHTML =
+      '<span class="status-dot"></span><span>Active</span>'
   }
 }
 
@@ -271,33 +352,7 @@ async function fetchAmbientContext() {
     const response = await fetch("/api/ambient-context")
     if (response.ok) {
       const data = await response.json()
-      
-      // Format the data for updateAmbientContext
-      const contextData = {
-        motion: { detected: false, device: data.device_id || "unknown", time: data.timestamp },
-        temperature: {
-          current: data.temperature, 
-          max: data.temperature,
-          min: data.temperature,
-        },
-        humidity: {
-          current: data.humidity, 
-          max: data.humidity,
-          min: data.humidity,
-        },
-        light: { 
-          current: data.lux, 
-          max: data.lux, 
-          min: data.lux 
-        },
-        battery: { 
-          current: data.battery, 
-          max: data.battery, 
-          min: data.battery 
-        },
-      }
-      
-      updateAmbientContext(contextData)
+      renderAmbientContext(data)
     } else {
       throw new Error("Failed to fetch ambient context")
     }
@@ -316,6 +371,35 @@ async function fetchAmbientContext() {
   }
 }
 
+function renderAmbientContext(data) {
+  // Format the data for updateAmbientContext
+  const contextData = {
+    motion: { detected: false, device: data.device_id || "unknown", time: data.timestamp },
+    temperature: {
+      current: data.temperature, 
+      max: data.temperature,
+      min: data.temperature,
+    },
+    humidity: {
+      current: data.humidity, 
+      max: data.humidity,
+      min: data.humidity,
+    },
+    light: { 
+      current: data.lux, 
+      max: data.lux, 
+      min: data.lux 
+    },
+    battery: { 
+      current: data.battery, 
+      max: data.battery, 
+      min: data.battery 
+    },
+  }
+  
+  updateAmbientContext(contextData)
+}
+
 // This function now handles null values gracefully
 function updateAmbientContext(data) {
   // Helper function to update text or show placeholder
@@ -381,25 +465,16 @@ function updateAmbientContext(data) {
 document.addEventListener("DOMContentLoaded", () => {
   initAmbientContext() // Fetch ambient context immediately
 
-  // Initialize all fans to OFF (Deactivated)
-  window.fanStatuses = {
-    1: "off",
-    2: "off"
-  };
-
-  // Make sure UI starts correctly
-  updateFanUI(1);
-  updateFanUI(2);
+  // Fans of the fridge cards, added as the sensors show up
+  window.fanStatuses = {};
 
   // Fetch sensor data immediately and then every 5s
   
   initHumidityChart()
   loadThresholds()
   fetchSensorData()
-  // Update sensor data every 5 seconds
-  setInterval(fetchSensorData, 5000)
-  // Update ambient context every 5 seconds
-  setInterval(fetchAmbientContext, 5000)
+  // Receive sensor data and ambient context as they arrive, polling every 5 seconds as a fallback
+  startLiveUpdates()
 
   // Add real-time validation for modal inputs
   document.getElementById('high-threshold-input').addEventListener('input', () => {
@@ -410,6 +485,54 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 })
 
+// ============= LIVE UPDATES =============
+
+let liveUpdatesSource = null
+let pollingTimers = []
+
+function startPolling() {
+  if (pollingTimers.length > 0) return
+  // Update sensor data every 5 seconds
+  pollingTimers.push(setInterval(fetchSensorData, 5000))
+  // Update ambient context every 5 seconds
+  pollingTimers.push(setInterval(fetchAmbientContext, 5000))
+}
+
+function stopPolling() {
+  pollingTimers.forEach((timer) => clearInterval(timer))
+  pollingTimers = []
+}
+
+function startLiveUpdates() {
+  // Browsers without server-sent events keep polling
+  if (!window.EventSource) {
+    startPolling()
+    return
+  }
+
+  liveUpdatesSource = new EventSource("/api/stream")
+
+  liveUpdatesSource.onopen = () => {
+    stopPolling()
+  }
+
+  liveUpdatesSource.addEventListener("sensors", (event) => {
+    renderSensorData(JSON.parse(event.data))
+  })
+
+  liveUpdatesSource.addEventListener("ambient", (event) => {
+    renderAmbientContext(JSON.parse(event.data))
+  })
+
+  liveUpdatesSource.onerror = () => {
+    // Poll while the stream is down; the browser reconnects on its own unless the stream was refused
+    startPolling()
+    if (liveUpdatesSource.readyState === EventSource.CLOSED) {
+      liveUpdatesSource = null
+    }
+  }
+}
+
 // Close modal when clicking outside
 window.onclick = (event) => {
   const modal = document.getElementById("threshold-modal")
@@ -11,8 +11,7 @@ const translations = {
     // Home page
     homeTitle: "System Control",
     homeSubtitle: "Monitor sensors and control devices",
-    fridge1: "Fridge 1 (DHT11)",
-    fridge2: "Fridge 2 (DHT11)",
+    fridge: "Fridge",
     temperature: "Temperature",
     humidity: "Humidity",
     reading: "Reading...",
@@ -225,8 +224,7 @@ const translations = {
     // Home page
     homeTitle: "Contrôle du Système",
     homeSubtitle: "Surveiller les capteurs et contrôler les appareils",
-    fridge1: "Frigo 1 (DHT11)",
-    fridge2: "Frigo 2 (DHT11)",
+    fridge: "Frigo",
     temperature: "Température",
     humidity: "Humidité",
     reading: "Lecture...",
@@ -288,6 +288,7 @@ function resetForm() {
 // Inventory batch functions
 let currentProductId = null;
 let generatedEPCs = [];
+let generatedEPCRanges = []; // {prefix, start, end}, expanded by the server
 
 function openInventoryModal() {
     currentProductId = document.getElementById('product_id').value;
@@ -299,6 +300,7 @@ function openInventoryModal() {
     // Reset the form and EPC list
     document.getElementById('inventory-batch-form').reset();
     generatedEPCs = [];
+    generatedEPCRanges = [];
     updateEPCDisplay();
     clearEPCErrors();
     
@@ -336,52 +338,20 @@ function generateEPCsFromRange() {
     }
     
     const epcLength = 24;
-    const startStrLength = String(start).length;
     
-    if (prefix.length + startStrLength > epcLength) {
-        setFieldError('epc_range', `Prefix and start number are too long (max ${epcLength} chars)`); // <-- FIX: Renamed function
+    if (prefix.length + String(end).length > epcLength) {
+        setFieldError('epc_range', `Prefix and end number are too long (max ${epcLength} chars)`);
         return;
     }
     
-    // Generate EPCs
-    const newEPCs = [];
-    const duplicates = [];
-    for (let i = start; i <= end; i++) {
-        const numberStr = String(i);
-        // Pad with zeros between prefix and number
-        const paddingLength = epcLength - prefix.length - numberStr.length;
-        if (paddingLength < 0) {
-            // This happens if the end number is longer than the start number (e.g., 9 -> 10)
-            // and exceeds the 24 char limit.
-            showToast('Warning', `Skipped EPC for number ${i} as it exceeds ${epcLength} characters.`, 'warning');
-            continue; 
-        }
-        
-        const padding = '0'.repeat(paddingLength);
-        const epc = `${prefix}${padding}${numberStr}`;
-        
-        // Check if EPC already exists in the list
-        if (generatedEPCs.includes(epc)) {
-            duplicates.push(epc);
-        } else {
-            newEPCs.push(epc);
-        }
-    }
-    
-    // Warn user if duplicates were found
-    if (duplicates.length > 0) {
-        showToast('Warning', `Skipped ${duplicates.length} duplicate EPC(s)`, 'warning');
-    }
-    
-    // Only add non-duplicate EPCs
-    if (newEPCs.length === 0 && duplicates.length > 0) {
-        setFieldError('epc_range', 'All EPCs in this range already exist in the list'); 
-    } else if (newEPCs.length === 0) {
-         setFieldError('epc_range', 'No valid EPCs generated from this range.'); 
-         return;
+    // Ranges are sent as is and stored without generating every EPC, so only check overlaps
+    const overlapping = generatedEPCRanges.some(range => range.prefix === prefix && start <= range.end && range.start <= end);
+    if (overlapping) {
+        setFieldError('epc_range', 'This range overlaps a range already in the list');
+        return;
     }
     
-    generatedEPCs = [...generatedEPCs, ...newEPCs];
+    generatedEPCRanges.push({ prefix, start, end });
     updateEPCDisplay();
     
     // Clear range inputs
@@ -389,7 +359,16 @@ function generateEPCsFromRange() {
     document.getElementById('epc_start').value = '';
     document.getElementById('epc_end').value = '';
     
-    showToast('Success', `Generated ${newEPCs.length} EPC(s) (${duplicates.length} duplicate(s) skipped)`, 'success');
+    showToast('Success', `Added a range of ${end - start + 1} EPC(s)`, 'success');
+}
+
+function formatRangeEPC(prefix, number) {
+    return prefix + String(number).padStart(24 - prefix.length, '0');
+}
+
+function removeEPCRange(index) {
+    generatedEPCRanges.splice(index, 1);
+    updateEPCDisplay();
 }
 
 function addManualEPC() {
@@ -436,14 +415,23 @@ function updateEPCDisplay() {
     const epcList = document.getElementById('epc_list');
     const epcCount = document.getElementById('epc_count');
     
-    epcCount.textContent = generatedEPCs.length;
+    epcCount.textContent = generatedEPCs.length + generatedEPCRanges.reduce((total, range) => total + range.end - range.start + 1, 0);
     
-    if (generatedEPCs.length === 0) {
+    if (generatedEPCs.length === 0 && generatedEPCRanges.length === 0) {
         epcList.innerHTML = '<p class="text-muted">No EPCs added yet</p>';
         return;
     }
     
-    epcList.innerHTML = generatedEPCs
+    const rangeItems = generatedEPCRanges
+        .map((range, index) => `
+            <div class="list-group-item d-flex justify-content-between align-items-center">
+                <span><code>${formatRangeEPC(range.prefix, range.start)}</code> to <code>${formatRangeEPC(range.prefix, range.end)}</code> (${range.end - range.start + 1})</span>
+                <button type="button" class="btn btn-sm btn-danger" onclick="removeEPCRange(${index})">Remove</button>
+            </div>
+        `)
+        .join('');
+    
+    epcList.innerHTML = rangeItems + generatedEPCs
         .map(epc => `
             <div class="list-group-item d-flex justify-content-between align-items-center">
                 <span><code>${epc}</code></span>
@@ -463,7 +451,7 @@ async function submitInventoryBatch() {
     clearEPCErrors();
     
     // Validate that EPCs have been added
-    if (generatedEPCs.length === 0) {
+    if (generatedEPCs.length === 0 && generatedEPCRanges.length === 0) {
         showToast('Error', 'Please add at least one EPC', 'error');
         return;
     }
@@ -495,6 +483,7 @@ async function submitInventoryBatch() {
         const payload = {
             product_id: currentProductId,
             epcs: generatedEPCs,
+            epc_ranges: generatedEPCRanges,
             received_date: receivedDate
         };
         
@@ -513,6 +502,7 @@ async function submitInventoryBatch() {
             bootstrap.Modal.getInstance(document.getElementById('inventoryBatchModal')).hide();
             loadProducts(); // Refresh the products table
             generatedEPCs = []; // Clear EPCs after successful submission
+            generatedEPCRanges = [];
         } else {
             showToast('Error', data.error || 'Failed to add inventory batch', 'error');
         }
@@ -536,7 +526,7 @@ async function openViewEPCsModal(productId, productName) {
         
         if (response.ok) {
             const data = await response.json();
-            displayEPCsList(data.epcs);
+            displayEPCsList(data.epcs, data.epc_ranges);
         } else {
             throw new Error('Failed to load EPCs');
         }
@@ -549,20 +539,29 @@ async function openViewEPCsModal(productId, productName) {
     }
 }
 
-function displayEPCsList(epcs) {
+function displayEPCsList(epcs, epcRanges = []) {
     const epcsList = document.getElementById('epcs_list');
     const emptyMessage = document.getElementById('epcs_empty_message');
     const loadingSpinner = document.getElementById('epcs_loading');
     
     loadingSpinner.style.display = 'none';
     
-    if (!epcs || epcs.length === 0) {
+    if ((!epcs || epcs.length === 0) && (!epcRanges || epcRanges.length === 0)) {
         emptyMessage.style.display = 'block';
         document.getElementById('epcs_list_container').style.display = 'none';
         return;
     }
     
-    epcsList.innerHTML = epcs
+    // Ranges of sequential EPCs are listed as one row, like in the add-batch list
+    const rangeItems = (epcRanges || [])
+        .map(range => `
+            <div class="list-group-item d-flex justify-content-between align-items-center">
+                <span><code>${range.first_epc}</code> to <code>${range.last_epc}</code> (${range.count})</span>
+            </div>
+        `)
+        .join('');
+    
+    epcsList.innerHTML = rangeItems + (epcs || [])
         .map(epc => `
             <div class="list-group-item d-flex justify-content-between align-items-center">
                 <span><code>${epc}</code></span>
@@ -617,7 +616,7 @@ async function deleteProductEPC(epc) {
                     const epcResponse = await fetch(`/api/products/${productId}/epcs`);
                     if (epcResponse.ok) {
                         const data = await epcResponse.json();
-                        displayEPCsList(data.epcs);
+                        displayEPCsList(data.epcs, data.epc_ranges);
                     } else {
                         throw new Error('Failed to refresh EPCs');
                     }
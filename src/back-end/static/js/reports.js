@@ -22,8 +22,10 @@ const reportDateInputs = {
     products: { start: 'prod-start-date', end: 'prod-end-date' }
 };
 
-// Polling handle for inventory updates
+// Polling and event stream handles for inventory updates
 let inventoryPollTimer = null;
+let inventoryEventSource = null;
+let inventoryReloadTimer = null;
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', () => {
@@ -180,19 +182,24 @@ async function loadEnvironmentalReport() {
     const tempData = data.temperature_data || [];
     const humidityData = data.humidity_data || [];
 
-    const avgTemp = tempData.length > 0 
-        ? (tempData.reduce((sum, d) => sum + d.value, 0) / tempData.length).toFixed(2)
-        : 'N/A';
+    // Each point is the mean of a time bucket, weight it by the number of readings it covers
+    const weightedAverage = (points) => {
+        const count = points.reduce((sum, d) => sum + (d.count ?? 1), 0);
+        return count > 0 ? (points.reduce((sum, d) => sum + d.value * (d.count ?? 1), 0) / count).toFixed(2) : 'N/A';
+    };
+
+    const avgTemp = weightedAverage(tempData);
     
-    const avgHumidity = humidityData.length > 0
-        ? (humidityData.reduce((sum, d) => sum + d.value, 0) / humidityData.length).toFixed(2)
-        : 'N/A';
+    const avgHumidity = weightedAverage(humidityData);
 
     // Target elements inside the modal
     document.querySelector('#report-modal-content #avg-temp').textContent = `${avgTemp}°C`;
     document.querySelector('#report-modal-content #avg-humidity').textContent = `${avgHumidity}%`;
 
-    const labels = tempData.map(d => new Date(d.timestamp).toLocaleDateString());
+    // Daily buckets are labelled by date, finer ones by date and time
+    const labels = tempData.map(d => data.resolution === 'day'
+        ? new Date(d.timestamp).toLocaleDateString()
+        : new Date(d.timestamp).toLocaleString());
     const tempValues = tempData.map(d => d.value);
     const humidityValues = humidityData.map(d => d.value);
 
@@ -510,11 +517,14 @@ function renderInventoryRows(products) {
         return;
     }
 
-    tbody.innerHTML = products.map(p => {
-        const stock = Number(p.available_stock ?? p.total_stock ?? 0);
-        const level = getInventoryLevelFromProduct(p);
-        return `
-            <tr>
+    tbody.innerHTML = products.map(renderInventoryRow).join('');
+}
+
+function renderInventoryRow(p) {
+    const stock = Number(p.available_stock ?? p.total_stock ?? 0);
+    const level = getInventoryLevelFromProduct(p);
+    return `
+            <tr data-product-id="${p.product_id}">
                 <td>${p.product_id}</td>
                 <td>${p.name}</td>
                 <td>${p.category || '-'}</td>
@@ -531,7 +541,23 @@ function renderInventoryRows(products) {
                 </td>
             </tr>
         `;
-    }).join('');
+}
+
+// Update the row of a product from an 'inventory' event, reloading the report if it is not listed yet
+function updateInventoryRow(event) {
+    const row = document.querySelector(`#report-modal-content #inventory-table tr[data-product-id="${event.product_id}"]`);
+    if (!row) {
+        clearTimeout(inventoryReloadTimer);
+        inventoryReloadTimer = setTimeout(loadInventoryReport, 250);
+        return;
+    }
+    row.outerHTML = renderInventoryRow({ ...event, available_stock: event.stock });
+}
+
+function notifyStockAlert(event) {
+    if (event.level !== 'low') return;
+    const title = window.i18n?.t('lowStock') || 'Low stock';
+    showToast(title, `${event.name}: ${event.stock}`, 'error');
 }
 
 // Fetch inventory data
@@ -552,14 +578,50 @@ async function loadInventoryReport() {
     }
 }
 
-// Start/stop polling while modal is active
+// Start/stop live updates while modal is active
 function startInventoryPolling() {
     stopInventoryPolling();
+
+    // Browsers without server-sent events keep polling
+    if (!window.EventSource) {
+        startInventoryPollTimer();
+        return;
+    }
+
+    // Reload the report when stock changes, polling only while the stream is down
+    inventoryEventSource = new EventSource('/api/stream');
+    inventoryEventSource.onopen = () => {
+        stopInventoryPollTimer();
+    };
+    // Stock changes carry the new stock and level, only the changed rows are updated
+    inventoryEventSource.addEventListener('inventory', (e) => {
+        updateInventoryRow(JSON.parse(e.data));
+    });
+    inventoryEventSource.addEventListener('stock_alert', (e) => {
+        notifyStockAlert(JSON.parse(e.data));
+    });
+    inventoryEventSource.onerror = () => {
+        startInventoryPollTimer();
+    };
+}
+
+function stopInventoryPolling() {
+    if (inventoryEventSource) {
+        inventoryEventSource.close();
+        inventoryEventSource = null;
+    }
+    clearTimeout(inventoryReloadTimer);
+    inventoryReloadTimer = null;
+    stopInventoryPollTimer();
+}
+
+function startInventoryPollTimer() {
+    if (inventoryPollTimer) return;
     // Poll every 5 seconds
     inventoryPollTimer = setInterval(loadInventoryReport, 5000);
 }
 
-function stopInventoryPolling() {
+function stopInventoryPollTimer() {
     if (inventoryPollTimer) {
         clearInterval(inventoryPollTimer);
         inventoryPollTimer = null;
@@ -47,13 +47,77 @@ async function manuallyScanItem() {
   }
   // --- END OF FIX ---
 
-  // This part was already correct
-  if (code) {
+  // Several codes (e.g. a portal read pasted at once) are resolved in one request
+  const codes = code.split(/[\s,]+/).filter((c) => c)
+  if (codes.length > 1) {
+    await scanItems(codes)
+    input.value = ""
+  } else if (code) {
     await scanItem(code)
     input.value = ""
   }
 }
 
+// Add a scanned product to the cart, returns false if the EPC was already scanned
+function addScannedProduct(product, code) {
+  // Check if epc already scanned
+  if (cart.some((item) => item.epcs.includes(code))) {
+    return false
+  }
+
+  // Check if item already in cart
+  const existingItem = cart.find((item) => item.product_id === product.product_id)
+
+  if (existingItem) {
+    existingItem.quantity++
+    existingItem.epcs.push(code)
+  } else {
+    cart.push({
+      ...product,
+      epcs: [code],
+      quantity: 1,
+    })
+  }
+  return true
+}
+
+// Scan many EPCs at once (e.g. an RFID portal read) with a single request
+async function scanItems(codes) {
+  try {
+    const response = await fetch("/api/products/epcs/resolve", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ epcs: codes }),
+    })
+    if (!response.ok) {
+      throw new Error("Failed to resolve EPCs")
+    }
+
+    const result = await response.json()
+
+    let added = 0
+    result.products.forEach((group) => {
+      group.epcs.forEach((code) => {
+        if (addScannedProduct(group.product, code)) {
+          added++
+        }
+      })
+    })
+
+    if (added > 0) {
+      showToast("Success", `Added ${added} item(s) to cart`, "success")
+      renderCart()
+      updateTotals()
+    }
+    if (result.unknown_epcs.length > 0) {
+      showToast("Not Found", `${result.unknown_epcs.length} item(s) not found. Please try again.`, "warning")
+    }
+  } catch (error) {
+    console.error("Error scanning items:", error)
+    showToast("Error", "Failed to scan items", "error")
+  }
+}
+
 // Scan an item by UPC or EPC
 async function scanItem(code) {
   console.log("Scanning item with code:", code)
@@ -80,25 +144,10 @@ async function scanItem(code) {
       return
     }
 
-    // Check if epc already scanned
-    if (cart.some((item) => item.epcs.includes(code))) {
+    if (!addScannedProduct(product, code)) {
       return
     }
 
-    // Check if item already in cart
-    const existingItem = cart.find((item) => item.product_id === product.product_id)
-
-    if (existingItem) {
-      existingItem.quantity++
-      existingItem.epcs.push(code)
-    } else {
-      cart.push({
-        ...product,
-        epcs: [code],
-        quantity: 1,
-      })
-    }
-
     showToast("Success", `Added ${product.name} to cart`, "success")
     renderCart()
     updateTotals()
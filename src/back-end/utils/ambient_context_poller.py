@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from .event_broadcaster import EventBroadcaster
+from .pareto_anywhere_service import ParetoAnywhereService
+
+
+class AmbientContextPoller:
+    """
+    Single shared poller of the Pareto Anywhere ambient context.
+
+    Instead of every dashboard polling Pareto Anywhere, one background thread
+    fetches the ambient context every `interval` seconds while at least one
+    client is connected to the event stream, and publishes it as an 'ambient'
+    event. The last reading is kept so that polling clients are served from it
+    as long as it is fresh.
+    """
+
+    def __init__(self, pareto_service: ParetoAnywhereService, broadcaster: EventBroadcaster, interval: float = None):
+        """
+        Initialize the poller.
+
+        Args:
+            pareto_service (ParetoAnywhereService): The service used to query Pareto Anywhere.
+            broadcaster (EventBroadcaster): The broadcaster the readings are published to.
+            interval (float): Seconds between two polls.
+        """
+        self.pareto_service = pareto_service
+        self.broadcaster = broadcaster
+        self.interval = interval or float(os.getenv('PARETO_POLL_INTERVAL', '5'))
+
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._latest: dict = None
+        self._latest_at: float = None
+        self._thread: threading.Thread = None
+        self._stop_event = threading.Event()
+
+        # Counters
+        self._fetches = 0
+        self._cache_hits = 0
+        self._published = 0
+
+    def start(self) -> None:
+        """Start the polling thread if it is not running yet."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="AmbientContextPoller", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    @property
+    def latest(self) -> dict | None:
+        """The last ambient context fetched, or None if Pareto was not queried yet."""
+        return self._latest
+
+    def get_latest(self) -> dict:
+        """
+        Get the ambient context, querying Pareto Anywhere only if the last reading is stale.
+
+        Returns:
+            dict: The ambient context data.
+        """
+        with self._lock:
+            if self._latest is not None and time.monotonic() - self._latest_at < self.interval:
+                self._cache_hits += 1
+                return self._latest
+
+        # Concurrent callers wait for a single fetch instead of each querying Pareto
+        with self._fetch_lock:
+            with self._lock:
+                if self._latest is not None and time.monotonic() - self._latest_at < self.interval:
+                    self._cache_hits += 1
+                    return self._latest
+            return self._fetch()
+
+    def _fetch(self) -> dict:
+        context_data = self.pareto_service.get_ambient_context()
+        with self._lock:
+            self._latest = context_data
+            self._latest_at = time.monotonic()
+            self._fetches += 1
+        return context_data
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            # Pareto is only queried while someone is listening
+            if self.broadcaster.connection_count == 0:
+                continue
+            try:
+                with self._fetch_lock:
+                    context_data = self._fetch()
+            except Exception as e:
+                print(f"ERROR: Failed to poll ambient context: {e}")
+                continue
+            self.broadcaster.publish("ambient", context_data)
+            with self._lock:
+                self._published += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "fetches": self._fetches,
+                "cache_hits": self._cache_hits,
+                "published": self._published,
+                "age_seconds": round(time.monotonic() - self._latest_at, 3) if self._latest_at is not None else None,
+            }
@@ -131,6 +131,63 @@ class EmailService:
         
         return self._send_email(recipient_emails, subject, html_body)
     
+    def send_low_stock_alert(self, recipient_emails: str | list[str], alerts: list[dict]) -> bool:
+        """
+        Send a single email listing the products that fell to a low stock level.
+        
+        Args:
+            recipient_emails (str | list[str]): Email address or list of email addresses to send the alert to
+            alerts (list[dict]): The products, with their "product_id", "name", "category", "stock" and "low_stock_threshold"
+            
+        Returns:
+            bool: True if email was sent successfully, False otherwise
+        """
+        subject = f"⚠️ Low Stock: {len(alerts)} product{'s' if len(alerts) != 1 else ''} to restock"
+        
+        # Format product rows
+        product_rows = ""
+        for alert in alerts:
+            product_rows += f"""
+            <tr style="border-bottom: 1px solid #eee;">
+                <td style="padding: 12px; text-align: left;">{alert["product_id"]}</td>
+                <td style="padding: 12px; text-align: left;">{alert["name"]}</td>
+                <td style="padding: 12px; text-align: left;">{alert["category"] or "-"}</td>
+                <td style="padding: 12px; text-align: right; color: #d32f2f;"><strong>{alert["stock"]}</strong></td>
+                <td style="padding: 12px; text-align: right;">{alert["low_stock_threshold"]}</td>
+            </tr>
+            """
+        
+        # Create HTML email body
+        html_body = f"""
+        <html>
+            <body style="font-family: Arial, sans-serif; padding: 20px;">
+                <h2 style="color: #d32f2f;">Low Stock Alert</h2>
+                <p>The stock of the following products fell to or below their low stock threshold.</p>
+                
+                <table style="width: 100%; margin-top: 20px; border-collapse: collapse;">
+                    <thead>
+                        <tr style="background-color: #f9f9f9; border-bottom: 2px solid #ddd;">
+                            <th style="padding: 12px; text-align: left;">ID</th>
+                            <th style="padding: 12px; text-align: left;">Product</th>
+                            <th style="padding: 12px; text-align: left;">Category</th>
+                            <th style="padding: 12px; text-align: right;">Stock</th>
+                            <th style="padding: 12px; text-align: right;">Low Threshold</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {product_rows}
+                    </tbody>
+                </table>
+                
+                <p style="margin-top: 30px; color: #666; font-size: 12px;">
+                    This is an automated alert from ConnectedSmarties monitoring system.
+                </p>
+            </body>
+        </html>
+        """
+        
+        return self._send_email(recipient_emails, subject, html_body)
+    
     def send_threshold_update(self, recipient_emails: str | list[str], high_threshold: float, low_threshold: float) -> bool:
         """
         Send an email notification when temperature thresholds are updated.
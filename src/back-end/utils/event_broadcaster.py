@@ -0,0 +1,172 @@
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from typing import Iterator
+
+
+class _Subscriber:
+    """A connected client and its bounded send queue."""
+
+    def __init__(self, subscriber_id: int, max_queue_size: int):
+        self.subscriber_id = subscriber_id
+        self.queue: queue.Queue[str] = queue.Queue(maxsize=max_queue_size)
+        self.connected_at = time.monotonic()
+
+        # Counters
+        self.sent = 0
+        self.dropped = 0
+        self.max_queue_depth = 0
+
+
+class EventBroadcaster:
+    """
+    Fan-out of server-sent events to every connected dashboard.
+
+    Each client gets its own bounded send queue. Publishing serializes an event
+    once and never blocks: a client that does not keep up loses events rather
+    than slowing down the publisher (the MQTT ingestion writer or a request).
+    """
+
+    def __init__(self, max_queue_size: int = None, heartbeat_interval: float = None):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            max_queue_size (int): Maximum number of pending events per client.
+            heartbeat_interval (float): Seconds of inactivity after which a keep-alive comment is sent.
+        """
+        self.max_queue_size = max_queue_size or int(os.getenv('SSE_CLIENT_QUEUE_SIZE', '100'))
+        self.heartbeat_interval = heartbeat_interval or float(os.getenv('SSE_HEARTBEAT_INTERVAL', '15'))
+
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, _Subscriber] = {}
+        self._ids = itertools.count(1)
+
+        # Counters
+        self._total_connections = 0
+        self._peak_connections = 0
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> _Subscriber:
+        """Register a new client and return its subscription."""
+        subscriber = _Subscriber(next(self._ids), self.max_queue_size)
+        with self._lock:
+            self._subscribers[subscriber.subscriber_id] = subscriber
+            self._total_connections += 1
+            self._peak_connections = max(self._peak_connections, len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers.pop(subscriber.subscriber_id, None)
+
+    @staticmethod
+    def format_event(event: str, data) -> str:
+        """
+        Serialize an event in the text/event-stream format.
+
+        Args:
+            event (str): The event name (e.g. 'sensors').
+            data: A JSON serializable payload.
+
+        Returns:
+            str: The encoded event.
+        """
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    def publish(self, event: str, data) -> int:
+        """
+        Send an event to every connected client.
+
+        Args:
+            event (str): The event name (e.g. 'sensors').
+            data: A JSON serializable payload.
+
+        Returns:
+            int: The number of clients the event was queued for.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+            self._published += 1
+        if not subscribers:
+            return 0
+
+        message = self.format_event(event, data)
+        delivered = 0
+        dropped = 0
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                subscriber.dropped += 1
+                dropped += 1
+                continue
+            subscriber.max_queue_depth = max(subscriber.max_queue_depth, subscriber.queue.qsize())
+            delivered += 1
+
+        with self._lock:
+            self._delivered += delivered
+            self._dropped += dropped
+        return delivered
+
+    def stream(self, subscriber: _Subscriber, initial_events: list[str] = None) -> Iterator[str]:
+        """
+        Yield the events of a client until it disconnects.
+
+        Args:
+            subscriber (_Subscriber): The client subscription, released when the stream ends.
+            initial_events (list[str]): Pre-formatted events sent first (e.g. the current state).
+
+        Yields:
+            str: Encoded events and keep-alive comments.
+        """
+        try:
+            for message in initial_events or []:
+                subscriber.sent += 1
+                yield message
+            while True:
+                try:
+                    message = subscriber.queue.get(timeout=self.heartbeat_interval)
+                except queue.Empty:
+                    # Keep proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                subscriber.sent += 1
+                yield message
+        finally:
+            # Runs when the client disconnects and the response is closed
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+            return {
+                "connections": len(subscribers),
+                "peak_connections": self._peak_connections,
+                "total_connections": self._total_connections,
+                "published": self._published,
+                "delivered": self._delivered,
+                "dropped": self._dropped,
+                "max_queue_size": self.max_queue_size,
+                "clients": [
+                    {
+                        "id": subscriber.subscriber_id,
+                        "connected_seconds": round(now - subscriber.connected_at, 3),
+                        "queue_depth": subscriber.queue.qsize(),
+                        "max_queue_depth": subscriber.max_queue_depth,
+                        "sent": subscriber.sent,
+                        "dropped": subscriber.dropped,
+                    }
+                    for subscriber in subscribers
+                ],
+            }
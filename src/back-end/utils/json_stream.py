@@ -0,0 +1,104 @@
+import json
+from typing import Iterable, Iterator
+from flask import Response
+
+
+class JsonStream:
+    """
+    Encodes JSON incrementally, for responses too large to build in memory.
+
+    Lists are written as they are, while iterators and generators (e.g. rows
+    read from a SQLite cursor) are written as JSON arrays one item at a time.
+    Output is grouped into chunks of about `chunk_size` characters so the
+    server does not flush one tiny write per item.
+    """
+
+    # Appended to a body cut short by an error, which leaves the JSON invalid
+    ERROR_MARKER = "\n{\"error\":\"Streamed response interrupted\"}"
+
+    def __init__(self, chunk_size: int = 16384):
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def _dumps(value) -> str:
+        return json.dumps(value, separators=(",", ":"), default=str)
+
+    def _encode(self, value) -> Iterator[str]:
+        if isinstance(value, dict) and any(isinstance(item, Iterator) for item in value.values()):
+            yield "{"
+            for index, (key, item) in enumerate(value.items()):
+                yield f"{',' if index else ''}{self._dumps(str(key))}:"
+                yield from self._encode(item)
+            yield "}"
+        elif isinstance(value, Iterator):
+            yield "["
+            for index, item in enumerate(value):
+                if index:
+                    yield ","
+                yield from self._encode(item)
+            yield "]"
+        else:
+            yield self._dumps(value)
+
+    def iter_chunks(self, value) -> Iterator[str]:
+        """
+        Encode a value as JSON chunks.
+
+        Args:
+            value: The value to encode; iterators nested in it are consumed lazily.
+
+        Returns:
+            Iterator[str]: The JSON text, in chunks.
+        """
+        buffer = []
+        size = 0
+        for part in self._encode(value):
+            buffer.append(part)
+            size += len(part)
+            if size >= self.chunk_size:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield "".join(buffer)
+
+    def response(self, value, status: int = 200) -> Response:
+        """
+        Build a streamed JSON response.
+
+        The first chunk is encoded before the response is returned, so errors
+        raised when the underlying queries start (e.g. DatabaseReadException)
+        still reach the route and can be turned into an error response. An
+        error raised later can no longer change the status: it is logged and
+        the body ends with an ERROR_MARKER line, so clients can tell a failed
+        stream from a slow one. The encoder is closed when the response is
+        closed, even if the client disconnects before the body is read.
+
+        Args:
+            value: The value to encode; iterators nested in it are consumed lazily.
+            status (int): The HTTP status of the response.
+
+        Returns:
+            Response: The streamed response.
+        """
+        chunks = self.iter_chunks(value)
+        try:
+            first_chunk = next(chunks, "")
+        except Exception:
+            chunks.close()
+            raise
+        response = Response(self._stream(first_chunk, chunks), status=status, mimetype="application/json")
+        # Release the cursors of a stream the client stopped reading
+        response.call_on_close(chunks.close)
+        return response
+
+    @classmethod
+    def _stream(cls, first_chunk: str, chunks: Iterator[str]) -> Iterable[str]:
+        try:
+            yield first_chunk
+            yield from chunks
+        except Exception as e:
+            print(f"ERROR: Streamed JSON response interrupted: {e}")
+            yield cls.ERROR_MARKER
+        finally:
+            chunks.close()
@@ -0,0 +1,121 @@
+import copy
+import threading
+from models.sensor_data_point_model import SensorDataPoint
+from models.utils.datetime_utils import DateTimeUtils
+
+
+class LatestReadingCache:
+    """
+    In-memory snapshot of the latest reading per (sensor_id, data_type).
+
+    The snapshot is maintained by the sensor ingestion path as batches are
+    written, so dashboard reads never touch SensorDataPoints once warm. The
+    whole snapshot is loaded from the database with a single query the first
+    time it is needed; a key looked up before that is loaded on its own.
+    """
+
+    # Marker for keys known to have no reading at all
+    _EMPTY = object()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: dict[tuple[int, str], SensorDataPoint] = {}
+        # Set once every existing reading was loaded: missing keys then have no reading
+        self._warm = False
+
+        # Counters
+        self._hits = 0
+        self._misses = 0
+        self._updates = 0
+        self._loads = 0
+
+    def update(self, sensor_data_points: list[SensorDataPoint]) -> None:
+        """
+        Record newly written readings. Used as a SensorIngestionService listener.
+
+        Args:
+            sensor_data_points (list[SensorDataPoint]): Readings with a UTC created_at.
+        """
+        # Keep the last reading of the batch for every key
+        newest: dict[tuple[int, str], SensorDataPoint] = {}
+        for sensor_data_point in sensor_data_points:
+            newest[(sensor_data_point.sensor_id, sensor_data_point.data_type)] = sensor_data_point
+
+        with self._lock:
+            for key, sensor_data_point in newest.items():
+                # Store a copy in local time, like the points read from the database
+                cached = copy.copy(sensor_data_point)
+                cached.created_at = DateTimeUtils.utc_to_local(sensor_data_point.created_at)
+                self._latest[key] = cached
+                self._updates += 1
+
+    def get(self, sensor_id: int, data_type: str) -> SensorDataPoint | None:
+        """
+        Get the latest reading of a sensor, reading the database only on a cold key.
+
+        Args:
+            sensor_id (int): The ID of the sensor.
+            data_type (str): The data type (e.g. 'temperature').
+
+        Returns:
+            SensorDataPoint | None: The latest reading, or None if the sensor never reported this type.
+        """
+        key = (sensor_id, data_type)
+        with self._lock:
+            cached = self._latest.get(key)
+            if cached is not None or self._warm:
+                self._hits += 1
+                return None if cached is None or cached is self._EMPTY else cached
+            self._misses += 1
+
+        sensor_data_point = SensorDataPoint.fetch_latest_sensor_data(sensor_id, data_type)
+
+        with self._lock:
+            # A reading ingested while the database was queried is newer, keep it
+            cached = self._latest.setdefault(key, sensor_data_point if sensor_data_point is not None else self._EMPTY)
+        return None if cached is self._EMPTY else cached
+
+    def snapshot(self) -> dict[tuple[int, str], SensorDataPoint]:
+        """
+        Get the latest reading of every sensor and data type in one read.
+
+        Returns:
+            dict[tuple[int, str], SensorDataPoint]: The latest readings keyed by (sensor_id, data_type).
+        """
+        with self._lock:
+            warm = self._warm
+            if warm:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+        if not warm:
+            self.warm()
+
+        with self._lock:
+            return {key: cached for key, cached in self._latest.items() if cached is not self._EMPTY}
+
+    def warm(self) -> None:
+        """Load the latest reading of every sensor and data type with a single query."""
+        latest = SensorDataPoint.fetch_latest_sensor_data_all()
+        with self._lock:
+            for key, sensor_data_point in latest.items():
+                # Readings ingested while the database was queried are newer, keep them
+                cached = self._latest.get(key)
+                if cached is None or cached is self._EMPTY:
+                    self._latest[key] = sensor_data_point
+            self._warm = True
+            self._loads += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._latest),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "updates": self._updates,
+                "loads": self._loads,
+                "warm": self._warm,
+            }
@@ -0,0 +1,76 @@
+from typing import Callable
+from models.sensor_model import Sensor
+from .sensor_registry import SensorRegistry
+
+
+class MQTTTopicRouter:
+    """
+    Data-driven router for device topics of the form '<device>/<measurement>'.
+
+    Handlers are registered per measurement (e.g. 'temperature' or
+    'fanControl/status') and subscribed once with a single-level wildcard
+    ('+/temperature'), so the number of subscriptions does not grow with the
+    number of devices. Dispatching a message is two dictionary lookups: the
+    measurement handler and the device in the sensor registry.
+    """
+
+    def __init__(self, sensor_registry: SensorRegistry):
+        self.sensor_registry = sensor_registry
+        self._handlers: dict[str, Callable[[Sensor, str, str], None]] = {}
+
+        # Counters
+        self.dispatched = 0
+        self.unknown_devices = 0
+        self.unrouted = 0
+
+    def add_route(self, measurement: str, handler: Callable[[Sensor, str, str], None]) -> None:
+        """
+        Register the handler of a measurement published by every device.
+
+        Args:
+            measurement (str): Topic suffix after the device prefix (e.g. 'humidity').
+            handler (callable): Called with (sensor, topic, payload) for every matching message.
+        """
+        self._handlers[measurement] = handler
+
+    @property
+    def subscriptions(self) -> list[str]:
+        """Wildcard topic filters covering every registered measurement."""
+        return [f"+/{measurement}" for measurement in self._handlers]
+
+    def dispatch(self, topic: str, payload: str) -> bool:
+        """
+        Route a message to the handler of its measurement.
+
+        Args:
+            topic (str): The topic the message was published on.
+            payload (str): The decoded message payload.
+
+        Returns:
+            bool: True if the message was handled.
+        """
+        device, _, measurement = topic.partition("/")
+
+        handler = self._handlers.get(measurement)
+        if handler is None:
+            self.unrouted += 1
+            print(f"Unrecognized topic: {topic}")
+            return False
+
+        sensor = self.sensor_registry.get_by_topic(device)
+        if sensor is None:
+            self.unknown_devices += 1
+            print(f"WARNING: Received message on '{topic}' from unknown device '{device}'")
+            return False
+
+        self.dispatched += 1
+        handler(sensor, topic, payload)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "routes": len(self._handlers),
+            "dispatched": self.dispatched,
+            "unknown_devices": self.unknown_devices,
+            "unrouted": self.unrouted,
+        }
@@ -0,0 +1,221 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+from models.sensor_data_point_model import SensorDataPoint
+
+
+class SensorIngestionService:
+    """
+    Service that decouples sensor message handling from database writes.
+
+    MQTT callbacks only validate readings and enqueue them; a dedicated writer
+    thread drains the queue and inserts the readings with executemany, flushing
+    whenever a batch is full or the oldest queued reading has waited long enough.
+
+    A batch refused by a constraint (e.g. an unknown sensor or data type) is
+    retried one reading at a time, so only the offending readings are lost.
+    Readings lost to a full queue are counted as 'overflowed', readings refused
+    by the database as 'rejected' and readings lost to a failed write as 'failed'.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_batch_size: int = None, max_latency: float = None, max_queue_size: int = None):
+        """
+        Initialize the ingestion service and start its writer thread.
+
+        Args:
+            max_batch_size (int): Maximum number of readings written per batch.
+            max_latency (float): Maximum seconds a reading waits in the queue before being flushed.
+            max_queue_size (int): Maximum number of queued readings; new readings are dropped when full.
+        """
+        self.max_batch_size = max_batch_size or int(os.getenv('SENSOR_BATCH_SIZE', '200'))
+        self.max_latency = max_latency or float(os.getenv('SENSOR_BATCH_MAX_LATENCY', '1.0'))
+        self.max_queue_size = max_queue_size or int(os.getenv('SENSOR_QUEUE_SIZE', '10000'))
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._listeners: list[Callable[[list[SensorDataPoint]], None]] = []
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "batches": 0,
+            "overflowed": 0,
+            "rejected": 0,
+            "failed": 0,
+            "write_failures": 0,
+            "max_queue_depth": 0,
+            "largest_batch": 0,
+            "last_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+        }
+
+        self._writer = threading.Thread(target=self._run, name="SensorIngestionWriter", daemon=True)
+        self._writer.start()
+        atexit.register(self.stop)
+
+
+    def add_listener(self, callback: Callable[[list[SensorDataPoint]], None]) -> None:
+        """
+        Register a callback invoked on the writer thread with every batch after it is committed.
+
+        Args:
+            callback (callable): Function receiving the list of written SensorDataPoint objects.
+        """
+        self._listeners.append(callback)
+
+
+    def enqueue(self, sensor_data_point: SensorDataPoint) -> bool:
+        """
+        Queue a validated reading for writing. Never blocks.
+
+        Args:
+            sensor_data_point (SensorDataPoint): The reading to write.
+
+        Returns:
+            bool: True if the reading was queued, False if it was dropped because the queue is full.
+        """
+        # Stamp the reception time so batching delays do not shift the stored timestamp
+        if sensor_data_point.created_at is None:
+            sensor_data_point.created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+        try:
+            self._queue.put_nowait(sensor_data_point)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats["overflowed"] += 1
+            return False
+
+        with self._stats_lock:
+            self._stats["enqueued"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queue.qsize())
+        return True
+
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush the queued readings and stop the writer thread."""
+        if not self._writer.is_alive():
+            return
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            print("WARNING: Sensor ingestion queue is full, stopping without a final flush")
+            return
+        self._writer.join(timeout)
+
+
+    def stats(self) -> dict:
+        """Return the ingestion counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_latency"] = self.max_latency
+        stats["max_queue_size"] = self.max_queue_size
+        return stats
+
+
+    def _run(self) -> None:
+        while True:
+            # Block until the first reading of the next batch arrives
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_latency
+
+            # Fill the batch until it is full or the latency budget is spent
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+
+            if stopping:
+                # Drain what is left before exiting
+                remaining_items = []
+                while True:
+                    try:
+                        remaining_items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for start in range(0, len(remaining_items), self.max_batch_size):
+                    self._flush(remaining_items[start:start + self.max_batch_size])
+                return
+
+
+    def _flush(self, batch: list[SensorDataPoint]) -> None:
+        started = time.monotonic()
+        try:
+            SensorDataPoint.insert_sensor_data_points(batch)
+        except Exception as e:
+            with self._stats_lock:
+                self._stats["write_failures"] += 1
+            if not isinstance(e.__cause__, sqlite3.IntegrityError):
+                print(f"ERROR: Failed to write {len(batch)} sensor readings to the database: {e}")
+                with self._stats_lock:
+                    self._stats["failed"] += len(batch)
+                return
+            # Some readings break a constraint: keep the others
+            batch = self._flush_rows(batch)
+            if not batch:
+                return
+
+        elapsed = time.monotonic() - started
+        with self._stats_lock:
+            self._stats["written"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+            self._stats["last_flush_seconds"] = round(elapsed, 6)
+            self._stats["total_flush_seconds"] = round(self._stats["total_flush_seconds"] + elapsed, 6)
+
+        for listener in self._listeners:
+            try:
+                listener(batch)
+            except Exception as e:
+                print(f"ERROR: Sensor ingestion listener failed: {e}")
+
+
+    def _flush_rows(self, batch: list[SensorDataPoint]) -> list[SensorDataPoint]:
+        """
+        Write the readings of a refused batch one at a time.
+
+        Returns:
+            list[SensorDataPoint]: The readings written.
+        """
+        written = []
+        rejected = 0
+        failed = 0
+        for point in batch:
+            try:
+                SensorDataPoint.insert_sensor_data_points([point])
+            except Exception as e:
+                if isinstance(e.__cause__, sqlite3.IntegrityError):
+                    rejected += 1
+                    print(f"WARNING: Rejected the {point.data_type} reading of sensor {point.sensor_id}: {e.__cause__}")
+                else:
+                    failed += 1
+                    print(f"ERROR: Failed to write a sensor reading to the database: {e}")
+                continue
+            written.append(point)
+
+        with self._stats_lock:
+            self._stats["rejected"] += rejected
+            self._stats["failed"] += failed
+        return written
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from models.sensor_model import Sensor
+
+
+class SensorRegistry:
+    """
+    In-process cache of the sensors declared in the Sensors table, indexed by ID and MQTT topic prefix.
+
+    The registry is loaded once and then answers lookups from memory. It is
+    refreshed when a sensor is added or removed through the Sensor model, when
+    it is explicitly invalidated, and after `max_age` seconds to pick up changes
+    made outside of this process.
+
+    Lookups run on the MQTT network thread, so they never wait for the database:
+    a stale registry keeps answering while a background thread reloads it.
+    """
+
+    def __init__(self, autoload: bool = True, max_age: float = None):
+        """
+        Initialize the registry.
+
+        Args:
+            autoload (bool): Load the sensors from the database immediately.
+            max_age (float): Seconds after which the registry is reloaded on the next lookup.
+        """
+        self.max_age = max_age if max_age is not None else float(os.getenv('SENSOR_REGISTRY_MAX_AGE', '300'))
+
+        self._lock = threading.Lock()
+        self._by_id: dict[int, Sensor] = {}
+        self._by_topic: dict[str, Sensor] = {}
+        self._loaded_at: float = None
+        self._reload_thread: threading.Thread = None
+
+        # Counters
+        self._hits = 0
+        self._misses = 0
+        self._reloads = 0
+        self._reload_failures = 0
+
+        # Reload whenever sensors are added or removed in this process
+        Sensor.add_change_listener(self.invalidate)
+
+        if autoload:
+            self._reload()
+
+    def close(self) -> None:
+        """Stop following the sensor changes, for registries that are discarded."""
+        Sensor.remove_change_listener(self.invalidate)
+
+    def load(self) -> None:
+        """(Re)load every sensor from the database."""
+        self.replace(Sensor.fetch_all_sensors())
+        with self._lock:
+            self._reloads += 1
+
+    def replace(self, sensors: list[Sensor]) -> None:
+        """
+        Replace the registry content with the given sensors.
+
+        Args:
+            sensors (list[Sensor]): The sensors to index.
+        """
+        by_id = {sensor.sensor_id: sensor for sensor in sensors}
+        by_topic = {sensor.topic: sensor for sensor in sensors if sensor.topic}
+
+        # Swap the indexes at once so readers never see a partial registry
+        with self._lock:
+            self._by_id = by_id
+            self._by_topic = by_topic
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self, sensor_id: int = None) -> None:
+        """
+        Refresh the registry after sensors changed.
+
+        Args:
+            sensor_id (int, optional): The sensor that was added, updated or removed.
+                When omitted, the whole registry is reloaded in the background on the next lookup.
+        """
+        if sensor_id is None:
+            with self._lock:
+                self._loaded_at = None
+            return
+
+        sensor = Sensor.fetch_sensor_by_id(sensor_id)
+        with self._lock:
+            by_id = dict(self._by_id)
+            by_topic = dict(self._by_topic)
+
+            # Drop the previous entry, then index the current one if it still exists
+            previous = by_id.pop(sensor_id, None)
+            if previous is not None and by_topic.get(previous.topic) is previous:
+                del by_topic[previous.topic]
+            if sensor is not None:
+                by_id[sensor_id] = sensor
+                if sensor.topic:
+                    by_topic[sensor.topic] = sensor
+
+            self._by_id = by_id
+            self._by_topic = by_topic
+
+    def _reload(self) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            with self._lock:
+                self._reload_failures += 1
+                # Retry a few seconds later rather than on every lookup
+                self._loaded_at = time.monotonic() - max(self.max_age - 5, 0)
+            print(f"WARNING: Could not load the sensor registry: {e}")
+
+    def _reload_in_background(self) -> None:
+        try:
+            self._reload()
+        finally:
+            with self._lock:
+                self._reload_thread = None
+
+    def _ensure_fresh(self) -> None:
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at <= self.max_age:
+            return
+
+        # Serve the current copy, a single thread reloads it
+        with self._lock:
+            if self._reload_thread is not None:
+                return
+            self._reload_thread = threading.Thread(target=self._reload_in_background, name="SensorRegistryReload", daemon=True)
+            self._reload_thread.start()
+
+    def _record(self, sensor: Sensor | None) -> Sensor | None:
+        with self._lock:
+            if sensor is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return sensor
+
+    def get_by_id(self, sensor_id: int) -> Sensor | None:
+        self._ensure_fresh()
+        return self._record(self._by_id.get(sensor_id))
+
+    def get_by_topic(self, topic: str) -> Sensor | None:
+        self._ensure_fresh()
+        return self._record(self._by_topic.get(topic))
+
+    def all(self) -> list[Sensor]:
+        self._ensure_fresh()
+        return sorted(self._by_id.values(), key=lambda sensor: sensor.sensor_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._by_id),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "reloads": self._reloads,
+                "reload_failures": self._reload_failures,
+                "age_seconds": round(time.monotonic() - self._loaded_at, 3) if self._loaded_at is not None else None,
+                "max_age": self.max_age,
+            }
@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from models.base_model import BaseModel
+from models.sensor_data_point_model import SensorDataPoint
+from models.sensor_data_rollup_model import SensorDataRollup
+
+
+class SensorRetentionService:
+    """
+    Background service that bounds the size of the sensor tables.
+
+    Raw readings are kept for `raw_retention_days`; every reading, fan status
+    included, is summarized by the rollups maintained at ingestion, so pruning
+    them loses no aggregate history and the reports past that window read the
+    rollups. Anything that reads raw readings only (e.g. the latest reading of
+    a sensor) is limited to the retention window. Minute and hour rollups have
+    their own retention, day rollups are kept forever. Rows are deleted in chunks of `chunk_size`, each
+    in its own short transaction, so the ingestion writer is never locked out
+    for long. Freed pages are then released with an incremental vacuum.
+
+    A retention of 0 days disables pruning of that table.
+    """
+
+    def __init__(
+        self,
+        raw_retention_days: int = None,
+        minute_rollup_retention_days: int = None,
+        hour_rollup_retention_days: int = None,
+        interval: float = None,
+        chunk_size: int = None,
+        vacuum_pages: int = None,
+    ):
+        """
+        Initialize the retention service.
+
+        Args:
+            raw_retention_days (int): Days raw readings are kept.
+            minute_rollup_retention_days (int): Days minute rollups are kept.
+            hour_rollup_retention_days (int): Days hour rollups are kept.
+            interval (float): Seconds between two retention runs.
+            chunk_size (int): Maximum number of rows deleted per transaction.
+            vacuum_pages (int): Maximum number of free pages released per run.
+        """
+        self.raw_retention_days = raw_retention_days if raw_retention_days is not None else int(os.getenv('SENSOR_RAW_RETENTION_DAYS', '30'))
+        self.rollup_retention_days = {
+            "minute": minute_rollup_retention_days if minute_rollup_retention_days is not None else int(os.getenv('SENSOR_MINUTE_ROLLUP_RETENTION_DAYS', '14')),
+            "hour": hour_rollup_retention_days if hour_rollup_retention_days is not None else int(os.getenv('SENSOR_HOUR_ROLLUP_RETENTION_DAYS', '365')),
+        }
+        self.interval = interval or float(os.getenv('SENSOR_RETENTION_INTERVAL', '3600'))
+        self.chunk_size = chunk_size or int(os.getenv('SENSOR_RETENTION_CHUNK_SIZE', '5000'))
+        self.vacuum_pages = vacuum_pages or int(os.getenv('SENSOR_RETENTION_VACUUM_PAGES', '2000'))
+
+        # Pause between chunks so that queued writes get the database in between
+        self.chunk_pause = 0.05
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._thread: threading.Thread = None
+        self._stop_event = threading.Event()
+        self._warned_auto_vacuum = False
+        self._stats = {
+            "runs": 0,
+            "failures": 0,
+            "raw_rows_pruned": 0,
+            "minute_rollups_pruned": 0,
+            "hour_rollups_pruned": 0,
+            "chunks": 0,
+            "pages_vacuumed": 0,
+            "last_run_at": None,
+            "last_run_seconds": 0.0,
+            "total_run_seconds": 0.0,
+            "last_error": None,
+        }
+
+    def start(self, initial_delay: float = 60.0) -> None:
+        """
+        Start the scheduler thread if it is not running yet.
+
+        Args:
+            initial_delay (float): Seconds before the first run, to stay out of the way of the startup.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, args=(initial_delay,), name="SensorRetentionService", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _run(self, initial_delay: float) -> None:
+        delay = initial_delay
+        while not self._stop_event.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"ERROR: Sensor retention run failed: {e}")
+            delay = self.interval
+
+    @staticmethod
+    def _cutoff(days: int) -> str:
+        return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    def _prune(self, delete_chunk, cutoff: str) -> tuple[int, int]:
+        # Delete chunk after chunk until a chunk comes back incomplete
+        pruned = 0
+        chunks = 0
+        while not self._stop_event.is_set():
+            deleted = delete_chunk(cutoff, self.chunk_size)
+            pruned += deleted
+            chunks += 1
+            if deleted < self.chunk_size:
+                break
+            time.sleep(self.chunk_pause)
+        return pruned, chunks
+
+    def run_once(self) -> dict:
+        """
+        Prune the expired rows and vacuum the freed pages.
+
+        Returns:
+            dict: The number of rows pruned per table and the pages vacuumed by this run.
+        """
+        with self._run_lock:
+            started = time.monotonic()
+            result = {"raw_rows_pruned": 0, "minute_rollups_pruned": 0, "hour_rollups_pruned": 0, "chunks": 0, "pages_vacuumed": 0}
+            error = None
+            try:
+                if self.raw_retention_days > 0:
+                    pruned, chunks = self._prune(SensorDataPoint.delete_sensor_data_points_before, self._cutoff(self.raw_retention_days))
+                    result["raw_rows_pruned"] += pruned
+                    result["chunks"] += chunks
+
+                for resolution, retention_days in self.rollup_retention_days.items():
+                    if retention_days <= 0:
+                        continue
+                    delete_chunk = lambda cutoff, limit, resolution=resolution: SensorDataRollup.delete_rollups_before(resolution, cutoff, limit)
+                    pruned, chunks = self._prune(delete_chunk, self._cutoff(retention_days))
+                    result[f"{resolution}_rollups_pruned"] += pruned
+                    result["chunks"] += chunks
+
+                vacuum = BaseModel.incremental_vacuum(self.vacuum_pages)
+                result["pages_vacuumed"] = vacuum["free_pages_before"] - vacuum["free_pages_after"]
+                if vacuum["auto_vacuum"] != 2 and not self._warned_auto_vacuum:
+                    self._warned_auto_vacuum = True
+                    print("WARNING: The database is not in auto_vacuum=INCREMENTAL mode, pruned space is reused but not released. Run 'PRAGMA auto_vacuum=INCREMENTAL; VACUUM;' once to enable it.")
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                with self._lock:
+                    for key, value in result.items():
+                        self._stats[key] += value
+                    self._stats["runs"] += 1
+                    self._stats["last_run_at"] = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                    self._stats["last_run_seconds"] = round(elapsed, 6)
+                    self._stats["total_run_seconds"] = round(self._stats["total_run_seconds"] + elapsed, 6)
+                    if error is not None:
+                        self._stats["failures"] += 1
+                        self._stats["last_error"] = error
+
+            if result["raw_rows_pruned"] or result["minute_rollups_pruned"] or result["hour_rollups_pruned"]:
+                print(f"INFO: Sensor retention pruned {result['raw_rows_pruned']} readings, {result['minute_rollups_pruned']} minute and {result['hour_rollups_pruned']} hour rollups in {elapsed:.2f}s")
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["raw_retention_days"] = self.raw_retention_days
+        stats["minute_rollup_retention_days"] = self.rollup_retention_days["minute"]
+        stats["hour_rollup_retention_days"] = self.rollup_retention_days["hour"]
+        stats["interval"] = self.interval
+        stats["chunk_size"] = self.chunk_size
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        return stats
@@ -0,0 +1,175 @@
+import os
+import threading
+from typing import Callable
+from models.product_model import Product
+from .email_service import EmailService
+from .event_broadcaster import EventBroadcaster
+
+
+class StockAlertService:
+    """
+    Server-side evaluation of the stock thresholds of the products.
+
+    Registered as a stock change listener, it only evaluates the products whose
+    stock just changed (checkout, batch intake, adjustments), once the change is
+    committed. Every change is published as an 'inventory' event carrying the new
+    stock and level, so dashboards update a single row instead of reloading every
+    product. A change of level is also published as a 'stock_alert' event, and
+    products falling to the low level are queued for a single email to the admins
+    sent every `email_interval` seconds.
+
+    Levels are those shown by the inventory report: 'low' at or below the low
+    stock threshold, 'moderate' at or below the moderate stock threshold, 'ok' above.
+    """
+
+    LOW = "low"
+    MODERATE = "moderate"
+    OK = "ok"
+
+    def __init__(self, email_service: EmailService, broadcaster: EventBroadcaster, recipients: Callable[[], list[str]], email_interval: float = None):
+        """
+        Initialize the alert service.
+
+        Args:
+            email_service (EmailService): The service used to send the alert emails.
+            broadcaster (EventBroadcaster): The broadcaster the events are published to.
+            recipients (Callable[[], list[str]]): Returns the email addresses of the alerts, read when an email is sent.
+            email_interval (float): Seconds low stock alerts are collected before being emailed together.
+        """
+        self.email_service = email_service
+        self.broadcaster = broadcaster
+        self.recipients = recipients
+        self.email_interval = email_interval or float(os.getenv('STOCK_ALERT_EMAIL_INTERVAL', '300'))
+
+        self._lock = threading.Lock()
+        # Last level seen per product ID, products never evaluated are assumed ok
+        self._levels: dict[int, str] = {}
+        # Low stock alerts waiting for the next email, by product ID
+        self._pending: dict[int, dict] = {}
+        self._timer: threading.Timer = None
+
+        # Counters
+        self._evaluations = 0
+        self._alerts = 0
+        self._emails = 0
+        self._emailed_alerts = 0
+        self._failures = 0
+
+    @classmethod
+    def get_level(cls, stock: int, low_stock_threshold: int, moderate_stock_threshold: int) -> str:
+        if stock <= low_stock_threshold:
+            return cls.LOW
+        if stock <= moderate_stock_threshold:
+            return cls.MODERATE
+        return cls.OK
+
+    def on_stock_change(self, product_id: int) -> None:
+        """Evaluate the thresholds of a product whose stock changed. Used as a stock change listener."""
+        try:
+            product = Product.fetch_product_by_id(product_id)
+        except Exception as e:
+            with self._lock:
+                self._failures += 1
+            print(f"ERROR: Failed to evaluate the stock thresholds of product {product_id}: {e}")
+            return
+        if product is None:
+            return
+
+        level = self.get_level(product.available_stock, product.low_stock_threshold, product.moderate_stock_threshold)
+        event = {
+            "product_id": product.product_id,
+            "name": product.name,
+            "category": product.category,
+            "stock": product.available_stock,
+            "level": level,
+            "low_stock_threshold": product.low_stock_threshold,
+            "moderate_stock_threshold": product.moderate_stock_threshold,
+        }
+
+        with self._lock:
+            self._evaluations += 1
+            previous_level = self._levels.get(product_id, self.OK)
+            self._levels[product_id] = level
+            changed = level != previous_level
+            if changed:
+                self._alerts += 1
+                if level == self.LOW:
+                    self._pending[product_id] = event
+                    self._schedule_email()
+                else:
+                    # Restocked before the email went out
+                    self._pending.pop(product_id, None)
+            elif product_id in self._pending:
+                # The email shows the latest stock
+                self._pending[product_id] = event
+
+        self.broadcaster.publish("inventory", event)
+        if changed:
+            self.broadcaster.publish("stock_alert", {**event, "previous_level": previous_level})
+
+    def _schedule_email(self) -> None:
+        # Called with the lock held
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(self.email_interval, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self) -> int:
+        """
+        Email the pending low stock alerts now.
+
+        If the email cannot be sent, the alerts are queued again (unless a newer alert
+        replaced them) and retried after `email_interval` seconds.
+
+        Returns:
+            int: The number of products in the email, 0 if none was sent.
+        """
+        with self._lock:
+            self._timer = None
+            alerts = sorted(self._pending.values(), key=lambda alert: alert["product_id"])
+            self._pending.clear()
+        if not alerts:
+            return 0
+
+        try:
+            sent = self.email_service.send_low_stock_alert(self.recipients(), alerts)
+        except Exception as e:
+            print(f"ERROR: Failed to send the low stock alerts: {e}")
+            sent = False
+
+        with self._lock:
+            if not sent:
+                self._failures += 1
+                for alert in alerts:
+                    # Alerts queued or cleared (restocked) since are more recent
+                    if self._levels.get(alert["product_id"]) == self.LOW:
+                        self._pending.setdefault(alert["product_id"], alert)
+                if self._pending:
+                    self._schedule_email()
+                return 0
+
+            self._emails += 1
+            self._emailed_alerts += len(alerts)
+        return len(alerts)
+
+    def stop(self) -> None:
+        """Cancel the scheduled email, dropping the pending alerts."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "email_interval": self.email_interval,
+                "evaluations": self._evaluations,
+                "alerts": self._alerts,
+                "pending_alerts": len(self._pending),
+                "emails": self._emails,
+                "emailed_alerts": self._emailed_alerts,
+                "failures": self._failures,
+                "low_stock_products": sum(1 for level in self._levels.values() if level == self.LOW),
+            }
@@ -0,0 +1,37 @@
+-- Secondary indexes for the hot query paths
+
+-- Latest reading of a sensor: WHERE sensor_id = ? AND data_type = ? ORDER BY created_at DESC
+CREATE INDEX IF NOT EXISTS idx_sensor_data_points_sensor_type_created
+ON SensorDataPoints (sensor_id, data_type, created_at);
+
+-- Readings of a data type over a period (reports), covering the reading value
+CREATE INDEX IF NOT EXISTS idx_sensor_data_points_type_created
+ON SensorDataPoints (data_type, created_at, `value`);
+
+-- Readings of every type over a period (system performance report)
+CREATE INDEX IF NOT EXISTS idx_sensor_data_points_created
+ON SensorDataPoints (created_at);
+
+-- Payments over a period (sales, rewards and transaction totals), covering the summed columns
+CREATE INDEX IF NOT EXISTS idx_payments_date
+ON Payments (`date`, total_paid, reward_points_won);
+
+-- Payment history of a customer, newest first
+CREATE INDEX IF NOT EXISTS idx_payments_customer_date
+ON Payments (customer_id, `date`);
+
+-- Sales of a product (the primary key starts with payment_id)
+CREATE INDEX IF NOT EXISTS idx_payment_products_product
+ON PaymentProducts (product_id, payment_id, product_amount);
+
+-- Membership lookups by QR code
+CREATE INDEX IF NOT EXISTS idx_customers_qr_identification
+ON Customers (qr_identification);
+
+-- Inventory batches of a product
+CREATE INDEX IF NOT EXISTS idx_inventory_batches_product
+ON InventoryBatches (product_id);
+
+-- Items of an inventory batch (EPCs of a product)
+CREATE INDEX IF NOT EXISTS idx_product_item_inventory_batch
+ON ProductItem (inventory_batch_id);
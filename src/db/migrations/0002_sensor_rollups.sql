@@ -0,0 +1,44 @@
+-- Rollups of the sensor readings per sensor, data type and time bucket (UTC bucket start)
+
+CREATE TABLE IF NOT EXISTS SensorDataRollupsMinute (
+    sensor_id INTEGER NOT NULL,
+    data_type TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    sample_count INTEGER NOT NULL,
+    min_value REAL NOT NULL,
+    max_value REAL NOT NULL,
+    sum_value REAL NOT NULL,
+    last_value REAL NOT NULL,
+    last_at TEXT NOT NULL,
+    PRIMARY KEY (data_type, bucket_start, sensor_id),
+    FOREIGN KEY (sensor_id) REFERENCES Sensors(sensor_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS SensorDataRollupsHour (
+    sensor_id INTEGER NOT NULL,
+    data_type TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    sample_count INTEGER NOT NULL,
+    min_value REAL NOT NULL,
+    max_value REAL NOT NULL,
+    sum_value REAL NOT NULL,
+    last_value REAL NOT NULL,
+    last_at TEXT NOT NULL,
+    PRIMARY KEY (data_type, bucket_start, sensor_id),
+    FOREIGN KEY (sensor_id) REFERENCES Sensors(sensor_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Day buckets start at local midnight
+CREATE TABLE IF NOT EXISTS SensorDataRollupsDay (
+    sensor_id INTEGER NOT NULL,
+    data_type TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    sample_count INTEGER NOT NULL,
+    min_value REAL NOT NULL,
+    max_value REAL NOT NULL,
+    sum_value REAL NOT NULL,
+    last_value REAL NOT NULL,
+    last_at TEXT NOT NULL,
+    PRIMARY KEY (data_type, bucket_start, sensor_id),
+    FOREIGN KEY (sensor_id) REFERENCES Sensors(sensor_id) ON DELETE CASCADE
+) WITHOUT ROWID;
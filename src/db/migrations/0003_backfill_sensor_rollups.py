@@ -0,0 +1,42 @@
+# Roll up the sensor readings stored before the rollup tables existed.
+# Reads SensorDataPoints in its layout at this version (TEXT data_type, value and created_at).
+import sqlite3
+from models.sensor_data_point_model import SensorDataPoint
+from models.sensor_data_rollup_model import SensorDataRollup
+
+CHUNK_SIZE = 10000
+
+
+def migrate(connection: sqlite3.Connection) -> None:
+    cursor = connection.cursor()
+    try:
+        for table in SensorDataRollup.RESOLUTION_TABLES.values():
+            cursor.execute(f"DELETE FROM {table};")
+
+        # Walk the readings in primary key order, one chunk at a time
+        last_id = 0
+        total = 0
+        while True:
+            cursor.execute("""
+            SELECT sensor_data_point_id, sensor_id, data_type, value, created_at FROM SensorDataPoints
+            WHERE sensor_data_point_id > ?
+            ORDER BY sensor_data_point_id
+            LIMIT ?;
+            """, (last_id, CHUNK_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            points = []
+            for row in rows:
+                point = SensorDataPoint(row[1], row[2], row[3])
+                point.created_at = row[4]
+                points.append(point)
+            SensorDataRollup._apply_points(points, cursor)
+
+            last_id = rows[-1][0]
+            total += len(rows)
+
+        print(f"INFO: Rolled up {total} existing sensor readings")
+    finally:
+        cursor.close()
@@ -0,0 +1,53 @@
+-- Typed storage for the sensor readings: REAL value, integer data type code and epoch timestamp
+
+-- Data type codes (kept in sync with SensorDataPoint.DATA_TYPE_CODES)
+CREATE TABLE IF NOT EXISTS SensorDataTypes (
+    data_type_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+INSERT OR IGNORE INTO SensorDataTypes (data_type_id, name) VALUES
+    (1, 'temperature'),
+    (2, 'humidity'),
+    (3, 'fan_status');
+
+-- Any other data type found in the existing readings gets its own code
+INSERT OR IGNORE INTO SensorDataTypes (name)
+SELECT DISTINCT data_type FROM SensorDataPoints;
+
+CREATE TABLE SensorDataPoints_typed (
+    sensor_data_point_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sensor_id INTEGER NOT NULL,
+    data_type_id INTEGER NOT NULL,
+    `value` REAL NOT NULL, -- Booleans (fan status) are stored as 1/0
+    created_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)), -- Seconds since the Unix epoch (UTC)
+    FOREIGN KEY (sensor_id) REFERENCES Sensors(sensor_id),
+    FOREIGN KEY (data_type_id) REFERENCES SensorDataTypes(data_type_id)
+);
+
+INSERT INTO SensorDataPoints_typed (sensor_data_point_id, sensor_id, data_type_id, `value`, created_at)
+SELECT
+    p.sensor_data_point_id,
+    p.sensor_id,
+    t.data_type_id,
+    CASE
+        WHEN lower(p.`value`) = 'true' THEN 1.0
+        WHEN lower(p.`value`) = 'false' THEN 0.0
+        ELSE CAST(p.`value` AS REAL)
+    END,
+    CAST(strftime('%s', p.created_at) AS INTEGER)
+FROM SensorDataPoints p
+JOIN SensorDataTypes t ON t.name = p.data_type;
+
+-- Dropping the table also drops its indexes; they are recreated on the new columns below
+DROP TABLE SensorDataPoints;
+ALTER TABLE SensorDataPoints_typed RENAME TO SensorDataPoints;
+
+CREATE INDEX IF NOT EXISTS idx_sensor_data_points_sensor_type_created
+ON SensorDataPoints (sensor_id, data_type_id, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_sensor_data_points_type_created
+ON SensorDataPoints (data_type_id, created_at, `value`);
+
+CREATE INDEX IF NOT EXISTS idx_sensor_data_points_created
+ON SensorDataPoints (created_at);
@@ -0,0 +1,23 @@
+-- Indexes for the paginated customer and product listings.
+-- Every index also holds the rowid, so it serves the (column, id) keyset order directly.
+
+-- Customer listings sorted by name (email is already covered by its UNIQUE index)
+CREATE INDEX IF NOT EXISTS idx_customers_last_name
+ON Customers (last_name);
+
+CREATE INDEX IF NOT EXISTS idx_customers_first_name
+ON Customers (first_name);
+
+-- Product listings sorted by name, price or UPC, and UPC lookups
+CREATE INDEX IF NOT EXISTS idx_products_name
+ON Products (name);
+
+CREATE INDEX IF NOT EXISTS idx_products_price
+ON Products (price);
+
+CREATE INDEX IF NOT EXISTS idx_products_upc
+ON Products (upc);
+
+-- Product listings filtered by category
+CREATE INDEX IF NOT EXISTS idx_products_category
+ON Products (category);
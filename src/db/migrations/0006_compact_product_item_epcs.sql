@@ -0,0 +1,96 @@
+-- Compact storage for the EPCs of the product items (see models/utils/epc_codec.py):
+-- every EPC is split into a prefix code and an integer serial, and sequential runs of
+-- EPCs in the same inventory batch are stored as a single serial range.
+
+-- Prefix and width of the numeric tail of the EPCs ('A' + 23 digits), stored once
+CREATE TABLE IF NOT EXISTS EpcPrefixes (
+    prefix_id INTEGER PRIMARY KEY,
+    prefix TEXT NOT NULL,
+    width INTEGER NOT NULL, -- 0 for EPCs stored verbatim in prefix
+    UNIQUE (prefix, width)
+);
+
+-- Split the existing EPCs: the serial is made of the last 18 digits at most (EpcCodec.split),
+-- EPCs that do not end with a digit are kept verbatim
+CREATE TEMP TABLE parsed_epcs AS
+SELECT
+    CASE WHEN width > 0 THEN substr(epc, 1, length(epc) - width) ELSE epc END AS prefix,
+    width,
+    CASE WHEN width > 0 THEN CAST(substr(epc, length(epc) - width + 1) AS INTEGER) ELSE -1 END AS serial,
+    inventory_batch_id
+FROM (
+    SELECT epc, min(length(epc) - length(rtrim(epc, '0123456789')), 18) AS width, inventory_batch_id
+    FROM ProductItem
+);
+
+INSERT OR IGNORE INTO EpcPrefixes (prefix, width)
+SELECT DISTINCT prefix, width FROM parsed_epcs;
+
+-- Sequential serials of a batch share the same serial - rank (gaps and islands)
+CREATE TEMP TABLE encoded_epcs AS
+SELECT
+    prefix_id,
+    serial,
+    inventory_batch_id,
+    island,
+    COUNT(*) OVER (PARTITION BY prefix_id, inventory_batch_id, island) AS island_size
+FROM (
+    SELECT
+        ep.prefix_id,
+        p.serial,
+        p.inventory_batch_id,
+        p.serial - ROW_NUMBER() OVER (PARTITION BY ep.prefix_id, p.inventory_batch_id ORDER BY p.serial) AS island
+    FROM parsed_epcs p
+    JOIN EpcPrefixes ep ON ep.prefix = p.prefix AND ep.width = p.width
+);
+
+-- Runs of sequential EPCs of a batch, both ends included
+CREATE TABLE IF NOT EXISTS ProductItemRanges (
+    range_id INTEGER PRIMARY KEY,
+    prefix_id INTEGER NOT NULL,
+    first_serial INTEGER NOT NULL,
+    last_serial INTEGER NOT NULL,
+    inventory_batch_id INTEGER NOT NULL,
+    CHECK (first_serial <= last_serial),
+    FOREIGN KEY (prefix_id) REFERENCES EpcPrefixes(prefix_id),
+    FOREIGN KEY (inventory_batch_id) REFERENCES InventoryBatches(inventory_batch_id) ON DELETE CASCADE
+);
+
+-- Runs of at least 8 EPCs become ranges (ProductItem.RANGE_MIN_LENGTH)
+INSERT INTO ProductItemRanges (prefix_id, first_serial, last_serial, inventory_batch_id)
+SELECT prefix_id, MIN(serial), MAX(serial), inventory_batch_id
+FROM encoded_epcs
+WHERE serial != -1 AND island_size >= 8
+GROUP BY prefix_id, inventory_batch_id, island;
+
+-- The other EPCs are kept one per row, keyed by (prefix_id, serial) without a separate rowid
+CREATE TABLE ProductItem_compact (
+    prefix_id INTEGER NOT NULL,
+    serial INTEGER NOT NULL, -- -1 for EPCs stored verbatim in EpcPrefixes.prefix
+    inventory_batch_id INTEGER NOT NULL,
+    PRIMARY KEY (prefix_id, serial),
+    FOREIGN KEY (prefix_id) REFERENCES EpcPrefixes(prefix_id),
+    FOREIGN KEY (inventory_batch_id) REFERENCES InventoryBatches(inventory_batch_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+INSERT INTO ProductItem_compact (prefix_id, serial, inventory_batch_id)
+SELECT prefix_id, serial, inventory_batch_id
+FROM encoded_epcs
+WHERE serial = -1 OR island_size < 8;
+
+DROP TABLE ProductItem;
+ALTER TABLE ProductItem_compact RENAME TO ProductItem;
+
+DROP TABLE temp.parsed_epcs;
+DROP TABLE temp.encoded_epcs;
+
+-- Items of an inventory batch (EPCs of a product)
+CREATE INDEX IF NOT EXISTS idx_product_item_inventory_batch
+ON ProductItem (inventory_batch_id);
+
+-- Range containing a serial: the last range of the prefix starting at or before it
+CREATE UNIQUE INDEX IF NOT EXISTS idx_product_item_ranges_prefix_first
+ON ProductItemRanges (prefix_id, first_serial);
+
+CREATE INDEX IF NOT EXISTS idx_product_item_ranges_inventory_batch
+ON ProductItemRanges (inventory_batch_id);
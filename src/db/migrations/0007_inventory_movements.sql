@@ -0,0 +1,32 @@
+-- Append-only ledger of every stock movement. ProductInventory.total_stock stays the
+-- materialized stock level, updated in the same transaction as every movement.
+CREATE TABLE IF NOT EXISTS InventoryMovements (
+    movement_id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    movement_type TEXT NOT NULL CHECK (movement_type IN ('receipt', 'sale', 'adjustment')),
+    quantity INTEGER NOT NULL, -- Signed change of the stock level
+    stock_after INTEGER NOT NULL, -- Stock level right after the movement
+    inventory_batch_id INTEGER, -- Batch received, for receipts
+    payment_id INTEGER, -- Payment, for sales
+    note TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (product_id) REFERENCES Products(product_id) ON DELETE CASCADE,
+    FOREIGN KEY (inventory_batch_id) REFERENCES InventoryBatches(inventory_batch_id) ON DELETE CASCADE,
+    FOREIGN KEY (payment_id) REFERENCES Payments(payment_id)
+);
+
+-- Movements of a product over time, and its stock level at a point in time (last movement before it)
+CREATE INDEX IF NOT EXISTS idx_inventory_movements_product_created
+ON InventoryMovements (product_id, created_at, movement_id);
+
+-- Movements are never changed, corrections are new adjustments
+CREATE TRIGGER IF NOT EXISTS trg_inventory_movements_append_only
+BEFORE UPDATE ON InventoryMovements
+BEGIN
+    SELECT RAISE(ABORT, 'InventoryMovements is append-only');
+END;
+
+-- The history before the ledger is unknown: open it with the current stock levels
+INSERT INTO InventoryMovements (product_id, movement_type, quantity, stock_after, note)
+SELECT product_id, 'adjustment', total_stock, total_stock, 'Opening balance'
+FROM ProductInventory;
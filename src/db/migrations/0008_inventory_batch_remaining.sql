@@ -0,0 +1,32 @@
+-- Quantity of every inventory batch still in stock, depleted by sales: first in, first out,
+-- or exactly the batches of the EPCs scanned at checkout
+ALTER TABLE InventoryBatches ADD COLUMN remaining_quantity INTEGER NOT NULL DEFAULT 0;
+
+-- Under FIFO, the current stock of a product is what remains of its newest batches
+WITH newest_first AS (
+    SELECT
+        ib.inventory_batch_id,
+        ib.quantity,
+        COALESCE(inv.total_stock, 0) AS total_stock,
+        COALESCE(SUM(ib.quantity) OVER (
+            PARTITION BY ib.product_id
+            ORDER BY ib.received_date DESC, ib.inventory_batch_id DESC
+            ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+        ), 0) AS newer_quantity
+    FROM InventoryBatches ib
+    LEFT JOIN ProductInventory inv ON inv.product_id = ib.product_id
+)
+UPDATE InventoryBatches
+SET remaining_quantity = MAX(0, MIN(nf.quantity, nf.total_stock - nf.newer_quantity))
+FROM newest_first nf
+WHERE InventoryBatches.inventory_batch_id = nf.inventory_batch_id;
+
+-- Batches of a product still in stock, oldest first (FIFO depletion, stock aging per product)
+CREATE INDEX IF NOT EXISTS idx_inventory_batches_product_remaining
+ON InventoryBatches (product_id, received_date, inventory_batch_id)
+WHERE remaining_quantity > 0;
+
+-- Batches still in stock across products, oldest first (aging report)
+CREATE INDEX IF NOT EXISTS idx_inventory_batches_remaining_received
+ON InventoryBatches (received_date)
+WHERE remaining_quantity > 0;
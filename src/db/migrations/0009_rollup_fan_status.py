@@ -0,0 +1,45 @@
+# Roll up the fan status readings, which were left out of the rollups until now.
+# Reads SensorDataPoints in its layout at this version (data_type_id, REAL value, epoch created_at).
+import sqlite3
+from models.sensor_data_point_model import SensorDataPoint
+from models.sensor_data_rollup_model import SensorDataRollup
+from models.utils.datetime_utils import DateTimeUtils
+
+CHUNK_SIZE = 10000
+DATA_TYPE = "fan_status"
+
+
+def migrate(connection: sqlite3.Connection) -> None:
+    cursor = connection.cursor()
+    try:
+        for table in SensorDataRollup.RESOLUTION_TABLES.values():
+            cursor.execute(f"DELETE FROM {table} WHERE data_type = ?;", (DATA_TYPE,))
+
+        # Walk the fan status readings in primary key order, one chunk at a time
+        data_type_id = SensorDataPoint.get_data_type_code(DATA_TYPE)
+        last_id = 0
+        total = 0
+        while True:
+            cursor.execute("""
+            SELECT sensor_data_point_id, sensor_id, value, created_at FROM SensorDataPoints
+            WHERE data_type_id = ? AND sensor_data_point_id > ?
+            ORDER BY sensor_data_point_id
+            LIMIT ?;
+            """, (data_type_id, last_id, CHUNK_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            points = []
+            for row in rows:
+                point = SensorDataPoint(row[1], DATA_TYPE, SensorDataPoint._decode_value(DATA_TYPE, row[2]))
+                point.created_at = DateTimeUtils.epoch_to_utc(row[3])
+                points.append(point)
+            SensorDataRollup._apply_points(points, cursor)
+
+            last_id = rows[-1][0]
+            total += len(rows)
+
+        print(f"INFO: Rolled up {total} existing fan status readings")
+    finally:
+        cursor.close()
@@ -0,0 +1,46 @@
+-- Keep the inventory ledger when a product or a batch is deleted: InventoryMovements used
+-- to be erased with them (ON DELETE CASCADE). The product ID becomes a plain reference
+-- (product IDs are never reused) next to the product name at the time of the movement,
+-- and the batch is unlinked (SET NULL) instead of taking its receipt with it.
+CREATE TABLE InventoryMovements_history (
+    movement_id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL, -- Kept once the product is deleted
+    product_name TEXT, -- Name of the product at the time of the movement
+    movement_type TEXT NOT NULL CHECK (movement_type IN ('receipt', 'sale', 'adjustment')),
+    quantity INTEGER NOT NULL, -- Signed change of the stock level
+    stock_after INTEGER NOT NULL, -- Stock level right after the movement
+    inventory_batch_id INTEGER, -- Batch received, for receipts (NULL once the batch is deleted)
+    payment_id INTEGER, -- Payment, for sales
+    note TEXT,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (inventory_batch_id) REFERENCES InventoryBatches(inventory_batch_id) ON DELETE SET NULL,
+    FOREIGN KEY (payment_id) REFERENCES Payments(payment_id)
+);
+
+INSERT INTO InventoryMovements_history (movement_id, product_id, product_name, movement_type, quantity, stock_after, inventory_batch_id, payment_id, note, created_at)
+SELECT m.movement_id, m.product_id, p.name, m.movement_type, m.quantity, m.stock_after, m.inventory_batch_id, m.payment_id, m.note, m.created_at
+FROM InventoryMovements m
+LEFT JOIN Products p ON p.product_id = m.product_id;
+
+-- Also drops the index and the trigger of the old table
+DROP TABLE InventoryMovements;
+ALTER TABLE InventoryMovements_history RENAME TO InventoryMovements;
+
+CREATE INDEX IF NOT EXISTS idx_inventory_movements_product_created
+ON InventoryMovements (product_id, created_at, movement_id);
+
+-- Movements are never changed, corrections are new adjustments
+CREATE TRIGGER IF NOT EXISTS trg_inventory_movements_append_only
+BEFORE UPDATE OF movement_id, product_id, product_name, movement_type, quantity, stock_after, payment_id, note, created_at
+ON InventoryMovements
+BEGIN
+    SELECT RAISE(ABORT, 'InventoryMovements is append-only');
+END;
+
+-- The only change allowed is unlinking a deleted batch
+CREATE TRIGGER IF NOT EXISTS trg_inventory_movements_batch_unlink_only
+BEFORE UPDATE OF inventory_batch_id ON InventoryMovements
+WHEN NEW.inventory_batch_id IS NOT NULL
+BEGIN
+    SELECT RAISE(ABORT, 'InventoryMovements is append-only');
+END;
@@ -0,0 +1,21 @@
+# Add the MQTT topic prefix of the sensors to databases created before the column existed.
+# Sensors used to be routed by the historical 'Frig<id>' naming, which becomes their topic.
+import sqlite3
+
+
+def migrate(connection: sqlite3.Connection) -> None:
+    cursor = connection.cursor()
+    try:
+        cursor.execute("PRAGMA table_info(Sensors);")
+        columns = {row[1] for row in cursor.fetchall()}
+
+        # Fresh installs get the column (UNIQUE) from the base schema
+        if "topic" not in columns:
+            cursor.execute("ALTER TABLE Sensors ADD COLUMN topic TEXT;")
+            # ADD COLUMN cannot add a UNIQUE constraint, an index enforces it instead
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_sensors_topic ON Sensors (topic);")
+
+        cursor.execute("UPDATE Sensors SET topic = 'Frig' || sensor_id WHERE topic IS NULL;")
+        print(f"INFO: Set the MQTT topic of {cursor.rowcount} existing sensors")
+    finally:
+        cursor.close()
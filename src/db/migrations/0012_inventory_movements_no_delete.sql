@@ -0,0 +1,8 @@
+-- The inventory ledger is append-only: besides updates (see 0010), movements can no
+-- longer be deleted. Products and batches are unlinked from their movements, never
+-- deleted with them, and corrections are new adjustments.
+CREATE TRIGGER IF NOT EXISTS trg_inventory_movements_no_delete
+BEFORE DELETE ON InventoryMovements
+BEGIN
+    SELECT RAISE(ABORT, 'InventoryMovements is append-only');
+END;
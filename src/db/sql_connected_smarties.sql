@@ -1,4 +1,7 @@
 PRAGMA foreign_keys=OFF;
+-- Let the sensor retention service return freed pages to the file system (incremental vacuum).
+-- Only takes effect on a new database file, or after running VACUUM on an existing one.
+PRAGMA auto_vacuum=INCREMENTAL;
 
 DROP TABLE IF EXISTS Admins;
 DROP TABLE IF EXISTS Customers;
@@ -9,7 +12,15 @@ DROP TABLE IF EXISTS Sensors;
 DROP TABLE IF EXISTS SensorDataPoints;
 DROP TABLE IF EXISTS InventoryBatches;
 DROP TABLE IF EXISTS ProductInventory;
+DROP TABLE IF EXISTS InventoryMovements;
 DROP TABLE IF EXISTS ProductItem;
+DROP TABLE IF EXISTS ProductItemRanges;
+DROP TABLE IF EXISTS EpcPrefixes;
+DROP TABLE IF EXISTS SensorDataRollupsMinute;
+DROP TABLE IF EXISTS SensorDataRollupsHour;
+DROP TABLE IF EXISTS SensorDataRollupsDay;
+DROP TABLE IF EXISTS SensorDataTypes;
+DROP TABLE IF EXISTS schema_version; -- Migrations in db/migrations are re-applied at startup
 
 -- Create the admin table 
 CREATE TABLE IF NOT EXISTS Admins (
@@ -72,10 +83,12 @@ CREATE TABLE IF NOT EXISTS PaymentProducts (
 CREATE TABLE IF NOT EXISTS Sensors (
     sensor_id INTEGER PRIMARY KEY AUTOINCREMENT,
     sensor_type TEXT NOT NULL,
-    `location` TEXT NOT NULL
+    `location` TEXT NOT NULL,
+    topic TEXT UNIQUE -- MQTT topic prefix the device publishes under (e.g. 'Frig1')
 );
 
 -- Create the SensorDataPoints table
+-- (converted to typed storage by db/migrations/0004_typed_sensor_values.sql: REAL value, data_type_id, epoch created_at)
 CREATE TABLE IF NOT EXISTS SensorDataPoints (
     sensor_data_point_id INTEGER PRIMARY KEY AUTOINCREMENT,
     sensor_id INTEGER NOT NULL,
@@ -131,10 +144,10 @@ INSERT INTO Admins (email, password) VALUES
 ('nneflasflorencee@gmail.com', 'Password123!');
 
 -- Insert both sensors
-INSERT INTO Sensors (sensor_type, `location`)
+INSERT INTO Sensors (sensor_type, `location`, topic)
 VALUES
-('temperature/humidity', 'Store 1: Fridge 1'),
-('temperature/humidity', 'Store 1: Fridge 2');
+('temperature/humidity', 'Store 1: Fridge 1', 'Frig1'),
+('temperature/humidity', 'Store 1: Fridge 2', 'Frig2');
 
 -- Insert sample data into the database
 INSERT INTO SensorDataPoints (sensor_id, data_type, value, created_at) VALUES
@@ -1,4 +1,9 @@
+from .utils.connection_pool import ConnectionPool
+from .utils.schema_migrator import SchemaMigrator
+from contextlib import closing
+from typing import Iterator
 import sqlite3
+import threading
 import os
 
 
@@ -6,21 +11,220 @@ class BaseModel:
 	"""
 	BaseModel class represents the base model.
 	It contains general methods for connecting to the database.
-	
+
 	Parameters:
 		PROJECT_ROOT (str): Static variable for the absolute path to the project folder.
 		DB_NAME (str): Static variable for the DB Name.
-		db_table (str): The name of the model's table. 
+		MIGRATIONS_DIR (str): Static variable for the directory of the versioned migration scripts.
+		DB_POOL_SIZE (int): Static variable for the maximum number of pooled connections.
+		DB_BUSY_TIMEOUT_MS (int): Static variable for the SQLite busy timeout in milliseconds.
+		db_table (str): The name of the model's table.
 	"""
 	PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 	DB_NAME = os.path.join(PROJECT_ROOT, "db", "sql_connected_smarties.db")
-		
+	MIGRATIONS_DIR = os.path.join(PROJECT_ROOT, "db", "migrations")
+	DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+	DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+	_pool: ConnectionPool = None
+	_pool_lock = threading.Lock()
+
 
 	def __init__(self, db_table):
 		self.db_table = db_table
-		
-	
+
+
+	@staticmethod
+	def _get_pool() -> ConnectionPool:
+		# Lazily create the pool, recreating it if the database path was changed
+		with BaseModel._pool_lock:
+			pool = BaseModel._pool
+			if pool is None or pool.database != BaseModel.DB_NAME:
+				if pool is not None:
+					pool.close_all()
+				pool = ConnectionPool(BaseModel.DB_NAME, BaseModel.DB_POOL_SIZE, BaseModel.DB_BUSY_TIMEOUT_MS)
+				BaseModel._pool = pool
+			return pool
+
+
 	@staticmethod
 	def _connectToDB():
-		# Return the database Connection
-		return sqlite3.connect(BaseModel.DB_NAME)
+		# Lease a pooled connection for the current thread
+		return BaseModel._get_pool().connection()
+
+
+	@staticmethod
+	def _transaction():
+		# Lease a pooled connection and begin a write transaction (unit of work).
+		# Model calls made on this thread inside the block join the same transaction,
+		# which is committed once when the block exits or rolled back on error.
+		return BaseModel._get_pool().connection(immediate=True)
+
+
+	@staticmethod
+	def _after_commit(callback) -> None:
+		# Defer a callback (e.g. cache invalidation) until the current transaction commits
+		BaseModel._get_pool().after_commit(callback)
+
+
+	@staticmethod
+	def migrate_schema() -> list[int]:
+		"""
+		Apply the pending schema migrations, then warn about hot queries doing full table scans.
+
+		Returns:
+			list[int]: The versions applied.
+		"""
+		migrator = SchemaMigrator(BaseModel.DB_NAME, BaseModel.MIGRATIONS_DIR, BaseModel.DB_BUSY_TIMEOUT_MS)
+		applied_versions = migrator.migrate()
+		migrator.check_query_plans()
+		return applied_versions
+
+
+	@staticmethod
+	def incremental_vacuum(max_pages: int) -> dict:
+		"""
+		Return up to `max_pages` free pages to the file system (requires auto_vacuum=INCREMENTAL).
+
+		Args:
+			max_pages (int): The maximum number of pages released.
+
+		Returns:
+			dict: The auto_vacuum mode and the number of free pages before and after.
+		"""
+		with BaseModel._connectToDB() as connection:
+			auto_vacuum = connection.execute("PRAGMA auto_vacuum;").fetchone()[0]
+			free_pages_before = connection.execute("PRAGMA freelist_count;").fetchone()[0]
+			# 2 = INCREMENTAL; with NONE (0) or FULL (1) there is nothing to do
+			if auto_vacuum == 2 and free_pages_before > 0 and not connection.in_transaction:
+				# execute() steps the pragma only once (one page); executescript() runs it to completion
+				connection.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+			free_pages_after = connection.execute("PRAGMA freelist_count;").fetchone()[0]
+		return {
+			"auto_vacuum": auto_vacuum,
+			"free_pages_before": free_pages_before,
+			"free_pages_after": free_pages_after
+		}
+
+
+	@staticmethod
+	def _iter_query(sql: str, key_columns: list[str], sql_values: dict = None, batch_size: int = 500, descending: bool = False) -> Iterator[sqlite3.Row]:
+		"""
+		Iterate over the rows of a query, fetching them in keyset batches instead of all at once.
+
+		Each batch is read with its own short lease, seeking past the key of the previous
+		batch's last row, and the connection is released before the rows are handed out.
+		A slow consumer (e.g. a streamed response) therefore never holds a pooled
+		connection, and batches may see rows committed in between.
+
+		Args:
+			sql (str): The query, without ORDER BY or LIMIT.
+			key_columns (list[str]): Result columns, non-null and unique together, the rows are ordered by.
+			sql_values (dict, optional): The values of the query.
+			batch_size (int): The number of rows fetched at a time.
+			descending (bool): True to iterate in descending key order.
+
+		Returns:
+			Iterator[sqlite3.Row]: The rows.
+		"""
+		comparison = "<" if descending else ">"
+		direction = "DESC" if descending else "ASC"
+		query = sql.strip().rstrip(";")
+		order_by = ", ".join(f"{column} {direction}" for column in key_columns)
+		after_names = [f"iter_after_{index}" for index in range(len(key_columns))]
+		first_batch_sql = f"SELECT * FROM ({query}) ORDER BY {order_by} LIMIT :iter_batch_size;"
+		next_batch_sql = (
+			f"SELECT * FROM ({query}) WHERE ({', '.join(key_columns)}) {comparison} ({', '.join(':' + name for name in after_names)}) "
+			f"ORDER BY {order_by} LIMIT :iter_batch_size;"
+		)
+		sql_values = {**(sql_values or {}), "iter_batch_size": batch_size}
+
+		last_key = None
+		while True:
+			with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+				cursor.row_factory = sqlite3.Row
+				if last_key is None:
+					cursor.execute(first_batch_sql, sql_values)
+				else:
+					cursor.execute(next_batch_sql, {**sql_values, **dict(zip(after_names, last_key))})
+				rows = cursor.fetchall()
+
+			yield from rows
+			if len(rows) < batch_size:
+				break
+			last_key = tuple(rows[-1][column] for column in key_columns)
+
+
+	@staticmethod
+	def _like_pattern(search: str) -> str:
+		# Substring LIKE pattern (used with ESCAPE '\'), the wildcards of the search are matched literally
+		escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+		return f"%{escaped}%"
+
+
+	@staticmethod
+	def _fetch_keyset_page(cursor: sqlite3.Cursor, select_sql: str, table: str, alias: str, id_column: str, sort_column: str, descending: bool, after_id: int, limit: int, conditions: list[str], sql_values: dict) -> tuple[list[sqlite3.Row], int | None]:
+		"""
+		Fetch one page of rows ordered by (sort_column, id_column), starting after a given row.
+
+		Keyset pagination seeks to the previous page's last row through the index of the
+		sort column instead of skipping OFFSET rows, so every page costs the same.
+
+		Args:
+			cursor (sqlite3.Cursor): The cursor to query with.
+			select_sql (str): The SELECT ... FROM ... part of the query, without WHERE.
+			table (str): The table holding the sort and id columns.
+			alias (str): The alias of the table in select_sql.
+			id_column (str): The unique id column, used to break ties.
+			sort_column (str): The indexed, non-null column to sort on.
+			descending (bool): True to sort in descending order.
+			after_id (int): The id of the last row of the previous page, None for the first page.
+			limit (int): The maximum number of rows returned.
+			conditions (list[str]): Filters combined with AND.
+			sql_values (dict): The values of the filters.
+
+		Returns:
+			tuple[list[sqlite3.Row], int | None]: The rows, and the after_id of the next page (None on the last page).
+
+		Raises:
+			ValueError: If after_id does not match any row.
+		"""
+		conditions = list(conditions)
+		sql_values = dict(sql_values)
+		comparison = "<" if descending else ">"
+
+		if after_id is not None:
+			if sort_column == id_column:
+				conditions.append(f"{alias}.{id_column} {comparison} :after_id")
+				sql_values["after_id"] = after_id
+			else:
+				# Seek past the (sort value, id) of the previous page's last row
+				cursor.execute(f"SELECT {sort_column} FROM {table} WHERE {id_column} = ?;", (after_id,))
+				row = cursor.fetchone()
+				if row is None:
+					raise ValueError(f"No row with ID {after_id} to continue from.")
+				conditions.append(f"({alias}.{sort_column}, {alias}.{id_column}) {comparison} (:after_value, :after_id)")
+				sql_values["after_value"] = row[0]
+				sql_values["after_id"] = after_id
+
+		direction = "DESC" if descending else "ASC"
+		sql = select_sql
+		if conditions:
+			sql += " WHERE " + " AND ".join(f"({condition})" for condition in conditions)
+		sql += f" ORDER BY {alias}.{sort_column} {direction}, {alias}.{id_column} {direction} LIMIT :page_limit;"
+
+		# One extra row tells whether there is a next page
+		sql_values["page_limit"] = limit + 1
+		cursor.execute(sql, sql_values)
+		rows = cursor.fetchall()
+
+		if len(rows) <= limit:
+			return rows, None
+		rows = rows[:limit]
+		return rows, rows[-1][id_column]
+
+
+	@staticmethod
+	def get_connection_pool_stats() -> dict:
+		"""Return the hit/miss and wait-time counters of the connection pool."""
+		return BaseModel._get_pool().stats()
@@ -5,6 +5,7 @@ from .exceptions.database_read_exception import DatabaseReadException
 from .exceptions.database_delete_exception import DatabaseDeleteException
 from .utils.datetime_utils import DateTimeUtils
 from contextlib import closing
+from typing import Iterator
 import sqlite3
 import string
 import secrets
@@ -16,6 +17,7 @@ class Customer(BaseModel):
 
 	Parameters:
 		DB_TABLE (str): The name of the customers database table .
+		SORT_COLUMNS (tuple[str]): The columns customer pages can be sorted on.
 		customer_id (id): The ID of the customer. Set automatically.
 		first_name (str): Customer's first name.
         last_name (str): Customer's last name.
@@ -24,6 +26,8 @@ class Customer(BaseModel):
         rewards_points (int): Customer's reward points balance.
 	"""
 	DB_TABLE = "Customers"
+	# Indexed columns customer listings can be sorted on
+	SORT_COLUMNS = ("customer_id", "first_name", "last_name", "email")
 	
 	def __init__(self, first_name, last_name, email, password, phone_number=None, qr_identification=None, rewards_points=0):
 		"""
@@ -370,9 +374,6 @@ class Customer(BaseModel):
 
 				# Set the ID returned
 				customer.customer_id = cursor.lastrowid
-
-				# Commit
-				connection.commit()
 			except Exception as e:
 				raise DatabaseInsertException(f"An unexpected error occurred while inserting the customer: {e}")
 
@@ -505,6 +506,73 @@ class Customer(BaseModel):
 		return customers
 
 
+	@classmethod
+	def iter_all_customers(cls, batch_size: int = 500) -> Iterator[Customer]:
+		"""
+		Iterate over every customer without loading them all in memory.
+
+		Args:
+			batch_size (int): The number of customers read from the database at a time.
+
+		Returns:
+			Iterator[Customer]: The customers.
+		"""
+		sql = f"""
+		SELECT * FROM {cls.DB_TABLE} WHERE customer_id != 0;
+		"""
+		try:
+			for row in BaseModel._iter_query(sql, ["customer_id"], batch_size=batch_size):
+				yield cls.from_row(row)
+		except Exception as e:
+			raise DatabaseReadException(f"An unexpected error occured while fetching all customers: {e}")
+
+
+	@classmethod
+	def fetch_customers_page(cls, after_id: int = None, limit: int = 50, search: str = None, sort: str = "customer_id", descending: bool = False) -> tuple[list[Customer], int | None]:
+		"""
+		Fetch one page of customers, optionally filtered by name or email.
+
+		Args:
+			after_id (int, optional): The customer_id of the last customer of the previous page.
+			limit (int): The maximum number of customers returned.
+			search (str, optional): Text searched in the first name, last name and email.
+			sort (str): The column to sort on, one of SORT_COLUMNS.
+			descending (bool): True to sort in descending order.
+
+		Returns:
+			tuple[list[Customer], int | None]: The customers, and the after_id of the next page (None on the last page).
+
+		Raises:
+			ValueError: If the sort column is not supported or after_id does not match any customer.
+		"""
+		if sort not in cls.SORT_COLUMNS:
+			raise ValueError(f"Customers cannot be sorted by {sort}. Supported columns: {', '.join(cls.SORT_COLUMNS)}.")
+
+		conditions = ["c.customer_id != 0"]
+		sql_values = {}
+		if search:
+			conditions.append(
+				"c.first_name LIKE :search ESCAPE '\\' OR c.last_name LIKE :search ESCAPE '\\' "
+				"OR c.email LIKE :search ESCAPE '\\' OR (c.first_name || ' ' || c.last_name) LIKE :search ESCAPE '\\'"
+			)
+			sql_values["search"] = BaseModel._like_pattern(search)
+
+		with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+			try:
+				# Set the return mode
+				cursor.row_factory = sqlite3.Row
+
+				rows, next_after_id = BaseModel._fetch_keyset_page(
+					cursor, f"SELECT c.* FROM {cls.DB_TABLE} c", cls.DB_TABLE, "c", "customer_id", sort, descending, after_id, limit, conditions, sql_values
+				)
+			except ValueError:
+				raise
+			except Exception as e:
+				raise DatabaseReadException(f"An unexpected error occured while fetching a page of customers: {e}")
+
+		return [cls.from_row(row) for row in rows], next_after_id
+
+
 	@classmethod
 	def delete_customer(cls, customer_id: int) -> None:
 		sql = f"""
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from .base_model import BaseModel
+from .exceptions.database_read_exception import DatabaseReadException
+from .utils.datetime_utils import DateTimeUtils
+from contextlib import closing
+import sqlite3
+
+class InventoryMovement(BaseModel):
+    """
+    Entry of the append-only inventory ledger: a receipt, a sale or an adjustment of the stock of a product.
+
+    Every movement stores the stock level right after it, so the stock at any point in time
+    is a single index seek. ProductInventory.total_stock is the materialized current level,
+    written in the same transaction as the movement. Movements outlive the product (kept by
+    ID and name) and the batch (unlinked) they refer to.
+    """
+
+    DB_TABLE = "InventoryMovements"
+    INVENTORY_TABLE = "ProductInventory"
+    PRODUCTS_TABLE = "Products"
+
+    RECEIPT = "receipt"
+    SALE = "sale"
+    ADJUSTMENT = "adjustment"
+    MOVEMENT_TYPES = (RECEIPT, SALE, ADJUSTMENT)
+
+    def __init__(self, product_id: int, movement_type: str, quantity: int, stock_after: int, inventory_batch_id: int = None, payment_id: int = None, note: str = None, product_name: str = None):
+        super().__init__(InventoryMovement.DB_TABLE)
+        self.movement_id = None
+        self.product_id = product_id
+        self.product_name = product_name
+        self.movement_type = movement_type
+        self.quantity = quantity
+        self.stock_after = stock_after
+        self.inventory_batch_id = inventory_batch_id
+        self.payment_id = payment_id
+        self.note = note
+        self.created_at = None
+
+
+    def to_dict(self) -> dict:
+        return {
+            "movement_id": self.movement_id,
+            "product_id": self.product_id,
+            "product_name": self.product_name,
+            "movement_type": self.movement_type,
+            "quantity": self.quantity,
+            "stock_after": self.stock_after,
+            "inventory_batch_id": self.inventory_batch_id,
+            "payment_id": self.payment_id,
+            "note": self.note,
+            "created_at": self.created_at
+        }
+
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> InventoryMovement:
+        movement = cls(
+            product_id=int(row["product_id"]),
+            movement_type=row["movement_type"],
+            quantity=int(row["quantity"]),
+            stock_after=int(row["stock_after"]),
+            inventory_batch_id=row["inventory_batch_id"],
+            payment_id=row["payment_id"],
+            note=row["note"],
+            product_name=row["product_name"]
+        )
+        movement.movement_id = int(row["movement_id"])
+        movement.created_at = DateTimeUtils.utc_to_local(row["created_at"])
+        return movement
+
+
+    @classmethod
+    def _record(cls, product_id: int, movement_type: str, quantity: int, cursor: sqlite3.Cursor, inventory_batch_id: int = None, payment_id: int = None, note: str = None) -> int:
+        """
+        Append a movement and update the materialized stock level, in the transaction of the cursor.
+
+        The name of the product is stored with the movement, so the ledger stays readable
+        once the product is deleted. The stock never goes below 0: the recorded quantity is the change actually applied.
+        The new level is computed by the insert itself, so no read round trip is needed and
+        concurrent writers (serialized by SQLite) always start from the committed level.
+
+        Args:
+            product_id (int): The product.
+            movement_type (str): One of MOVEMENT_TYPES.
+            quantity (int): The signed change of the stock.
+            cursor (sqlite3.Cursor): The cursor of the write transaction.
+            inventory_batch_id (int, optional): The batch received, for receipts.
+            payment_id (int, optional): The payment, for sales.
+            note (str, optional): A free text note.
+
+        Returns:
+            int: The stock level after the movement.
+        """
+        if movement_type not in cls.MOVEMENT_TYPES:
+            raise ValueError(f"Invalid movement type {movement_type}, expected one of {', '.join(cls.MOVEMENT_TYPES)}.")
+
+        sql_insert_movement = f"""
+        INSERT INTO {cls.DB_TABLE} (product_id, product_name, movement_type, quantity, stock_after, inventory_batch_id, payment_id, note)
+        SELECT :product_id, (SELECT name FROM {cls.PRODUCTS_TABLE} WHERE product_id = :product_id), :movement_type,
+            new_stock - old_stock, new_stock, :inventory_batch_id, :payment_id, :note
+        FROM (
+            SELECT old_stock, MAX(old_stock + :quantity, 0) AS new_stock
+            FROM (SELECT COALESCE((SELECT total_stock FROM {cls.INVENTORY_TABLE} WHERE product_id = :product_id), 0) AS old_stock)
+        )
+        RETURNING stock_after;
+        """
+
+        sql_upsert_inventory = f"""
+        INSERT INTO {cls.INVENTORY_TABLE} (product_id, total_stock)
+        VALUES (:product_id, :stock_after)
+        ON CONFLICT(product_id) DO UPDATE SET total_stock = excluded.total_stock;
+        """
+
+        cursor.execute(sql_insert_movement, {
+            "product_id": product_id,
+            "movement_type": movement_type,
+            "quantity": quantity,
+            "inventory_batch_id": inventory_batch_id,
+            "payment_id": payment_id,
+            "note": note
+        })
+        stock_after = cursor.fetchone()[0]
+
+        cursor.execute(sql_upsert_inventory, {"product_id": product_id, "stock_after": stock_after})
+        return stock_after
+
+
+    @classmethod
+    def fetch_stock_at(cls, product_id: int, at: str) -> int:
+        """
+        Get the stock level of a product at a point in time.
+
+        Args:
+            product_id (int): The product.
+            at (str): The local date and time, "YYYY-MM-DD HH:MM:SS".
+
+        Returns:
+            int: The stock level after the last movement made at or before `at`, 0 if there is none.
+        """
+        sql = f"""
+        SELECT stock_after FROM {cls.DB_TABLE}
+        WHERE product_id = :product_id AND created_at <= :at
+        ORDER BY created_at DESC, movement_id DESC
+        LIMIT 1;
+        """
+
+        sql_values = {
+            "product_id": product_id,
+            "at": DateTimeUtils.local_to_utc(at)
+        }
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.execute(sql, sql_values)
+                row = cursor.fetchone()
+            except sqlite3.Error as e:
+                raise DatabaseReadException(f"Failed to read the stock of product {product_id} at {at}: {e}") from e
+
+        return int(row[0]) if row is not None else 0
+
+
+    @classmethod
+    def fetch_movements(cls, product_id: int, start_date: str = None, end_date: str = None) -> list[InventoryMovement]:
+        """
+        Get the movements of a product, oldest first.
+
+        Args:
+            product_id (int): The product.
+            start_date (str, optional): The local date and time of the first movement included.
+            end_date (str, optional): The local date and time of the last movement included.
+
+        Returns:
+            list[InventoryMovement]: The movements.
+        """
+        sql = f"""
+        SELECT * FROM {cls.DB_TABLE}
+        WHERE product_id = :product_id AND created_at BETWEEN :start_date AND :end_date
+        ORDER BY created_at, movement_id;
+        """
+
+        sql_values = {
+            "product_id": product_id,
+            "start_date": DateTimeUtils.local_to_utc(start_date) if start_date else "0000-00-00 00:00:00",
+            "end_date": DateTimeUtils.local_to_utc(end_date) if end_date else "9999-12-31 23:59:59"
+        }
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(sql, sql_values)
+                rows = cursor.fetchall()
+            except sqlite3.Error as e:
+                raise DatabaseReadException(f"Failed to read the inventory movements of product {product_id}: {e}") from e
+
+        return [cls.from_row(row) for row in rows]
@@ -3,6 +3,7 @@ from __future__ import annotations
 from models.exceptions.database_read_exception import DatabaseReadException
 from models.product_model import Product
 from models.payment_product_model import PaymentProduct
+from models.product_item_model import ProductItem
 from .base_model import BaseModel
 from .customer_model import Customer
 from .exceptions.database_insert_exception import DatabaseInsertException
@@ -54,16 +55,31 @@ class Payment(BaseModel):
         return round(sum(payment_product.product_price * payment_product.product_amount for payment_product in self.products), 2)
 
     @classmethod
-    def _build_payment_with_products(cls, row: sqlite3.row) -> Payment:
-        # Create the payment
-        payment = Payment(customer_id=row["customer_id"])
-        payment.date = DateTimeUtils.utc_to_local(row["date"])
-        payment.payment_id = int(row["payment_id"])
-        
-        # Fetch the associated products
-        payment.products = PaymentProduct.fetch_payment_products_by_payment_id(payment.payment_id)
+    def _build_payments_with_products(cls, rows: list[sqlite3.Row], cursor: sqlite3.Cursor) -> list[Payment]:
+        """
+        Create the payments of the given rows, with their products fetched by a single query.
 
-        return payment
+        Args:
+            rows (list[sqlite3.Row]): The Payments rows.
+            cursor (sqlite3.Cursor): The cursor to query the products with, using sqlite3.Row rows.
+
+        Returns:
+            list[Payment]: The payments, in the order of the rows.
+        """
+        payments = []
+        for row in rows:
+            # Create the payment
+            payment = Payment(customer_id=row["customer_id"])
+            payment.date = DateTimeUtils.utc_to_local(row["date"])
+            payment.payment_id = int(row["payment_id"])
+            payments.append(payment)
+
+        # Fetch the products of every payment at once
+        payment_products = PaymentProduct._fetch_payment_products_by_payment_ids(list(dict.fromkeys(payment.payment_id for payment in payments)), cursor)
+        for payment in payments:
+            payment.products = list(payment_products.get(payment.payment_id, []))
+
+        return payments
 
 
     @classmethod
@@ -136,11 +152,8 @@ class Payment(BaseModel):
                 cursor.execute(sql, {"customer_id": customer_id, "product_id": product_id})
                 rows = cursor.fetchall()
 
-                for row in rows:
-                    # Create the payment
-                    payment = Payment._build_payment_with_products(row)
-                    # Append payment to the list
-                    payments.append(payment)
+                # Create the payments and their products in two queries
+                payments = Payment._build_payments_with_products(rows, cursor)
 
             except Exception as e:
                 raise DatabaseReadException(f"An unexpected error occurred while fetching payments: {e}")
@@ -178,7 +191,7 @@ class Payment(BaseModel):
         SELECT * FROM {cls.DB_TABLE}
         WHERE customer_id = :customer_id
         AND date BETWEEN :start_date AND :end_date
-        ORDER BY date DESC;
+        ORDER BY date DESC, payment_id DESC;
         """
 
         payments = []
@@ -189,11 +202,8 @@ class Payment(BaseModel):
                 cursor.execute(sql, {"customer_id": customer_id, "start_date": start_date, "end_date": end_date})
                 rows = cursor.fetchall()
 
-                for row in rows:
-                    # Create the payment
-                    payment = Payment._build_payment_with_products(row)
-                    # Append payment to the list
-                    payments.append(payment)
+                # Create the payments and their products in two queries
+                payments = Payment._build_payments_with_products(rows, cursor)
 
             except Exception as e:
                 raise DatabaseReadException(f"An unexpected error occurred while fetching payments: {e}")
@@ -201,6 +211,60 @@ class Payment(BaseModel):
         return payments
 
 
+    @classmethod
+    def fetch_payments_page(cls, customer_id: int, after_id: int = None, limit: int = 50, start_date: str = None, end_date: str = None) -> tuple[list[Payment], int | None]:
+        """
+        Fetch one page of the payments of a customer, newest first, with their products.
+
+        Args:
+            customer_id (int): The ID of the customer.
+            after_id (int, optional): The payment_id of the last payment of the previous page.
+            limit (int): The maximum number of payments returned.
+            start_date (str, optional): The start date in 'YYYY-MM-DD' format.
+            end_date (str, optional): The end date in 'YYYY-MM-DD' format. Defaults to start_date.
+
+        Returns:
+            tuple[list[Payment], int | None]: The payments, and the after_id of the next page (None on the last page).
+
+        Raises:
+            ValueError: If after_id does not match any payment.
+        """
+        conditions = ["p.customer_id = :customer_id"]
+        sql_values = {"customer_id": customer_id}
+
+        if start_date is not None:
+            if end_date is None:
+                end_date = start_date
+
+            # Normalize dates
+            start_date = f"{start_date} 00:00:00" if len(start_date) == 10 else start_date
+            end_date = f"{end_date} 23:59:59" if len(end_date) == 10 else end_date
+
+            # Convert to UTC for comparison
+            conditions.append("p.date BETWEEN :start_date AND :end_date")
+            sql_values["start_date"] = DateTimeUtils.local_to_utc(start_date)
+            sql_values["end_date"] = DateTimeUtils.local_to_utc(end_date)
+
+        select_sql = f"""
+        SELECT p.* FROM {cls.DB_TABLE} p
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.row_factory = sqlite3.Row
+
+                rows, next_after_id = BaseModel._fetch_keyset_page(
+                    cursor, select_sql, cls.DB_TABLE, "p", "payment_id", "date", True, after_id, limit, conditions, sql_values
+                )
+                payments = Payment._build_payments_with_products(rows, cursor)
+            except ValueError:
+                raise
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occurred while fetching a page of payments: {e}")
+
+        return payments, next_after_id
+
+
     @classmethod
     def get_total_rewards_points_in_date_range(cls, start_date: str, end_date: str = None) -> int:
         """
@@ -257,7 +321,7 @@ class Payment(BaseModel):
         sql = f"""
         SELECT * FROM {cls.DB_TABLE}
         WHERE customer_id = :customer_id
-        ORDER BY date DESC;
+        ORDER BY date DESC, payment_id DESC;
         """
 
         payments = []
@@ -268,31 +332,65 @@ class Payment(BaseModel):
                 cursor.execute(sql, {"customer_id": customer_id})
                 rows = cursor.fetchall()
 
-                for row in rows:
-                    # Create the payment
-                    payment = Payment._build_payment_with_products(row)
-                    # Append payment to the list
-                    payments.append(payment)
+                # Create the payments and their products in two queries
+                payments = Payment._build_payments_with_products(rows, cursor)
 
             except Exception as e:
                 raise DatabaseReadException(f"An unexpected error occurred while fetching payments: {e}")
 
         return payments
 
-    @staticmethod
-    def get_payment_from_list(payments, payment_id):
-        for p in payments:
-            if int(p.payment_id) == int(payment_id):
-                return p
-        return None
+    @classmethod
+    def fetch_payment_by_id(cls, payment_id: int, customer_id: int) -> Payment | None:
+        """
+        Fetches a payment of a customer with its products, in a single query.
+
+        Args:
+            payment_id (int): The ID of the payment.
+            customer_id (int): The ID of the customer the payment must belong to.
+
+        Returns:
+            Payment | None: The payment, or None if it does not exist or belongs to another customer.
+        """
+        # One row per product, the payment columns repeated on each of them
+        sql = f"""
+        SELECT p.payment_id, p.customer_id, p.date,
+            pp.product_id, pp.product_amount, pp.product_name, pp.product_price, pp.product_category, pp.product_points_worth
+        FROM {cls.DB_TABLE} p
+        LEFT JOIN {PaymentProduct.DB_TABLE} pp ON pp.payment_id = p.payment_id
+        WHERE p.payment_id = :payment_id AND p.customer_id = :customer_id;
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(sql, {"payment_id": payment_id, "customer_id": customer_id})
+                rows = cursor.fetchall()
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occurred while fetching payment {payment_id}: {e}")
+
+        if not rows:
+            return None
+
+        payment = Payment(customer_id=rows[0]["customer_id"])
+        payment.date = DateTimeUtils.utc_to_local(rows[0]["date"])
+        payment.payment_id = int(rows[0]["payment_id"])
+        # A payment without products has a single row of NULL product columns
+        payment.products = [PaymentProduct.from_row(row) for row in rows if row["product_id"] is not None]
+        return payment
 
     @classmethod
-    def insert_payment(cls, payment: Payment) -> None:
+    def insert_payment(cls, payment: Payment, epcs: list[str] = None) -> None:
         """
         Inserts a new payment into the database along with associated products.
 
+        The payment row, its products, the inventory decrements, the customer's
+        reward points and the deletion of the scanned EPCs are written in a single
+        transaction: either the whole checkout is recorded or nothing is.
+
         Args:
             payment (Payment): The Payment object to insert.
+            epcs (list[str], optional): EPCs of the product items sold, removed from the stock.
         """
         sql_insert_payment = f"""
         INSERT INTO {cls.DB_TABLE} (customer_id, total_paid, reward_points_won)
@@ -305,33 +403,35 @@ class Payment(BaseModel):
 
         sql_values = payment.to_dict()
 
-        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+        with BaseModel._transaction() as connection, closing(connection.cursor()) as cursor:
             try:
                 cursor.row_factory = sqlite3.Row
                 # Insert payment and capture the generated payment_id
                 cursor.execute(sql_insert_payment, sql_values)
                 payment_id = cursor.lastrowid
-                payment.payment_id = payment_id
 
                 # Fetch the date from the inserted payment
                 cursor.execute(sql_fetch_payment, {"payment_id": payment_id})
                 payment_row = cursor.fetchone()
-                if payment_row:
-                    payment.date = DateTimeUtils.utc_to_local(payment_row["date"])
+
+                # Insert the payment products
+                payment._assign_payment_id_to_products(payment_id)
+                PaymentProduct._insert_payment_products(payment.products, cursor)
+
+                # Delete the product items that were sold, keeping the batches they came from
+                batch_quantities = ProductItem._delete_items_from_epcs(epcs, cursor) if epcs else {}
+
+                # Decrease inventory for each product, from the scanned batches first, then FIFO
+                for payment_product in payment.products:
+                    Product._decrease_inventory(payment_product.product_id, payment_product.product_amount, cursor, payment_id=payment_id, batch_quantities=batch_quantities)
 
                 # Update the customer's reward points
                 Customer._increase_customer_points(payment.customer_id, payment.get_reward_points_won(), cursor)
 
             except Exception as e:
+                payment._assign_payment_id_to_products(None)
                 raise DatabaseInsertException(f"An unexpected error occurred while inserting payment: {e}")
 
-        # Insert the payment products
-        payment._assign_payment_id_to_products(payment.payment_id)
-        for payment_product in payment.products:
-            PaymentProduct.insert_payment_product(payment_product)
-        
-        # Decrease inventory for each product
-        for payment_product in payment.products:
-            Product.decrease_inventory(payment_product.product_id, payment_product.product_amount)
-
-
+        payment.payment_id = payment_id
+        if payment_row:
+            payment.date = DateTimeUtils.utc_to_local(payment_row["date"])
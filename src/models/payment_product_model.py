@@ -7,6 +7,7 @@ from .customer_model import Customer
 from .exceptions.database_insert_exception import DatabaseInsertException
 from .product_model import Product
 from contextlib import closing
+import json
 import sqlite3
 
 class PaymentProduct(BaseModel):
@@ -46,6 +47,20 @@ class PaymentProduct(BaseModel):
         }
     
 
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> PaymentProduct:
+        payment_product = cls(
+            payment_id=int(row["payment_id"]),
+            product_id=int(row["product_id"]),
+            product_amount=int(row["product_amount"])
+        )
+        payment_product.product_name = row["product_name"]
+        payment_product.product_price = float(row["product_price"])
+        payment_product.product_category = row["product_category"]
+        payment_product.product_points_worth = int(row["product_points_worth"])
+        return payment_product
+
+
     @classmethod
     def fetch_payment_products_by_payment_id(cls, payment_id: int) -> list[PaymentProduct]:
         sql = f"""
@@ -68,46 +83,71 @@ class PaymentProduct(BaseModel):
                 raise DatabaseReadException(f"Failed to fetch PaymentProduct records: {e}") from e
 
         for row in rows:
-            payment_product = PaymentProduct(
-                payment_id=int(row["payment_id"]),
-                product_id=int(row["product_id"]),
-                product_amount=int(row["product_amount"])
-            )
-            payment_product.product_name = row["product_name"]
-            payment_product.product_price = float(row["product_price"])
-            payment_product.product_category = row["product_category"]
-            payment_product.product_points_worth = int(row["product_points_worth"])
-            payment_products.append(payment_product)
+            payment_products.append(cls.from_row(row))
         
         return payment_products
 
+
+    @classmethod
+    def _fetch_payment_products_by_payment_ids(cls, payment_ids: list[int], cursor: sqlite3.Cursor) -> dict[int, list[PaymentProduct]]:
+        """
+        Fetch the products of several payments with a single query.
+
+        The IDs are passed as one JSON array, so their number is not bound by SQLite's variable limit.
+
+        Args:
+            payment_ids (list[int]): The IDs of the payments.
+            cursor (sqlite3.Cursor): The cursor to query with.
+
+        Returns:
+            dict[int, list[PaymentProduct]]: The products by payment ID, payments without products are left out.
+        """
+        if not payment_ids:
+            return {}
+
+        sql = f"""
+        SELECT * FROM {cls.DB_TABLE}
+        WHERE payment_id IN (SELECT value FROM json_each(:payment_ids));
+        """
+
+        cursor.execute(sql, {"payment_ids": json.dumps(list(payment_ids))})
+
+        payment_products: dict[int, list[PaymentProduct]] = {}
+        for row in cursor.fetchall():
+            payment_product = cls.from_row(row)
+            payment_products.setdefault(payment_product.payment_id, []).append(payment_product)
+        return payment_products
+
     
     @classmethod
     def insert_payment_product(cls, payment_product: PaymentProduct) -> None:
-        # Fill out the payment if product details are missing
-        if payment_product.product_name is None:
-            # Get the product details
-            product = Product.fetch_product_by_id(payment_product.product_id)
-            if product is None:
-                raise ValueError(f"Product with ID {payment_product.product_id} does not exist.")
-            
-            # Create a snapshot of values
-            payment_product.product_name = product.name
-            payment_product.product_price = product.price
-            payment_product.product_category = product.category
-            payment_product.product_points_worth = product.points_worth
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cls._insert_payment_products([payment_product], cursor)
+            except sqlite3.DatabaseError as e:
+                raise DatabaseInsertException(f"Failed to insert PaymentProduct record: {e}") from e
+
 
+    @classmethod
+    def _insert_payment_products(cls, payment_products: list[PaymentProduct], cursor: sqlite3.Cursor) -> None:
+        # Fill out the payment products if product details are missing
+        for payment_product in payment_products:
+            if payment_product.product_name is None:
+                # Get the product details
+                product = Product.fetch_product_by_id(payment_product.product_id)
+                if product is None:
+                    raise ValueError(f"Product with ID {payment_product.product_id} does not exist.")
+                
+                # Create a snapshot of values
+                payment_product.product_name = product.name
+                payment_product.product_price = product.price
+                payment_product.product_category = product.category
+                payment_product.product_points_worth = product.points_worth
 
         insert_sql = f"""
         INSERT INTO {cls.DB_TABLE} (payment_id, product_id, product_amount, product_name, product_price, product_category, product_points_worth)
         VALUES (:payment_id, :product_id, :product_amount, :product_name, :product_price, :product_category, :product_points_worth);
         """
 
-        sql_params = payment_product.to_dict()
-
-        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
-            try:
-                cursor.execute(insert_sql, sql_params)
-                connection.commit()
-            except sqlite3.DatabaseError as e:
-                raise DatabaseInsertException(f"Failed to insert PaymentProduct record: {e}") from e
\ No newline at end of file
+        # Insert all line items with one statement
+        cursor.executemany(insert_sql, [payment_product.to_dict() for payment_product in payment_products])
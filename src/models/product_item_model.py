@@ -6,16 +6,46 @@ from .base_model import BaseModel
 from .exceptions.database_insert_exception import DatabaseInsertException
 from .exceptions.database_read_exception import DatabaseReadException
 from .exceptions.database_delete_exception import DatabaseDeleteException
+from .inventory_movement_model import InventoryMovement
+from .utils.epc_codec import EpcCodec
+from .utils.epc_index import EpcIndex
 from contextlib import closing
+from typing import Iterable, Iterator
 import sqlite3
+import os
 
 class ProductItem(BaseModel):
 
+    # Items are stored by prefix code and integer serial (see EpcCodec), one per row in
+    # DB_TABLE, or as serial ranges in RANGES_TABLE for runs of sequential EPCs of a batch
     DB_TABLE = "ProductItem"
+    RANGES_TABLE = "ProductItemRanges"
+    PREFIXES_TABLE = "EpcPrefixes"
+
+    # Shortest run of sequential EPCs stored as a range (see migration 0006)
+    RANGE_MIN_LENGTH = 8
+
+    # EPCs looked up per query, 4 variables each
+    LOOKUP_CHUNK_SIZE = 500
+
+    # Runs of EPCs checked for collisions per temp table join
+    COLLISION_CHECK_CHUNK_SIZE = 10000
+
+    # Length of the EPCs generated from a prefix and a number range
+    EPC_LENGTH = 24
+
+    # Most items received in one inventory batch (the largest batch size benchmarked)
+    MAX_BATCH_ITEMS = int(os.getenv("EPC_MAX_BATCH_ITEMS", "1000000"))
+
+    # Bloom filter of the known EPCs, plus the exact ranges, answering scans of unknown tags without a query
+    _epc_index = EpcIndex(
+        lambda: ProductItem._count_epcs(),
+        lambda: ProductItem._iter_epcs(),
+        load_ranges=lambda: ProductItem._iter_epc_ranges()
+    )
 
     def __init__(self, epc: str, inventory_batch_id: int):
         super().__init__(ProductItem.DB_TABLE)
-        self.product_item_id = None
         self.epc = epc
         self.inventory_batch_id = inventory_batch_id
 
@@ -37,20 +67,39 @@ class ProductItem(BaseModel):
     
     @classmethod
     def from_row(cls, row: sqlite3.Row) -> ProductItem:
-        product_item = cls(
-            epc=row["epc"],
+        return cls(
+            epc=EpcCodec.join(row["prefix"], row["width"], row["serial"]),
             inventory_batch_id=int(row["inventory_batch_id"])
         )
-        product_item.product_item_id = int(row["product_item_id"])
-        return product_item
     
 
     @classmethod
-    def fetch_by_product_id(cls, product_id: int) -> list[ProductItem]:
-        sql = f"""
-        SELECT pi.* FROM {cls.DB_TABLE} pi
+    def fetch_epcs_by_product_id(cls, product_id: int) -> tuple[list[str], list[dict]]:
+        """
+        Get the EPCs of the items of a product, without expanding the serial ranges.
+
+        Args:
+            product_id (int): The product.
+
+        Returns:
+            tuple[list[str], list[dict]]: The EPCs stored one per row, and the ranges as
+            {"prefix", "width", "start", "end", "first_epc", "last_epc", "count"} records
+            (prefix, width and serials as stored, see EpcCodec).
+        """
+        sql_items = f"""
+        SELECT ep.prefix, ep.width, pi.serial FROM {cls.DB_TABLE} pi
         JOIN InventoryBatches ib ON pi.inventory_batch_id = ib.inventory_batch_id
-        WHERE ib.product_id = :product_id;
+        JOIN {cls.PREFIXES_TABLE} ep ON ep.prefix_id = pi.prefix_id
+        WHERE ib.product_id = :product_id
+        ORDER BY ep.prefix, pi.serial;
+        """
+
+        sql_ranges = f"""
+        SELECT ep.prefix, ep.width, r.first_serial, r.last_serial FROM {cls.RANGES_TABLE} r
+        JOIN InventoryBatches ib ON r.inventory_batch_id = ib.inventory_batch_id
+        JOIN {cls.PREFIXES_TABLE} ep ON ep.prefix_id = r.prefix_id
+        WHERE ib.product_id = :product_id
+        ORDER BY ep.prefix, r.first_serial;
         """
 
         sql_params = {
@@ -60,83 +109,458 @@ class ProductItem(BaseModel):
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
             try:
                 cursor.row_factory = sqlite3.Row
-                cursor.execute(sql, sql_params)
+                cursor.execute(sql_items, sql_params)
                 rows = cursor.fetchall()
+                cursor.execute(sql_ranges, sql_params)
+                range_rows = cursor.fetchall()
             except sqlite3.Error as e:
                 raise DatabaseReadException(f"Failed to read ProductItems for product_id {product_id} from database: {e}") from e
-            
-        product_items = [cls.from_row(row) for row in rows]
-        return product_items
+
+        epcs = [EpcCodec.join(row["prefix"], row["width"], row["serial"]) for row in rows]
+        epc_ranges = [
+            {
+                "prefix": row["prefix"],
+                "width": row["width"],
+                "start": row["first_serial"],
+                "end": row["last_serial"],
+                "first_epc": EpcCodec.join(row["prefix"], row["width"], row["first_serial"]),
+                "last_epc": EpcCodec.join(row["prefix"], row["width"], row["last_serial"]),
+                "count": row["last_serial"] - row["first_serial"] + 1
+            }
+            for row in range_rows
+        ]
+        return epcs, epc_ranges
 
 
     @classmethod
     def fetch_by_epc(cls, epc: str) -> ProductItem | None:
-        sql = f"""
-        SELECT * FROM {cls.DB_TABLE}
-        WHERE epc = :epc;
-        """
-
-        sql_params = {
-            "epc": epc
-        }
-
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
             try:
-                cursor.row_factory = sqlite3.Row
-                cursor.execute(sql, sql_params)
-                row = cursor.fetchone()
+                located = cls._locate_epcs([epc], cursor)
             except sqlite3.Error as e:
                 raise DatabaseReadException(f"Failed to read ProductItem with epc {epc} from database: {e}") from e
             
         # Return None if no record found
-        if row is None:
+        if epc not in located:
             return None
 
-        # Build product item from row and return
-        return cls.from_row(row)
+        inventory_batch_id, _ = located[epc]
+        return cls(epc, inventory_batch_id)
+
+
+    @classmethod
+    def _locate_epcs(cls, epcs: list[str], cursor: sqlite3.Cursor) -> dict[str, tuple[int, int]]:
+        """
+        Find the inventory batch and product of EPCs, whether stored one per row or in a range.
+
+        Args:
+            epcs (list[str]): The EPCs, without duplicates.
+            cursor (sqlite3.Cursor): The cursor to query with.
+
+        Returns:
+            dict[str, tuple[int, int]]: The (inventory_batch_id, product_id) of every known EPC, by EPC.
+        """
+        located = {}
+        for start in range(0, len(epcs), cls.LOOKUP_CHUNK_SIZE):
+            chunk = epcs[start:start + cls.LOOKUP_CHUNK_SIZE]
+            values = ", ".join("(?, ?, ?, ?)" for _ in chunk)
+            sql_values = [value for epc in chunk for value in (epc, *EpcCodec.split(epc))]
+
+            # The range of a serial is the last range of its prefix starting at or before it
+            cursor.execute(f"""
+            WITH scanned (epc, prefix, width, serial) AS (VALUES {values}),
+            encoded AS (
+                SELECT s.epc, ep.prefix_id, s.serial FROM scanned s
+                JOIN {cls.PREFIXES_TABLE} ep ON ep.prefix = s.prefix AND ep.width = s.width
+            ),
+            matches AS (
+                SELECT e.epc, pi.inventory_batch_id FROM encoded e
+                JOIN {cls.DB_TABLE} pi ON pi.prefix_id = e.prefix_id AND pi.serial = e.serial
+                UNION ALL
+                SELECT e.epc, r.inventory_batch_id FROM encoded e
+                JOIN {cls.RANGES_TABLE} r ON r.range_id = (
+                    SELECT range_id FROM {cls.RANGES_TABLE}
+                    WHERE prefix_id = e.prefix_id AND first_serial <= e.serial
+                    ORDER BY first_serial DESC LIMIT 1
+                )
+                WHERE r.last_serial >= e.serial
+            )
+            SELECT m.epc, m.inventory_batch_id, ib.product_id FROM matches m
+            JOIN InventoryBatches ib ON ib.inventory_batch_id = m.inventory_batch_id;
+            """, sql_values)
+            located.update((epc, (inventory_batch_id, product_id)) for epc, inventory_batch_id, product_id in cursor.fetchall())
+        return located
     
 
     @classmethod
-    def insert_bulk_items(cls, epcs: list[str], inventory_batch_id: int) -> None:
-        sql = f"""
-        INSERT INTO {cls.DB_TABLE} (epc, inventory_batch_id)
-        VALUES (:epc, :inventory_batch_id);
+    def resolve_product(cls, epc: str) -> Product | None:
         """
+        Resolve a scanned EPC to its product (with available stock) with a single index lookup.
+
+        Unknown EPCs are usually ruled out by the in-memory EPC index without querying the database.
 
-        data = [{"epc": epc, "inventory_batch_id": inventory_batch_id} for epc in epcs]
+        Args:
+            epc (str): The scanned EPC.
+
+        Returns:
+            Product | None: The product of the EPC, or None if the EPC is unknown.
+        """
+        if not cls._epc_index.might_contain(epc):
+            return None
 
+        # Index seeks only: the product itself usually comes from the product cache
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
             try:
-                cursor.executemany(sql, data)
-                connection.commit()
+                located = cls._locate_epcs([epc], cursor)
             except sqlite3.Error as e:
-                raise DatabaseInsertException(f"Failed to insert bulk ProductItems into database: {e}") from e
+                raise DatabaseReadException(f"Failed to resolve the product of epc {epc}: {e}") from e
+
+            if epc not in located:
+                if cls._epc_index.loaded:
+                    cls._epc_index.record_false_positive()
+                return None
+
+            _, product_id = located[epc]
+            return Product.fetch_product_by_id(product_id)
 
 
     @classmethod
-    def exists_product_item_with_epc_bulk(cls, epc_list: list[str]) -> str | None:
-        if not epc_list:
-            return None
+    def resolve_products(cls, epcs: list[str]) -> dict[str, Product]:
+        """
+        Resolve many scanned EPCs to their products at once.
 
-        placeholders = ', '.join('?' for _ in epc_list)
-        sql = f"""
-        SELECT epc FROM {cls.DB_TABLE}
-        WHERE epc IN ({placeholders})
-        LIMIT 1;
+        Unknown EPCs are mostly ruled out by the in-memory EPC index, the others are
+        resolved with a single query (per 500 EPCs) and the products are read from the
+        product cache or with a single query.
+
+        Args:
+            epcs (list[str]): The scanned EPCs, duplicates allowed.
+
+        Returns:
+            dict[str, Product]: The product of every known EPC, by EPC. Unknown EPCs are left out.
         """
+        candidates = [epc for epc in dict.fromkeys(epcs) if cls._epc_index.might_contain(epc)]
+        if not candidates:
+            return {}
 
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
             try:
-                cursor.row_factory = sqlite3.Row
-                cursor.execute(sql, epc_list)
+                product_ids = {epc: product_id for epc, (_, product_id) in cls._locate_epcs(candidates, cursor).items()}
+            except sqlite3.Error as e:
+                raise DatabaseReadException(f"Failed to resolve the products of {len(candidates)} epcs: {e}") from e
+
+            if cls._epc_index.loaded and len(product_ids) < len(candidates):
+                cls._epc_index.record_false_positive(len(candidates) - len(product_ids))
+
+            products = Product.fetch_products_by_ids(list(product_ids.values()))
+
+        return {epc: products[product_id] for epc, product_id in product_ids.items() if product_id in products}
+
+
+    @classmethod
+    def _count_epcs(cls) -> int:
+        # EPCs stored one per row; ranges are kept exactly by the EPC index instead of being hashed
+        with BaseModel._connectToDB() as connection:
+            return connection.execute(f"SELECT COUNT(*) FROM {cls.DB_TABLE};").fetchone()[0]
+
+
+    @classmethod
+    def _iter_epcs(cls) -> Iterator[str]:
+        sql = f"""
+        SELECT pi.prefix_id, pi.serial, ep.prefix, ep.width FROM {cls.DB_TABLE} pi
+        JOIN {cls.PREFIXES_TABLE} ep ON ep.prefix_id = pi.prefix_id
+        """
+        for row in BaseModel._iter_query(sql, ["prefix_id", "serial"], batch_size=10000):
+            yield EpcCodec.join(row["prefix"], row["width"], row["serial"])
+
+
+    @classmethod
+    def _iter_epc_ranges(cls) -> Iterator[tuple[str, int, int, int]]:
+        sql = f"""
+        SELECT r.range_id, ep.prefix, ep.width, r.first_serial, r.last_serial FROM {cls.RANGES_TABLE} r
+        JOIN {cls.PREFIXES_TABLE} ep ON ep.prefix_id = r.prefix_id
+        """
+        for row in BaseModel._iter_query(sql, ["range_id"], batch_size=10000):
+            yield row["prefix"], row["width"], row["first_serial"], row["last_serial"]
+
+
+    @classmethod
+    def load_epc_index(cls, background: bool = True) -> None:
+        """
+        Build the in-memory EPC index from the database.
+
+        Args:
+            background (bool): True to build it in a background thread.
+        """
+        if background:
+            cls._epc_index.load_in_background()
+        else:
+            cls._epc_index.load()
+
+
+    @classmethod
+    def get_epc_index_stats(cls) -> dict:
+        """Return the size and hit counters of the in-memory EPC index."""
+        return cls._epc_index.stats()
+
+
+    @classmethod
+    def _fetch_prefix_ids(cls, prefixes: Iterable[tuple[str, int]], cursor: sqlite3.Cursor, create: bool = False) -> dict[tuple[str, int], int]:
+        """
+        Get the codes of EPC prefixes.
+
+        Args:
+            prefixes (Iterable[tuple[str, int]]): The (prefix, width) pairs.
+            cursor (sqlite3.Cursor): The cursor to query with.
+            create (bool): True to create the missing prefixes.
+
+        Returns:
+            dict[tuple[str, int], int]: The code of every existing prefix, by (prefix, width).
+        """
+        prefixes = list(prefixes)
+        if create:
+            cursor.executemany(f"INSERT OR IGNORE INTO {cls.PREFIXES_TABLE} (prefix, width) VALUES (?, ?);", prefixes)
+
+        prefix_ids = {}
+        for prefix, width in prefixes:
+            cursor.execute(f"SELECT prefix_id FROM {cls.PREFIXES_TABLE} WHERE prefix = ? AND width = ?;", (prefix, width))
+            row = cursor.fetchone()
+            if row is not None:
+                prefix_ids[(prefix, width)] = row[0]
+        return prefix_ids
+
+
+    @staticmethod
+    def _group_runs(serials: list[tuple[int, int]]) -> list[tuple[int, int, int]]:
+        """
+        Group encoded EPCs into runs of sequential serials.
+
+        Args:
+            serials (list[tuple[int, int]]): The (prefix_id, serial) of the EPCs.
+
+        Returns:
+            list[tuple[int, int, int]]: The (prefix_id, first_serial, last_serial) of every run.
+                A repeated EPC starts a new run, overlapping the previous one.
+        """
+        runs = []
+        for prefix_id, serial in sorted(serials):
+            if runs and runs[-1][0] == prefix_id and runs[-1][2] == serial - 1 and serial != EpcCodec.VERBATIM_SERIAL:
+                runs[-1][2] = serial
+            else:
+                runs.append([prefix_id, serial, serial])
+        return [tuple(run) for run in runs]
+
+
+    @classmethod
+    def _split_epc_range(cls, prefix: str, start: int, end: int) -> tuple[str, int, int, int]:
+        """
+        Encode the EPCs generate_bulk_epcs would build for a number range, without building them.
+
+        Args:
+            prefix (str): The prefix of the EPCs.
+            start (int): The first number, included.
+            end (int): The last number, included.
+
+        Returns:
+            tuple[str, int, int, int]: The (prefix, width, first_serial, last_serial) of the range, see EpcCodec.
+
+        Raises:
+            ValueError: If the range is invalid or its serials are not sequential.
+        """
+        cls._validate_epc_range(start, end, prefix)
+        width = cls.EPC_LENGTH - len(prefix)
+        first_prefix, first_width, first_serial = EpcCodec.split(f"{prefix}{start:0{width}d}")
+        last_prefix, last_width, last_serial = EpcCodec.split(f"{prefix}{end:0{width}d}")
+
+        # Only numbers wider than the serial digits do not map to sequential serials
+        if (first_prefix, first_width) != (last_prefix, last_width) or last_serial - first_serial != end - start:
+            raise ValueError(f"The EPC range {prefix}{start}-{end} is too large, numbers must stay below 10^{EpcCodec.MAX_SERIAL_DIGITS}.")
+        return first_prefix, first_width, first_serial, last_serial
+
+
+    @classmethod
+    def _encode_runs(cls, epcs: list[str], epc_ranges: list[tuple[str, int, int, int]], cursor: sqlite3.Cursor, create_prefixes: bool = False) -> tuple[list[tuple[int, int, int]], dict[int, tuple[str, int]]]:
+        """
+        Encode EPCs and encoded EPC ranges into runs of sequential serials.
+
+        Args:
+            epcs (list[str]): The EPCs.
+            epc_ranges (list[tuple[str, int, int, int]]): The (prefix, width, first_serial, last_serial) ranges.
+            cursor (sqlite3.Cursor): The cursor to query with.
+            create_prefixes (bool): True to create the missing prefixes. Otherwise EPCs of unknown prefixes,
+                which cannot exist, are left out.
+
+        Returns:
+            tuple: The (prefix_id, first_serial, last_serial) runs sorted by prefix and serial,
+                and the (prefix, width) of the prefixes by prefix_id.
+        """
+        encoded = [EpcCodec.split(epc) for epc in epcs]
+        keys = dict.fromkeys([(prefix, width) for prefix, width, _ in encoded] + [(prefix, width) for prefix, width, _, _ in epc_ranges])
+        prefix_ids = cls._fetch_prefix_ids(keys, cursor, create_prefixes)
+
+        runs = cls._group_runs([(prefix_ids[(prefix, width)], serial) for prefix, width, serial in encoded if (prefix, width) in prefix_ids])
+        runs.extend(
+            (prefix_ids[(prefix, width)], first_serial, last_serial)
+            for prefix, width, first_serial, last_serial in epc_ranges if (prefix, width) in prefix_ids
+        )
+        runs.sort()
+        return runs, {prefix_id: key for key, prefix_id in prefix_ids.items()}
+
+
+    @classmethod
+    def _find_existing_epc(cls, runs: list[tuple[int, int, int]], prefixes: dict[int, tuple[str, int]], cursor: sqlite3.Cursor) -> str | None:
+        """
+        Find an existing EPC among runs of sequential serials.
+
+        The runs are checked a chunk at a time through a temp table joined with a few
+        index seeks per run. Ranges never overlap, so only the range containing the first
+        serial of a run and the ranges starting inside the run can collide with it.
+
+        Args:
+            runs (list[tuple[int, int, int]]): The (prefix_id, first_serial, last_serial) runs, sorted.
+            prefixes (dict[int, tuple[str, int]]): The (prefix, width) of the prefixes by prefix_id.
+            cursor (sqlite3.Cursor): The cursor to query with.
+
+        Returns:
+            str | None: The first existing EPC found, or None.
+        """
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS epc_runs (prefix_id INTEGER, first_serial INTEGER, last_serial INTEGER);")
+
+        sql = f"""
+        SELECT * FROM (
+            SELECT
+                r.prefix_id,
+                r.first_serial,
+                (SELECT MIN(serial) FROM {cls.DB_TABLE}
+                 WHERE prefix_id = r.prefix_id AND serial BETWEEN r.first_serial AND r.last_serial) AS item_serial,
+                (SELECT last_serial FROM {cls.RANGES_TABLE}
+                 WHERE prefix_id = r.prefix_id AND first_serial <= r.first_serial
+                 ORDER BY first_serial DESC LIMIT 1) AS previous_range_last,
+                (SELECT MIN(first_serial) FROM {cls.RANGES_TABLE}
+                 WHERE prefix_id = r.prefix_id AND first_serial BETWEEN r.first_serial AND r.last_serial) AS range_serial
+            FROM temp.epc_runs r
+        )
+        WHERE item_serial IS NOT NULL OR previous_range_last >= first_serial OR range_serial IS NOT NULL
+        ORDER BY prefix_id, first_serial LIMIT 1;
+        """
+
+        try:
+            for start in range(0, len(runs), cls.COLLISION_CHECK_CHUNK_SIZE):
+                cursor.execute("DELETE FROM temp.epc_runs;")
+                cursor.executemany("INSERT INTO temp.epc_runs VALUES (?, ?, ?);", runs[start:start + cls.COLLISION_CHECK_CHUNK_SIZE])
+                cursor.execute(sql)
                 row = cursor.fetchone()
+                if row is not None:
+                    prefix_id, first_serial, item_serial, previous_range_last, range_serial = row
+                    serials = [item_serial, range_serial, first_serial if previous_range_last is not None and previous_range_last >= first_serial else None]
+                    return EpcCodec.join(*prefixes[prefix_id], min(serial for serial in serials if serial is not None))
+        finally:
+            cursor.execute("DELETE FROM temp.epc_runs;")
+        return None
+
+
+    @classmethod
+    def insert_bulk_items(cls, epcs: list[str], inventory_batch_id: int, epc_ranges: list[tuple[str, int, int]] = None) -> None:
+        """
+        Insert the items of an inventory batch.
+
+        Runs of at least RANGE_MIN_LENGTH sequential EPCs are stored as a single range,
+        and number ranges are stored without generating their EPCs.
+
+        Args:
+            epcs (list[str]): The EPCs of the items.
+            inventory_batch_id (int): The inventory batch of the items.
+            epc_ranges (list[tuple[str, int, int]], optional): More items, as (prefix, start, end) number
+                ranges of the EPCs generate_bulk_epcs would build.
+
+        Raises:
+            ValueError: If a range is invalid, or an EPC is repeated or already exists.
+            DatabaseInsertException: If the insert fails.
+        """
+        sql_items = f"""
+        INSERT INTO {cls.DB_TABLE} (prefix_id, serial, inventory_batch_id)
+        VALUES (?, ?, ?);
+        """
+
+        sql_ranges = f"""
+        INSERT INTO {cls.RANGES_TABLE} (prefix_id, first_serial, last_serial, inventory_batch_id)
+        VALUES (?, ?, ?, ?);
+        """
+
+        encoded_ranges = [cls._split_epc_range(prefix, start, end) for prefix, start, end in epc_ranges or ()]
+
+        with BaseModel._transaction() as connection, closing(connection.cursor()) as cursor:
+            try:
+                runs, prefixes = cls._encode_runs(epcs, encoded_ranges, cursor, create_prefixes=True)
+
+                # Sorted runs overlap their predecessor when an EPC is given twice
+                for previous, run in zip(runs, runs[1:]):
+                    if run[0] == previous[0] and run[1] <= previous[2]:
+                        raise ValueError(f"Duplicate EPC in the batch: {EpcCodec.join(*prefixes[run[0]], run[1])}")
+
+                # Ranges are not covered by the primary key, so collisions are checked in the same transaction
+                existing_epc = cls._find_existing_epc(runs, prefixes, cursor)
+                if existing_epc is not None:
+                    raise ValueError(f"EPC {existing_epc} already exists.")
+
+                ranges = [(prefix_id, first, last, inventory_batch_id) for prefix_id, first, last in runs if last - first + 1 >= cls.RANGE_MIN_LENGTH]
+                items = [
+                    (prefix_id, serial, inventory_batch_id)
+                    for prefix_id, first, last in runs if last - first + 1 < cls.RANGE_MIN_LENGTH
+                    for serial in range(first, last + 1)
+                ]
+
+                # Known to the EPC index before they can be scanned
+                generation = cls._epc_index.add(epcs, encoded_ranges)
+                cursor.executemany(sql_ranges, ranges)
+                cursor.executemany(sql_items, items)
+                BaseModel._after_commit(lambda: cls._epc_index.add_if_reloaded(epcs, generation, encoded_ranges))
             except sqlite3.Error as e:
-                raise DatabaseReadException(f"Failed to read ProductItems from database: {e}") from e
+                raise DatabaseInsertException(f"Failed to insert bulk ProductItems into database: {e}") from e
+
+
+    @classmethod
+    def receive_inventory_batch(cls, product_id: int, epcs: list[str], epc_ranges: list[tuple[str, int, int]] = None, received_date: str = None) -> int:
+        """
+        Add an inventory batch and its items in a single transaction.
+
+        Args:
+            product_id (int): The product of the batch.
+            epcs (list[str]): The EPCs of the items.
+            epc_ranges (list[tuple[str, int, int]], optional): More items, as (prefix, start, end) number ranges.
+            received_date (str, optional): The local date and time the batch was received.
+
+        Returns:
+            int: The ID of the inventory batch.
 
-        if row is None:
+        Raises:
+            ValueError: If the product does not exist, no item is given, the batch holds more than MAX_BATCH_ITEMS items, a range is invalid, or an EPC is repeated or already exists.
+            DatabaseInsertException: If the insert fails.
+        """
+        epc_ranges = epc_ranges or []
+        quantity = len(epcs) + sum(cls.epc_range_count(start, end) for _, start, end in epc_ranges)
+        if quantity > cls.MAX_BATCH_ITEMS:
+            raise ValueError(f"An inventory batch can hold at most {cls.MAX_BATCH_ITEMS} items, got {quantity}.")
+
+        with BaseModel._transaction():
+            inventory_batch_id = Product.add_inventory_batch(product_id, quantity, received_date)
+            cls.insert_bulk_items(epcs, inventory_batch_id, epc_ranges)
+        return inventory_batch_id
+
+
+    @classmethod
+    def exists_product_item_with_epc_bulk(cls, epc_list: list[str], epc_ranges: list[tuple[str, int, int]] = None) -> str | None:
+        if not epc_list and not epc_ranges:
             return None
-        
-        return row["epc"]
+
+        encoded_ranges = [cls._split_epc_range(prefix, start, end) for prefix, start, end in epc_ranges or ()]
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                runs, prefixes = cls._encode_runs(list(dict.fromkeys(epc_list)), encoded_ranges, cursor)
+                return cls._find_existing_epc(runs, prefixes, cursor)
+            except sqlite3.Error as e:
+                raise DatabaseReadException(f"Failed to read ProductItems from database: {e}") from e
 
 
     @classmethod
@@ -144,42 +568,141 @@ class ProductItem(BaseModel):
         if not epc_list:
             return
 
-        placeholders = ', '.join('?' for _ in epc_list)
-        sql = f"""
-        DELETE FROM {cls.DB_TABLE}
-        WHERE epc IN ({placeholders});
-        """
-
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
             try:
-                cursor.execute(sql, epc_list)
-                connection.commit()
+                cls._delete_items_from_epcs(epc_list, cursor)
             except sqlite3.Error as e:
                 raise DatabaseDeleteException(f"Failed to delete ProductItems from database: {e}") from e
 
 
-    @staticmethod
-    def generate_bulk_epcs(start: int, end: int, prefix: str = "A") -> list[str]:
-        epc_length = 24
+    @classmethod
+    def remove_items_from_stock(cls, epc_list: list[str], note: str = None) -> int:
+        """
+        Delete items and take them out of the stock of their products, in a single transaction.
+
+        Every item is depleted from the batch it was received in and recorded as an adjustment.
+
+        Args:
+            epc_list (list[str]): The EPCs of the items, unknown EPCs are ignored.
+            note (str, optional): The note of the adjustments.
 
+        Returns:
+            int: The number of items removed.
+
+        Raises:
+            DatabaseDeleteException: If the delete fails.
+        """
+        if not epc_list:
+            return 0
+
+        with BaseModel._transaction() as connection, closing(connection.cursor()) as cursor:
+            try:
+                batch_counts = cls._delete_items_from_epcs(epc_list, cursor)
+                if not batch_counts:
+                    return 0
+
+                cursor.execute(
+                    f"""
+                    SELECT inventory_batch_id, product_id FROM {Product.INVENTORY_BATCH_TABLE}
+                    WHERE inventory_batch_id IN ({', '.join('?' * len(batch_counts))});
+                    """,
+                    list(batch_counts)
+                )
+                batch_products = dict(cursor.fetchall())
+
+                for product_id in dict.fromkeys(batch_products.values()):
+                    product_batches = {batch_id: count for batch_id, count in batch_counts.items() if batch_products.get(batch_id) == product_id}
+                    Product._decrease_inventory(product_id, sum(product_batches.values()), cursor, InventoryMovement.ADJUSTMENT, note=note, batch_quantities=product_batches)
+            except sqlite3.Error as e:
+                raise DatabaseDeleteException(f"Failed to remove ProductItems from stock: {e}") from e
+
+        return sum(batch_counts.values())
+
+
+    @classmethod
+    def _delete_items_from_epcs(cls, epc_list: list[str], cursor: sqlite3.Cursor) -> dict[int, int]:
+        """
+        Delete the items with the given EPCs, ignoring unknown EPCs.
+
+        Returns:
+            dict[int, int]: The number of items deleted by inventory batch ID.
+        """
+        sql_delete_item = f"""
+        DELETE FROM {cls.DB_TABLE}
+        WHERE prefix_id = ? AND serial = ?
+        RETURNING inventory_batch_id;
+        """
+
+        sql_fetch_range = f"""
+        SELECT range_id, first_serial, last_serial, inventory_batch_id FROM {cls.RANGES_TABLE}
+        WHERE prefix_id = ? AND first_serial <= ?
+        ORDER BY first_serial DESC LIMIT 1;
+        """
+
+        encoded = [EpcCodec.split(epc) for epc in dict.fromkeys(epc_list)]
+        prefix_ids = cls._fetch_prefix_ids(dict.fromkeys((prefix, width) for prefix, width, _ in encoded), cursor)
+
+        # A few indexed statements per EPC, so the list size is not bound by SQLite's variable limit
+        batch_counts = {}
+        for prefix, width, serial in encoded:
+            prefix_id = prefix_ids.get((prefix, width))
+            if prefix_id is None:
+                continue
+
+            cursor.execute(sql_delete_item, (prefix_id, serial))
+            row = cursor.fetchone()
+            if row is not None:
+                batch_counts[row[0]] = batch_counts.get(row[0], 0) + 1
+                continue
+
+            cursor.execute(sql_fetch_range, (prefix_id, serial))
+            row = cursor.fetchone()
+            if row is None or row[2] < serial:
+                continue
+
+            # Cut the serial out of its range, splitting the range in two when it falls inside
+            range_id, first_serial, last_serial, inventory_batch_id = row
+            if first_serial == last_serial:
+                cursor.execute(f"DELETE FROM {cls.RANGES_TABLE} WHERE range_id = ?;", (range_id,))
+            elif serial == first_serial:
+                cursor.execute(f"UPDATE {cls.RANGES_TABLE} SET first_serial = ? WHERE range_id = ?;", (serial + 1, range_id))
+            elif serial == last_serial:
+                cursor.execute(f"UPDATE {cls.RANGES_TABLE} SET last_serial = ? WHERE range_id = ?;", (serial - 1, range_id))
+            else:
+                cursor.execute(f"UPDATE {cls.RANGES_TABLE} SET last_serial = ? WHERE range_id = ?;", (serial - 1, range_id))
+                cursor.execute(
+                    f"INSERT INTO {cls.RANGES_TABLE} (prefix_id, first_serial, last_serial, inventory_batch_id) VALUES (?, ?, ?, ?);",
+                    (prefix_id, serial + 1, last_serial, inventory_batch_id)
+                )
+            batch_counts[inventory_batch_id] = batch_counts.get(inventory_batch_id, 0) + 1
+
+        cls._epc_index.remove(sum(batch_counts.values()))
+        return batch_counts
+
+
+    @classmethod
+    def _validate_epc_range(cls, start: int, end: int, prefix: str) -> None:
         # Validate range
+        if start < 0:
+            raise ValueError("Start value must be a non-negative integer.")
+
         if start > end:
             raise ValueError("Start value must be less than or equal to end value.")
+
+        if end - start + 1 > cls.MAX_BATCH_ITEMS:
+            raise ValueError(f"An EPC range can hold at most {cls.MAX_BATCH_ITEMS} EPCs.")
         
         # Validate that the range can fit within the EPC length
         max_number_length = len(str(end))
-        if len(prefix) + max_number_length > epc_length:
+        if len(prefix) + max_number_length > cls.EPC_LENGTH:
             raise ValueError("The provided range and prefix exceed the EPC length.")
 
-        epcs = []
-        for i in range(start, end + 1):
-            number_str = str(i)
-            zero_padding_length = epc_length - len(prefix) - len(number_str)
-            zero_padding = '0' * zero_padding_length
-            epc = f"{prefix}{zero_padding}{number_str}"
-            epcs.append(epc)
 
-        return epcs
+    @classmethod
+    def generate_bulk_epcs(cls, start: int, end: int, prefix: str = "A") -> list[str]:
+        cls._validate_epc_range(start, end, prefix)
+        width = cls.EPC_LENGTH - len(prefix)
+        return [f"{prefix}{i:0{width}d}" for i in range(start, end + 1)]
     
     @staticmethod
     def epc_range_count(start: int, end: int) -> int:
@@ -2,9 +2,14 @@ from __future__ import annotations
 
 from models.utils.datetime_utils import DateTimeUtils
 from .base_model import BaseModel
+from .inventory_movement_model import InventoryMovement
+from .utils.lru_cache import LRUCache
 from .exceptions.database_insert_exception import DatabaseInsertException
 from .exceptions.database_read_exception import DatabaseReadException
 from contextlib import closing
+from typing import Iterator
+import copy
+import os
 import sqlite3
 
 class Product(BaseModel):
@@ -13,6 +18,14 @@ class Product(BaseModel):
     INVENTORY_TABLE = "ProductInventory"
     INVENTORY_BATCH_TABLE = "InventoryBatches"
 
+    # Indexed columns product listings can be sorted on
+    SORT_COLUMNS = ("product_id", "name", "price", "upc")
+
+    _stock_change_listeners = []
+
+    # Products by ("id", product_id), and product IDs by ("upc", upc) and ("batch", inventory_batch_id)
+    _cache = LRUCache(int(os.getenv("PRODUCT_CACHE_SIZE", "1024")), float(os.getenv("PRODUCT_CACHE_TTL", "60")))
+
     def __init__(self, name: str, price: float, upc: int, category: str, points_worth: int = 0, producer_company: str = ""):
         super().__init__(Product.DB_TABLE)
         self.product_id = None
@@ -24,6 +37,7 @@ class Product(BaseModel):
         self.producer_company = producer_company
         self.low_stock_threshold = 10  # Default value; can be set later
         self.moderate_stock_threshold = 50  # Default value; can be set later
+        self.available_stock = None  # Loaded with the product by the listing queries
 
     
     def to_dict(self) -> dict:
@@ -33,7 +47,7 @@ class Product(BaseModel):
             "price": self.price,
             "upc": self.upc,
             "category": self.category,
-            "available_stock": self.get_inventory(self.product_id),
+            "available_stock": self.available_stock if self.available_stock is not None else self.get_inventory(self.product_id),
             "points_worth": self.points_worth,
             "low_stock_threshold": self.low_stock_threshold,
             "moderate_stock_threshold": self.moderate_stock_threshold,
@@ -53,12 +67,34 @@ class Product(BaseModel):
         product.product_id = int(row["product_id"])
         product.low_stock_threshold = int(row["low_stock_threshold"])
         product.moderate_stock_threshold = int(row["moderate_stock_threshold"])
+        # Queries joining ProductInventory preload the stock so that to_dict needs no query
+        if "available_stock" in row.keys():
+            product.available_stock = int(row["available_stock"])
         return product
     
     @classmethod
     def fetch_products_sold(cls, start_date: str, end_date: str = None, include_not_sold: bool = False) -> list[dict[Product, int]]:
+        return list(cls.iter_products_sold(start_date, end_date, include_not_sold))
+
+    @classmethod
+    def iter_products_sold(cls, start_date: str, end_date: str = None, include_not_sold: bool = False, batch_size: int = 500) -> Iterator[dict[Product, int]]:
+        """
+        Iterate over the products sold over a period, without loading them all in memory.
+
+        Args:
+            start_date (str): The local start of the period.
+            end_date (str, optional): The local end of the period. Defaults to no end.
+            include_not_sold (bool): True to include the products that were not sold.
+            batch_size (int): The number of products read from the database at a time.
+
+        Returns:
+            Iterator[dict[Product, int]]: The products and their number sold, most sold first.
+        """
         sql = f"""
-        SELECT p.*, COALESCE(SUM(pp.product_amount), 0) as total_sold FROM Products p
+        SELECT p.*, COALESCE(SUM(pp.product_amount), 0) as total_sold,
+            COALESCE(MAX(inv.total_stock), 0) AS available_stock
+        FROM Products p
+        LEFT JOIN ProductInventory inv ON inv.product_id = p.product_id
         LEFT JOIN PaymentProducts pp ON p.product_id = pp.product_id
         LEFT JOIN Payments pa on pa.payment_id = pp.payment_id
         WHERE pa.date IS NULL OR pa.date BETWEEN :start_date AND :end_date
@@ -68,8 +104,6 @@ class Product(BaseModel):
 
         if not include_not_sold:
             sql += " AND total_sold > 0"
-        
-        sql += " ORDER BY total_sold DESC"
 
         # Normalize start_date and end_date
         start_date = start_date + " 00:00:00" if len(start_date) == 10 else start_date
@@ -84,27 +118,12 @@ class Product(BaseModel):
         start_date = DateTimeUtils.local_to_utc(start_date)
         end_date = DateTimeUtils.local_to_utc(end_date) if end_date != "9999-12-31 23:59:59" else end_date
 
-        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
-            try:
-                # Set fetch mode
-                cursor.row_factory = sqlite3.Row
-                
-                # Execute
-                cursor.execute(sql, {"start_date": start_date, "end_date": end_date})
-
-                # Get rows
-                rows = cursor.fetchall()
-            except Exception as e:
-                raise DatabaseReadException(f"An unexpected error occurred while fetching products sold: {e}")
-        
-        # Convert data to products
-        products = []
-        for row in rows:
-            # Create product from row
-            product = cls.from_row(row)
-            products.append({"product": product, "number_sold": int(row["total_sold"])})
-
-        return products
+        try:
+            for row in BaseModel._iter_query(sql, ["total_sold", "product_id"], {"start_date": start_date, "end_date": end_date}, batch_size, descending=True):
+                # Create product from row
+                yield {"product": cls.from_row(row), "number_sold": int(row["total_sold"])}
+        except Exception as e:
+            raise DatabaseReadException(f"An unexpected error occurred while fetching products sold: {e}")
 
     @classmethod
     def fetch_most_sold_products(cls, start_date: str, end_date: str = None, top_n: int = 1) -> list[Product]:
@@ -115,7 +134,10 @@ class Product(BaseModel):
             raise ValueError("top_n must be a positive integer.")
 
         sql = f"""
-        SELECT pr.*, SUM(pp.product_amount) AS total_bought FROM products pr
+        SELECT pr.*, SUM(pp.product_amount) AS total_bought,
+            COALESCE(MAX(inv.total_stock), 0) AS available_stock
+        FROM products pr
+        LEFT JOIN ProductInventory inv ON inv.product_id = pr.product_id
         JOIN PaymentProducts pp ON pr.product_id = pp.product_id
         JOIN Payments pa on pa.payment_id = pp.payment_id
         WHERE pa.date BETWEEN :start_date AND :end_date
@@ -167,7 +189,10 @@ class Product(BaseModel):
             raise ValueError("top_n must be a positive integer.")
 
         sql = f"""
-        SELECT pr.*, SUM(pp.product_amount) AS total_bought FROM products pr
+        SELECT pr.*, SUM(pp.product_amount) AS total_bought,
+            COALESCE(MAX(inv.total_stock), 0) AS available_stock
+        FROM products pr
+        LEFT JOIN ProductInventory inv ON inv.product_id = pr.product_id
         JOIN PaymentProducts pp ON pr.product_id = pp.product_id
         JOIN Payments pa on pa.payment_id = pp.payment_id
         WHERE pa.date BETWEEN :start_date AND :end_date
@@ -190,8 +215,6 @@ class Product(BaseModel):
             "top_n": top_n
         }
 
-        print(start_date + " " + end_date)
-
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
             try:
                 # Set fetch mode
@@ -213,6 +236,48 @@ class Product(BaseModel):
         return products
     
 
+    @classmethod
+    def _invalidate_cache(cls, product_id: int) -> None:
+        # Drop the product and every ID mapping to it, now and again once the transaction is
+        # committed, so that a concurrent reader cannot cache the state from before the commit
+        def invalidate():
+            cls._cache.invalidate_where(lambda key, value: key == ("id", product_id) or (key[0] != "id" and value == product_id))
+
+        invalidate()
+        BaseModel._after_commit(invalidate)
+
+    @classmethod
+    def _get_cached_product(cls, product_id: int) -> Product | None:
+        product = cls._cache.get(("id", product_id))
+        # Callers may modify the product they get, the cached one must stay untouched
+        return copy.copy(product) if product is not None else None
+
+    @classmethod
+    def _cache_product(cls, product: Product, generation: int, connection: sqlite3.Connection, *lookup_keys: tuple) -> None:
+        # A read made inside a write transaction may see changes that are rolled back later
+        if connection.in_transaction:
+            return
+        if cls._cache.put(("id", product.product_id), copy.copy(product), generation):
+            for key in lookup_keys:
+                cls._cache.put(key, product.product_id, generation)
+
+    @classmethod
+    def get_cache_stats(cls) -> dict:
+        """Return the hit/miss, size and eviction counters of the product cache."""
+        return cls._cache.stats()
+
+    @classmethod
+    def add_stock_change_listener(cls, callback) -> None:
+        """Register a callback called with the product ID once a change to its stock is committed."""
+        cls._stock_change_listeners.append(callback)
+
+    @classmethod
+    def _notify_stock_change(cls, product_id: int) -> None:
+        # The cached product holds the previous stock
+        cls._invalidate_cache(product_id)
+        for callback in cls._stock_change_listeners:
+            BaseModel._after_commit(lambda callback=callback: callback(product_id))
+
     # specify the date that the inventory batch was added
     @classmethod
     def add_inventory_batch(cls, product_id: int, quantity: int, received_date: str = None) -> int:
@@ -227,8 +292,8 @@ class Product(BaseModel):
         # Insert a new inventory batch and update total stock in ProductInventory inside one transaction
         if received_date is None:
             sql_insert_batch = f"""
-            INSERT INTO {cls.INVENTORY_BATCH_TABLE} (product_id, quantity)
-            VALUES (:product_id, :quantity);
+            INSERT INTO {cls.INVENTORY_BATCH_TABLE} (product_id, quantity, remaining_quantity)
+            VALUES (:product_id, :quantity, :quantity);
             """
             sql_values = {
                 "product_id": product_id,
@@ -236,29 +301,25 @@ class Product(BaseModel):
             }
         else:
             sql_insert_batch = f"""
-            INSERT INTO {cls.INVENTORY_BATCH_TABLE} (product_id, quantity, received_date)
-            VALUES (:product_id, :quantity, :received_date);
+            INSERT INTO {cls.INVENTORY_BATCH_TABLE} (product_id, quantity, remaining_quantity, received_date)
+            VALUES (:product_id, :quantity, :quantity, :received_date);
             """
             sql_values = {
                 "product_id": product_id,
                 "quantity": quantity,
-                "received_date": received_date
+                # Given in local time, stored in UTC like the default CURRENT_TIMESTAMP
+                "received_date": DateTimeUtils.local_to_utc(received_date)
             }
 
-        sql_upsert_inventory = f"""
-        INSERT INTO {cls.INVENTORY_TABLE} (product_id, total_stock)
-        VALUES (:product_id, :quantity)
-        ON CONFLICT(product_id) DO UPDATE SET total_stock = total_stock + :quantity;
-        """
-
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
             try:
                 # Insert batch record
                 cursor.execute(sql_insert_batch, sql_values)
                 # Get the inserted inventory batch ID
                 inventory_batch_id = cursor.lastrowid
-                # Upsert inventory total_stock
-                cursor.execute(sql_upsert_inventory, {"product_id": product_id, "quantity": quantity})
+                # Record the receipt, which updates the total stock
+                InventoryMovement._record(product_id, InventoryMovement.RECEIPT, quantity, cursor, inventory_batch_id=inventory_batch_id)
+                cls._notify_stock_change(product_id)
             except Exception as e:
                 # Any failure should be reported as an insert error (transaction will roll back)
                 raise DatabaseInsertException(f"An unexpected error occurred while adding inventory batch: {e}")
@@ -268,53 +329,118 @@ class Product(BaseModel):
     
 
     @classmethod
-    def decrease_inventory(cls, product_id: int, quantity: int) -> None:
+    def decrease_inventory(cls, product_id: int, quantity: int, note: str = None, batch_quantities: dict[int, int] = None) -> None:
+        # Check if product exists
+        product = cls.fetch_product_by_id(product_id)
+        if product is None:
+            raise ValueError(f"Product with ID {product_id} does not exist.")
+
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
             try:
-                cls._decrease_inventory(product_id, quantity, cursor)
+                cls._decrease_inventory(product_id, quantity, cursor, InventoryMovement.ADJUSTMENT, note=note, batch_quantities=batch_quantities)
             except Exception as e:
                 raise DatabaseInsertException(f"An unexpected error occurred while decreasing product inventory: {e}")
 
     
     @classmethod
-    def _decrease_inventory(cls, product_id: int, quantity: int, cursor: sqlite3.Cursor) -> None:
-        # Check if product exists
-        product = cls.fetch_product_by_id(product_id)
-        if product is None:
-            raise ValueError(f"Product with ID {product_id} does not exist.")
-        
+    def _decrease_inventory(cls, product_id: int, quantity: int, cursor: sqlite3.Cursor, movement_type: str = InventoryMovement.SALE, payment_id: int = None, note: str = None, batch_quantities: dict[int, int] = None) -> None:
         if quantity <= 0:
             raise ValueError("Quantity to decrease must be a positive integer.")
         
-        # Get current stock
-        current_stock = cls.get_inventory(product_id)
+        # Recorded in the ledger, removing at most the available stock, without reading it first
+        InventoryMovement._record(product_id, movement_type, -quantity, cursor, payment_id=payment_id, note=note)
+        cls._deplete_batches(product_id, quantity, cursor, batch_quantities)
+        cls._notify_stock_change(product_id)
 
-        if current_stock < quantity:
-            quantity = current_stock  # Set to remove all available stock
-        
-        sql = f"""
-        UPDATE {cls.INVENTORY_TABLE}
-        SET total_stock = total_stock - :total_stock
-        WHERE product_id = :product_id AND total_stock >= :total_stock;
+
+    @classmethod
+    def _deplete_batches(cls, product_id: int, quantity: int, cursor: sqlite3.Cursor, batch_quantities: dict[int, int] = None) -> None:
         """
+        Consume items from the remaining quantity of the batches of a product.
 
-        sql_values = {
-            "product_id": product_id,
-            "total_stock": quantity
-        }
+        Items whose batch is known (scanned EPCs) are taken from that batch, the others
+        from the oldest batches still in stock (first in, first out).
+
+        Args:
+            product_id (int): The product.
+            quantity (int): The number of items consumed.
+            cursor (sqlite3.Cursor): The cursor of the write transaction.
+            batch_quantities (dict[int, int], optional): The number of items consumed by inventory batch ID.
+                Batches of other products are ignored.
+        """
+        sql_deplete_batch = f"""
+        UPDATE {cls.INVENTORY_BATCH_TABLE}
+        SET remaining_quantity = MAX(remaining_quantity - :quantity, 0)
+        WHERE inventory_batch_id = :inventory_batch_id AND product_id = :product_id;
+        """
+
+        # Every batch is brought down to what remains of the running total past the consumed quantity
+        sql_deplete_fifo = f"""
+        WITH oldest_first AS (
+            SELECT
+                inventory_batch_id,
+                remaining_quantity,
+                SUM(remaining_quantity) OVER (ORDER BY received_date, inventory_batch_id ROWS UNBOUNDED PRECEDING) AS cumulative_quantity
+            FROM {cls.INVENTORY_BATCH_TABLE}
+            WHERE product_id = :product_id AND remaining_quantity > 0
+        )
+        UPDATE {cls.INVENTORY_BATCH_TABLE}
+        SET remaining_quantity = MAX(oldest_first.cumulative_quantity - :quantity, 0)
+        FROM oldest_first
+        WHERE {cls.INVENTORY_BATCH_TABLE}.inventory_batch_id = oldest_first.inventory_batch_id
+            AND oldest_first.cumulative_quantity - oldest_first.remaining_quantity < :quantity;
+        """
+
+        for inventory_batch_id, batch_quantity in (batch_quantities or {}).items():
+            if quantity <= 0:
+                break
+            batch_quantity = min(batch_quantity, quantity)
+            cursor.execute(sql_deplete_batch, {"inventory_batch_id": inventory_batch_id, "product_id": product_id, "quantity": batch_quantity})
+            if cursor.rowcount > 0:
+                quantity -= batch_quantity
+
+        if quantity > 0:
+            cursor.execute(sql_deplete_fifo, {"product_id": product_id, "quantity": quantity})
 
-        # Execute
-        cursor.execute(sql, sql_values)
-    
 
     @classmethod
-    def get_inventory(cls, product_id: int) -> int:
+    def adjust_inventory(cls, product_id: int, quantity: int, note: str = None) -> int:
+        """
+        Correct the stock of a product (count, loss, damage) with an adjustment movement.
+
+        Args:
+            product_id (int): The product.
+            quantity (int): The signed change of the stock. The stock never goes below 0.
+            note (str, optional): The reason of the adjustment.
+
+        Returns:
+            int: The stock after the adjustment.
+        """
+        if quantity == 0:
+            raise ValueError("Quantity to adjust must be a non-zero integer.")
+
         product = cls.fetch_product_by_id(product_id)
         if product is None:
             raise ValueError(f"Product with ID {product_id} does not exist.")
 
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                stock = InventoryMovement._record(product_id, InventoryMovement.ADJUSTMENT, quantity, cursor, note=note)
+                # Items added by an adjustment belong to no batch, items removed are taken FIFO
+                if quantity < 0:
+                    cls._deplete_batches(product_id, -quantity, cursor)
+                cls._notify_stock_change(product_id)
+            except Exception as e:
+                raise DatabaseInsertException(f"An unexpected error occurred while adjusting product inventory: {e}")
+        return stock
+    
+
+    @classmethod
+    def get_inventory(cls, product_id: int) -> int:
         sql = f"""
-        SELECT total_stock FROM {cls.INVENTORY_TABLE} WHERE product_id = :product_id;
+        SELECT p.product_id, COALESCE(inv.total_stock, 0) AS total_stock FROM {cls.DB_TABLE} p
+        LEFT JOIN {cls.INVENTORY_TABLE} inv ON inv.product_id = p.product_id
+        WHERE p.product_id = :product_id;
         """
 
         sql_values = {"product_id": product_id}
@@ -329,12 +455,109 @@ class Product(BaseModel):
 
                 # Fetch one
                 row = cursor.fetchone()
-                if row is None:
-                    return 0  # No inventory record found
             except Exception as e:
                 raise DatabaseReadException(f"An unexpected error occurred while fetching product inventory: {e}")
+
+        if row is None:
+            raise ValueError(f"Product with ID {product_id} does not exist.")
         
         return int(row["total_stock"])
+
+
+    @classmethod
+    def get_inventory_at(cls, product_id: int, at: str) -> int:
+        """
+        Get the stock of a product at a point in time, from the inventory ledger.
+
+        Args:
+            product_id (int): The product.
+            at (str): The local date and time, "YYYY-MM-DD HH:MM:SS".
+
+        Returns:
+            int: The stock at that time.
+        """
+        return InventoryMovement.fetch_stock_at(product_id, at)
+
+
+    @classmethod
+    def fetch_inventory_batches(cls, product_id: int) -> list[dict]:
+        """
+        Get the inventory batches of a product still in stock, oldest first.
+
+        Args:
+            product_id (int): The product.
+
+        Returns:
+            list[dict]: The batches, with their received and remaining quantities, their local received date and their age in days.
+        """
+        sql = f"""
+        SELECT
+            inventory_batch_id,
+            product_id,
+            quantity,
+            remaining_quantity,
+            received_date,
+            CAST(julianday('now') - julianday(received_date) AS INTEGER) AS age_days
+        FROM {cls.INVENTORY_BATCH_TABLE}
+        WHERE product_id = :product_id AND remaining_quantity > 0
+        ORDER BY received_date, inventory_batch_id;
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(sql, {"product_id": product_id})
+                rows = cursor.fetchall()
+            except sqlite3.Error as e:
+                raise DatabaseReadException(f"Failed to read the inventory batches of product {product_id}: {e}") from e
+
+        return [{**dict(row), "received_date": DateTimeUtils.utc_to_local(row["received_date"])} for row in rows]
+
+
+    @classmethod
+    def fetch_aging_inventory(cls, min_age_days: int = 0, category: str = None) -> list[dict]:
+        """
+        Get the inventory batches of all products still in stock, oldest first.
+
+        Args:
+            min_age_days (int, optional): Only return the batches received at least this many days ago.
+            category (str, optional): Only return the batches of the products of this category.
+
+        Returns:
+            list[dict]: The batches, with the name and category of their product, their local received date and their age in days.
+        """
+        sql = f"""
+        SELECT
+            ib.inventory_batch_id,
+            ib.product_id,
+            p.name,
+            p.category,
+            ib.quantity,
+            ib.remaining_quantity,
+            ib.received_date,
+            CAST(julianday('now') - julianday(ib.received_date) AS INTEGER) AS age_days
+        FROM {cls.INVENTORY_BATCH_TABLE} ib
+        JOIN {cls.DB_TABLE} p ON p.product_id = ib.product_id
+        WHERE ib.remaining_quantity > 0
+            AND ib.received_date <= datetime('now', :age_modifier)
+            AND (:category IS NULL OR p.category = :category)
+        ORDER BY ib.received_date, ib.inventory_batch_id;
+        """
+
+        sql_values = {
+            "age_modifier": f"-{int(min_age_days)} days",
+            "category": category
+        }
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(sql, sql_values)
+                rows = cursor.fetchall()
+            except sqlite3.Error as e:
+                raise DatabaseReadException(f"Failed to read the aging inventory: {e}") from e
+
+        return [{**dict(row), "received_date": DateTimeUtils.utc_to_local(row["received_date"])} for row in rows]
     
 
     @classmethod
@@ -366,8 +589,16 @@ class Product(BaseModel):
 
     @classmethod
     def fetch_all_products(cls) -> list[Product]:
+        """
+        Fetch every product together with its available stock, in a single query.
+
+        Returns:
+            list[Product]: The products, with available_stock loaded.
+        """
         sql = f"""
-        SELECT * FROM {cls.DB_TABLE} WHERE product_id != 0;
+        SELECT p.*, COALESCE(inv.total_stock, 0) AS available_stock FROM {cls.DB_TABLE} p
+        LEFT JOIN {cls.INVENTORY_TABLE} inv ON inv.product_id = p.product_id
+        WHERE p.product_id != 0;
         """
 
         # Fetch DB data
@@ -391,10 +622,83 @@ class Product(BaseModel):
         return products
 
 
+    @classmethod
+    def fetch_products_page(cls, after_id: int = None, limit: int = 50, search: str = None, category: str = None, sort: str = "product_id", descending: bool = False) -> tuple[list[Product], int | None]:
+        """
+        Fetch one page of products together with their available stock.
+
+        Args:
+            after_id (int, optional): The product_id of the last product of the previous page.
+            limit (int): The maximum number of products returned.
+            search (str, optional): Text searched in the name and category, or the start of the UPC.
+            category (str, optional): Only return the products of this category.
+            sort (str): The column to sort on, one of SORT_COLUMNS.
+            descending (bool): True to sort in descending order.
+
+        Returns:
+            tuple[list[Product], int | None]: The products, and the after_id of the next page (None on the last page).
+
+        Raises:
+            ValueError: If the sort column is not supported or after_id does not match any product.
+        """
+        if sort not in cls.SORT_COLUMNS:
+            raise ValueError(f"Products cannot be sorted by {sort}. Supported columns: {', '.join(cls.SORT_COLUMNS)}.")
+
+        conditions = ["p.product_id != 0"]
+        sql_values = {}
+        if search:
+            conditions.append(
+                "p.name LIKE :search ESCAPE '\\' OR p.category LIKE :search ESCAPE '\\' "
+                "OR CAST(p.upc AS TEXT) LIKE :upc_prefix ESCAPE '\\'"
+            )
+            sql_values["search"] = BaseModel._like_pattern(search)
+            # UPCs only match from their first digit
+            sql_values["upc_prefix"] = sql_values["search"][1:]
+        if category:
+            conditions.append("p.category = :category")
+            sql_values["category"] = category
+
+        select_sql = f"""
+        SELECT p.*, COALESCE(inv.total_stock, 0) AS available_stock FROM {cls.DB_TABLE} p
+        LEFT JOIN {cls.INVENTORY_TABLE} inv ON inv.product_id = p.product_id
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                # Set fetch mode
+                cursor.row_factory = sqlite3.Row
+
+                rows, next_after_id = BaseModel._fetch_keyset_page(
+                    cursor, select_sql, cls.DB_TABLE, "p", "product_id", sort, descending, after_id, limit, conditions, sql_values
+                )
+            except ValueError:
+                raise
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occured while fetching a page of products: {e}")
+
+        return [cls.from_row(row) for row in rows], next_after_id
+
+
     @classmethod
     def fetch_product_by_id(cls, product_id: int) -> Product | None:
+        """
+        Fetch a product with its available stock, from the product cache when possible.
+
+        Args:
+            product_id (int): The ID of the product.
+
+        Returns:
+            Product | None: The product, or None if it does not exist.
+        """
+        cached = cls._get_cached_product(product_id)
+        if cached is not None:
+            return cached
+        generation = cls._cache.generation
+
         sql = f"""
-        SELECT * FROM {cls.DB_TABLE} WHERE product_id = :product_id;
+        SELECT p.*, COALESCE(inv.total_stock, 0) AS available_stock FROM {cls.DB_TABLE} p
+        LEFT JOIN {cls.INVENTORY_TABLE} inv ON inv.product_id = p.product_id
+        WHERE p.product_id = :product_id;
         """
 
         sql_values = {"product_id": product_id}
@@ -412,18 +716,126 @@ class Product(BaseModel):
             except Exception as e:
                 raise DatabaseReadException(f"An unexpected error occurred while fetching the product with ID {product_id}: {e}")
     
-        # Return if no results
-        if row is None:
-            return None
-        
-        return cls.from_row(row)
+            # Return if no results
+            if row is None:
+                return None
+
+            product = cls.from_row(row)
+            cls._cache_product(product, generation, connection)
+        return product
+
+
+    @classmethod
+    def fetch_products_by_ids(cls, product_ids: list[int]) -> dict[int, Product]:
+        """
+        Fetch many products with their available stock, the ones not cached with a single query.
+
+        Args:
+            product_ids (list[int]): The IDs of the products.
+
+        Returns:
+            dict[int, Product]: The products found, by ID.
+        """
+        products = {}
+        missing = []
+        for product_id in dict.fromkeys(product_ids):
+            cached = cls._get_cached_product(product_id)
+            if cached is not None:
+                products[product_id] = cached
+            else:
+                missing.append(product_id)
+
+        if not missing:
+            return products
+        generation = cls._cache.generation
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                # Set fetch mode
+                cursor.row_factory = sqlite3.Row
+
+                # Stay under SQLite's limit on the number of variables
+                for start in range(0, len(missing), 500):
+                    chunk = missing[start:start + 500]
+                    placeholders = ", ".join("?" for _ in chunk)
+                    cursor.execute(f"""
+                    SELECT p.*, COALESCE(inv.total_stock, 0) AS available_stock FROM {cls.DB_TABLE} p
+                    LEFT JOIN {cls.INVENTORY_TABLE} inv ON inv.product_id = p.product_id
+                    WHERE p.product_id IN ({placeholders});
+                    """, chunk)
+
+                    for row in cursor.fetchall():
+                        product = cls.from_row(row)
+                        cls._cache_product(product, generation, connection)
+                        products[product.product_id] = product
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occurred while fetching {len(missing)} products: {e}")
+
+        return products
+
+
+    @classmethod
+    def fetch_product_by_upc(cls, upc: int) -> Product | None:
+        """
+        Fetch a product by UPC with its available stock, from the product cache when possible.
+
+        Args:
+            upc (int): The UPC of the product.
+
+        Returns:
+            Product | None: The product, or None if no product has this UPC.
+        """
+        product_id = cls._cache.get(("upc", int(upc)))
+        if product_id is not None:
+            cached = cls._get_cached_product(product_id)
+            if cached is not None:
+                return cached
+        generation = cls._cache.generation
+
+        sql = f"""
+        SELECT p.*, COALESCE(inv.total_stock, 0) AS available_stock FROM {cls.DB_TABLE} p
+        LEFT JOIN {cls.INVENTORY_TABLE} inv ON inv.product_id = p.product_id
+        WHERE p.upc = :upc
+        ORDER BY p.product_id
+        LIMIT 1;
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                # Set fetch mode
+                cursor.row_factory = sqlite3.Row
+
+                # Execute
+                cursor.execute(sql, {"upc": int(upc)})
+
+                # Fetch one
+                row = cursor.fetchone()
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occurred while fetching the product with UPC {upc}: {e}")
+
+            # Return if no results
+            if row is None:
+                return None
+
+            product = cls.from_row(row)
+            cls._cache_product(product, generation, connection, ("upc", product.upc))
+        return product
     
 
     @classmethod
     def fetch_product_by_inventory_batch_id(cls, inventory_batch_id: int) -> Product | None:
+        # A batch always belongs to the same product, only the product itself can change
+        product_id = cls._cache.get(("batch", inventory_batch_id))
+        if product_id is not None:
+            cached = cls._get_cached_product(product_id)
+            if cached is not None:
+                return cached
+        generation = cls._cache.generation
+
         sql = f"""
-        SELECT p.* FROM {cls.DB_TABLE} p
+        SELECT p.*, COALESCE(inv.total_stock, 0) AS available_stock FROM {cls.DB_TABLE} p
         JOIN {cls.INVENTORY_BATCH_TABLE} ib ON p.product_id = ib.product_id
+        LEFT JOIN {cls.INVENTORY_TABLE} inv ON inv.product_id = p.product_id
         WHERE ib.inventory_batch_id = :inventory_batch_id;
         """
 
@@ -440,12 +852,14 @@ class Product(BaseModel):
             except Exception as e:
                 raise DatabaseReadException(f"An unexpected error occurred while fetching the product for inventory batch ID {inventory_batch_id}: {e}")
         
-        # Return if no results
-        if row is None:
-            return None
-        
-        # Map row to Product
-        return cls.from_row(row)
+            # Return if no results
+            if row is None:
+                return None
+
+            # Map row to Product
+            product = cls.from_row(row)
+            cls._cache_product(product, generation, connection, ("batch", inventory_batch_id))
+        return product
     
 
     @classmethod
@@ -481,6 +895,8 @@ class Product(BaseModel):
                 cursor.execute(sql, sql_values)
             except Exception as e:
                 raise DatabaseInsertException(f"An unexpected error occurred while updating the product with ID {product.product_id}: {e}")
+
+            cls._invalidate_cache(product.product_id)
     
     @classmethod
     def delete_product(cls, product_id: int) -> None:
@@ -497,3 +913,5 @@ class Product(BaseModel):
                 cursor.execute(sql, sql_values)
             except Exception as e:
                 raise DatabaseInsertException(f"An unexpected error occurred while deleting the product with ID {product_id}: {e}")
+
+            cls._invalidate_cache(product_id)
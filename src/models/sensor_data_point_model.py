@@ -2,16 +2,37 @@ from __future__ import annotations
 
 from models.utils.datetime_utils import DateTimeUtils
 from .base_model import BaseModel
+from .sensor_data_rollup_model import SensorDataRollup
 from .exceptions.database_insert_exception import DatabaseInsertException
+from .exceptions.database_delete_exception import DatabaseDeleteException
 from .exceptions.database_read_exception import DatabaseReadException
 from contextlib import closing
+from datetime import datetime, timezone
 import sqlite3
 
 class SensorDataPoint(BaseModel):
+    """
+    A sensor reading.
+
+    Readings are stored with a REAL value (booleans such as the fan status as
+    1/0), the integer code of their data type (see the SensorDataTypes table)
+    and a UTC epoch timestamp. Objects keep the readable form: the data type
+    name, the value as a float (or 'true'/'false' for boolean types) and the
+    created_at as a 'YYYY-MM-DD HH:MM:SS' string.
+    """
     
     DB_TABLE = "SensorDataPoints"
 
-    def __init__(self, sensor_id: int, data_type: str, value: str):
+    # Data type name -> code stored in data_type_id, as seeded in SensorDataTypes
+    DATA_TYPE_CODES = {
+        "temperature": 1,
+        "humidity": 2,
+        "fan_status": 3,
+    }
+    DATA_TYPE_NAMES = {code: name for name, code in DATA_TYPE_CODES.items()}
+    BOOLEAN_DATA_TYPES = {"fan_status"}
+
+    def __init__(self, sensor_id: int, data_type: str, value: float | str):
         super().__init__(SensorDataPoint.DB_TABLE)
         self.sensor_data_point_id = None
         self.sensor_id = sensor_id
@@ -20,18 +41,56 @@ class SensorDataPoint(BaseModel):
         self.created_at = None
     
 
+    @classmethod
+    def get_data_type_code(cls, data_type: str) -> int:
+        code = cls.DATA_TYPE_CODES.get(data_type)
+        if code is None:
+            raise ValueError(f"Unknown sensor data type: {data_type}")
+        return code
+
+    @classmethod
+    def _encode_value(cls, data_type: str, value) -> float:
+        # Booleans are stored as 1/0 in the numeric value column
+        if data_type in cls.BOOLEAN_DATA_TYPES:
+            return 1.0 if str(value).lower() == "true" else 0.0
+        return float(value)
+
+    @classmethod
+    def _decode_value(cls, data_type: str, value: float) -> float | str:
+        if data_type in cls.BOOLEAN_DATA_TYPES:
+            return "true" if value else "false"
+        return value
+
+    @classmethod
+    def _to_sql_values(cls, sensor_data_point: SensorDataPoint) -> dict:
+        return {
+            "sensor_id": sensor_data_point.sensor_id,
+            "data_type_id": cls.get_data_type_code(sensor_data_point.data_type),
+            "value": cls._encode_value(sensor_data_point.data_type, sensor_data_point.value),
+            "created_at": DateTimeUtils.utc_to_epoch(sensor_data_point.created_at)
+        }
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> SensorDataPoint:
+        data_type = cls.DATA_TYPE_NAMES.get(row["data_type_id"], str(row["data_type_id"]))
+        sensor_data_point = cls(int(row["sensor_id"]), data_type, cls._decode_value(data_type, row["value"]))
+        sensor_data_point.sensor_data_point_id = int(row["sensor_data_point_id"])
+        sensor_data_point.created_at = DateTimeUtils.utc_to_local(DateTimeUtils.epoch_to_utc(row["created_at"]))
+        return sensor_data_point
+
+
     @classmethod
     def insert_sensor_data_point(cls, sensor_data_point: SensorDataPoint) -> None:
         sql = f"""
-        INSERT INTO {cls.DB_TABLE} (`sensor_id`, `data_type`, `value`)
-        VALUES (:sensor_id, :data_type, :value);
+        INSERT INTO {cls.DB_TABLE} (`sensor_id`, `data_type_id`, `value`, `created_at`)
+        VALUES (:sensor_id, :data_type_id, :value, :created_at);
         """
 
-        sql_values = {
-            "sensor_id": sensor_data_point.sensor_id,
-            "data_type": sensor_data_point.data_type,
-            "value": sensor_data_point.value
-        }
+        # Stamp the reading so that its rollup bucket matches the stored time
+        if sensor_data_point.created_at is None:
+            sensor_data_point.created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+        sql_values = cls._to_sql_values(sensor_data_point)
 
         # Insert
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
@@ -42,12 +101,47 @@ class SensorDataPoint(BaseModel):
                 # Set the point id
                 sensor_data_point.sensor_data_point_id = cursor.lastrowid
 
-                # Commit transaction
-                connection.commit()
+                # Update the rollups in the same transaction
+                SensorDataRollup._apply_points([sensor_data_point], cursor)
             except Exception as e:
                 raise DatabaseInsertException(f"An unexpected error occurred while inserting the sensor data point: {e}")
     
 
+    @classmethod
+    def insert_sensor_data_points(cls, sensor_data_points: list[SensorDataPoint]) -> None:
+        """
+        Insert many sensor data points with a single statement, update their rollups and commit.
+
+        Points that have a created_at (UTC, 'YYYY-MM-DD HH:MM:SS') keep it, so readings
+        written in a delayed batch still carry the time at which they were received.
+        Values are converted to their stored numeric form.
+
+        Args:
+            sensor_data_points (list[SensorDataPoint]): The points to insert.
+        """
+        if not sensor_data_points:
+            return
+
+        sql = f"""
+        INSERT INTO {cls.DB_TABLE} (`sensor_id`, `data_type_id`, `value`, `created_at`)
+        VALUES (:sensor_id, :data_type_id, :value, :created_at);
+        """
+
+        # Stamp the remaining points so that their rollup buckets match the stored time
+        received_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        for point in sensor_data_points:
+            if point.created_at is None:
+                point.created_at = received_at
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.executemany(sql, [cls._to_sql_values(point) for point in sensor_data_points])
+                # Update the rollups in the same transaction
+                SensorDataRollup._apply_points(sensor_data_points, cursor)
+            except Exception as e:
+                raise DatabaseInsertException(f"An unexpected error occurred while inserting {len(sensor_data_points)} sensor data points: {e}") from e
+
+
     @classmethod
     def fetch_sensor_data_over_time(cls, data_type: str, start_date: str, end_date: str = None) -> list[SensorDataPoint]:
         sql = f"""
@@ -55,20 +149,20 @@ class SensorDataPoint(BaseModel):
             SELECT
                 sensor_data_point_id,
                 sensor_id,
-                data_type,
+                data_type_id,
                 value,
                 created_at,
-                date(created_at) AS day,
+                date(created_at, 'unixepoch') AS day,
                 ROW_NUMBER() OVER (
-                    PARTITION BY date(created_at)
+                    PARTITION BY date(created_at, 'unixepoch')
                     ORDER BY created_at
                 ) AS rn,
                 COUNT(*) OVER (
-                    PARTITION BY date(created_at)
+                    PARTITION BY date(created_at, 'unixepoch')
                 ) AS cnt
             FROM SensorDataPoints
             WHERE created_at BETWEEN :start_date AND :end_date
-            AND data_type = :data_type
+            AND data_type_id = :data_type_id
         ),
         selected AS (
             SELECT
@@ -105,12 +199,12 @@ class SensorDataPoint(BaseModel):
         start_date = f"{start_date} 00:00:00" if len(start_date) == 10 else start_date
         end_date = f"{end_date} 23:59:59" if len(end_date) == 10 else end_date
 
-        # Convert to utc time
-        start_date_utc = DateTimeUtils.local_to_utc(start_date)
-        end_date_utc = DateTimeUtils.local_to_utc(end_date)
+        # Convert to utc epoch time
+        start_date_utc = DateTimeUtils.utc_to_epoch(DateTimeUtils.local_to_utc(start_date))
+        end_date_utc = DateTimeUtils.utc_to_epoch(DateTimeUtils.local_to_utc(end_date))
 
         sql_values = {
-            "data_type": data_type,
+            "data_type_id": cls.get_data_type_code(data_type),
             "start_date": start_date_utc,
             "end_date": end_date_utc
         }
@@ -127,14 +221,7 @@ class SensorDataPoint(BaseModel):
                 rows = cursor.fetchall()
                 
                 # Convert to SensorDataPoint objects
-                sensor_data_points = []
-                for row in rows:
-                    sensor_data_point = SensorDataPoint(int(row["sensor_id"]), row["data_type"], row["value"])
-                    sensor_data_point.sensor_data_point_id = int(row["sensor_data_point_id"])
-                    sensor_data_point.created_at = DateTimeUtils.utc_to_local(row["created_at"])
-                    sensor_data_points.append(sensor_data_point)
-
-                return sensor_data_points
+                return [SensorDataPoint.from_row(row) for row in rows]
             except Exception as e:
                 raise DatabaseReadException(f"An unexpected error occurred while fetching sensor data points: {e}")
 
@@ -143,14 +230,14 @@ class SensorDataPoint(BaseModel):
         sql = f"""
         SELECT * FROM {cls.DB_TABLE}
         WHERE sensor_id = :sensor_id
-        AND data_type = :data_type
-        ORDER BY created_at DESC
+        AND data_type_id = :data_type_id
+        ORDER BY created_at DESC, sensor_data_point_id DESC
         LIMIT 1;
         """
 
         sql_values = {
             "sensor_id": sensor_id,
-            "data_type": data_type
+            "data_type_id": cls.get_data_type_code(data_type)
         }
 
         with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
@@ -168,11 +255,71 @@ class SensorDataPoint(BaseModel):
                 return None
             
             # Convert to SensorDataPoint object
-            sensor_data_point = SensorDataPoint(row["sensor_id"], row["data_type"], row["value"])
-            sensor_data_point.sensor_data_point_id = row["sensor_data_point_id"]
-            sensor_data_point.created_at = DateTimeUtils.local_to_utc(row["created_at"])
+            return SensorDataPoint.from_row(row)
+    
+
+    @classmethod
+    def fetch_latest_sensor_data_all(cls) -> dict[tuple[int, str], SensorDataPoint]:
+        """
+        Fetch the latest reading of every sensor and data type in a single query.
+
+        Returns:
+            dict[tuple[int, str], SensorDataPoint]: The latest readings keyed by (sensor_id, data_type).
+        """
+        # One index seek per (sensor, data type) pair on (sensor_id, data_type_id, created_at)
+        sql = f"""
+        SELECT p.* FROM Sensors s
+        CROSS JOIN SensorDataTypes t
+        JOIN {cls.DB_TABLE} p ON p.sensor_data_point_id = (
+            SELECT latest.sensor_data_point_id FROM {cls.DB_TABLE} latest
+            WHERE latest.sensor_id = s.sensor_id
+            AND latest.data_type_id = t.data_type_id
+            ORDER BY latest.created_at DESC, latest.sensor_data_point_id DESC
+            LIMIT 1
+        );
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(sql)
+
+                latest = {}
+                for row in cursor.fetchall():
+                    sensor_data_point = SensorDataPoint.from_row(row)
+                    latest[(sensor_data_point.sensor_id, sensor_data_point.data_type)] = sensor_data_point
+                return latest
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occurred while fetching the latest sensor data points: {e}")
+
+
+    @classmethod
+    def delete_sensor_data_points_before(cls, cutoff: str, limit: int) -> int:
+        """
+        Delete at most `limit` of the readings received before a given time, in one short transaction.
+
+        Args:
+            cutoff (str): The UTC time ('YYYY-MM-DD HH:MM:SS') before which readings are deleted.
+            limit (int): The maximum number of readings deleted.
 
-            return sensor_data_point
+        Returns:
+            int: The number of readings deleted.
+        """
+        sql = f"""
+        DELETE FROM {cls.DB_TABLE}
+        WHERE sensor_data_point_id IN (
+            SELECT sensor_data_point_id FROM {cls.DB_TABLE}
+            WHERE created_at < :cutoff
+            LIMIT :limit
+        );
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.execute(sql, {"cutoff": DateTimeUtils.utc_to_epoch(cutoff), "limit": limit})
+                return cursor.rowcount
+            except Exception as e:
+                raise DatabaseDeleteException(f"An unexpected error occurred while deleting old sensor data points: {e}")
     
 
     def __str__(self) -> str:
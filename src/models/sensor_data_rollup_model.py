@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+from models.utils.datetime_utils import DateTimeUtils
+from .base_model import BaseModel
+from .exceptions.database_read_exception import DatabaseReadException
+from .exceptions.database_delete_exception import DatabaseDeleteException
+from contextlib import closing
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterator
+import sqlite3
+
+if TYPE_CHECKING:
+    from .sensor_data_point_model import SensorDataPoint
+
+class SensorDataRollup(BaseModel):
+    """
+    Pre-aggregated sensor readings (count, min, max, mean and last value) per
+    sensor, data type and time bucket.
+
+    Rollups are kept at three resolutions, each in its own table. They are
+    updated in the same transaction as the raw readings they summarize, so
+    reports read a handful of buckets instead of ranking every raw reading.
+    Minute and hour buckets are aligned on UTC; day buckets follow the local
+    day so that daily reports match the dates shown to the user. Every
+    bucket_start is stored in UTC. Boolean readings (fan status) are rolled up
+    as 1/0, so their sum counts the readings that were on.
+    """
+
+    RESOLUTION_TABLES = {
+        "minute": "SensorDataRollupsMinute",
+        "hour": "SensorDataRollupsHour",
+        "day": "SensorDataRollupsDay",
+    }
+    RESOLUTION_SECONDS = {
+        "minute": 60,
+        "hour": 60 * 60,
+        "day": 24 * 60 * 60,
+    }
+
+    def __init__(self, sensor_id: int, data_type: str, resolution: str, bucket_start: str):
+        super().__init__(SensorDataRollup.RESOLUTION_TABLES[resolution])
+        self.sensor_id = sensor_id
+        self.data_type = data_type
+        self.resolution = resolution
+        self.bucket_start = bucket_start
+        self.sample_count = 0
+        self.min_value = None
+        self.max_value = None
+        self.sum_value = 0.0
+        self.last_value = None
+        self.last_at = None
+
+    @property
+    def mean_value(self) -> float | None:
+        return self.sum_value / self.sample_count if self.sample_count else None
+
+    def to_dict(self) -> dict:
+        return {
+            "sensor_id": self.sensor_id,
+            "data_type": self.data_type,
+            "resolution": self.resolution,
+            "bucket_start": self.bucket_start,
+            "count": self.sample_count,
+            "min": self.min_value,
+            "max": self.max_value,
+            "mean": round(self.mean_value, 2) if self.mean_value is not None else None,
+            "last": self.last_value,
+        }
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row, resolution: str) -> SensorDataRollup:
+        rollup = cls(int(row["sensor_id"]), row["data_type"], resolution, DateTimeUtils.utc_to_local(row["bucket_start"]))
+        rollup.sample_count = int(row["sample_count"])
+        rollup.min_value = row["min_value"]
+        rollup.max_value = row["max_value"]
+        rollup.sum_value = row["sum_value"]
+        rollup.last_value = row["last_value"]
+        rollup.last_at = DateTimeUtils.utc_to_local(row["last_at"])
+        return rollup
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _local_day_start(hour_bucket: str) -> str:
+        # Local midnight (in UTC) of the local day containing a UTC hour. Timezone offsets
+        # are whole hours, so every reading of a UTC hour falls on the same local day.
+        local_day = DateTimeUtils.utc_to_local(hour_bucket)[:10]
+        return DateTimeUtils.local_to_utc(f"{local_day} 00:00:00")
+
+    @classmethod
+    def bucket_start(cls, created_at: str, resolution: str) -> str:
+        """
+        Get the start of the bucket containing a reading.
+
+        Args:
+            created_at (str): The UTC time of the reading ('YYYY-MM-DD HH:MM:SS').
+            resolution (str): 'minute', 'hour' or 'day'.
+
+        Returns:
+            str: The UTC start of the bucket.
+        """
+        if resolution == "minute":
+            return f"{created_at[:16]}:00"
+        if resolution == "hour":
+            return f"{created_at[:13]}:00:00"
+        return cls._local_day_start(f"{created_at[:13]}:00:00")
+
+    @staticmethod
+    def _rollup_value(value) -> float | None:
+        # Booleans ('true'/'false') count as 1/0, other values that are not numeric are skipped
+        if isinstance(value, str) and value.lower() in ("true", "false"):
+            return 1.0 if value.lower() == "true" else 0.0
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def _apply_points(cls, sensor_data_points: list[SensorDataPoint], cursor: sqlite3.Cursor) -> None:
+        """
+        Add readings to the rollups of every resolution, on the cursor of the transaction inserting them.
+
+        Boolean readings (e.g. fan status) are rolled up as 1/0, other readings that are not numeric are skipped.
+
+        Args:
+            sensor_data_points (list[SensorDataPoint]): Readings with a UTC created_at.
+            cursor (sqlite3.Cursor): The cursor of the current transaction.
+        """
+        received_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+        # Aggregate the batch in memory first: one upsert per bucket instead of one per reading
+        buckets: dict[str, dict[tuple, list]] = {resolution: {} for resolution in cls.RESOLUTION_TABLES}
+        for point in sensor_data_points:
+            value = cls._rollup_value(point.value)
+            if value is None:
+                continue
+            created_at = point.created_at or received_at
+
+            for resolution, resolution_buckets in buckets.items():
+                key = (point.sensor_id, point.data_type, cls.bucket_start(created_at, resolution))
+                bucket = resolution_buckets.get(key)
+                if bucket is None:
+                    # [count, min, max, sum, last value, last time]
+                    resolution_buckets[key] = [1, value, value, value, value, created_at]
+                    continue
+                bucket[0] += 1
+                bucket[1] = min(bucket[1], value)
+                bucket[2] = max(bucket[2], value)
+                bucket[3] += value
+                if created_at >= bucket[5]:
+                    bucket[4] = value
+                    bucket[5] = created_at
+
+        for resolution, resolution_buckets in buckets.items():
+            if not resolution_buckets:
+                continue
+
+            sql = f"""
+            INSERT INTO {cls.RESOLUTION_TABLES[resolution]}
+                (sensor_id, data_type, bucket_start, sample_count, min_value, max_value, sum_value, last_value, last_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (data_type, bucket_start, sensor_id) DO UPDATE SET
+                sample_count = sample_count + excluded.sample_count,
+                min_value = MIN(min_value, excluded.min_value),
+                max_value = MAX(max_value, excluded.max_value),
+                sum_value = sum_value + excluded.sum_value,
+                last_value = CASE WHEN excluded.last_at >= last_at THEN excluded.last_value ELSE last_value END,
+                last_at = MAX(last_at, excluded.last_at);
+            """
+            cursor.executemany(sql, [(*key, *bucket) for key, bucket in resolution_buckets.items()])
+
+    @staticmethod
+    def _normalize_period(start_date: str, end_date: str = None) -> tuple[str, str]:
+        # Whole days run from midnight to the last second of the end date
+        if start_date is None:
+            raise ValueError("start_date must be provided")
+
+        if end_date is None:
+            end_date = start_date
+
+        start_date = f"{start_date} 00:00:00" if len(start_date) == 10 else start_date
+        end_date = f"{end_date} 23:59:59" if len(end_date) == 10 else end_date
+        return start_date, end_date
+
+    @classmethod
+    def choose_resolution(cls, start_date: str, end_date: str = None, min_points: int = 24) -> str:
+        """
+        Choose the coarsest resolution that still splits a period into at least `min_points` buckets.
+
+        Args:
+            start_date (str): The start of the period ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS').
+            end_date (str, optional): The end of the period. Defaults to the end of start_date.
+            min_points (int): The minimum number of buckets wanted over the period.
+
+        Returns:
+            str: 'day', 'hour' or 'minute'.
+        """
+        start_date, end_date = cls._normalize_period(start_date, end_date)
+        # The end date is inclusive: a whole day lasts 24 hours
+        period_seconds = (datetime.fromisoformat(end_date) - datetime.fromisoformat(start_date)).total_seconds() + 1
+        for resolution in ("day", "hour"):
+            if period_seconds / cls.RESOLUTION_SECONDS[resolution] >= min_points:
+                return resolution
+        return "minute"
+
+    @classmethod
+    def fetch_rollups_over_time(cls, data_type: str, start_date: str, end_date: str = None, resolution: str = None, min_points: int = 24) -> list[SensorDataRollup]:
+        """
+        Fetch the rollups of a data type over a period.
+
+        Args:
+            data_type (str): The data type (e.g. 'temperature').
+            start_date (str): The local start date ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS').
+            end_date (str, optional): The local end date. Defaults to the end of start_date.
+            resolution (str, optional): 'minute', 'hour' or 'day'. Chosen from the period when omitted.
+            min_points (int): The minimum number of buckets wanted when choosing the resolution.
+
+        Returns:
+            list[SensorDataRollup]: The rollups ordered by bucket, with local bucket times.
+        """
+        return list(cls.iter_rollups_over_time(data_type, start_date, end_date, resolution, min_points))
+
+    @classmethod
+    def iter_rollups_over_time(cls, data_type: str, start_date: str, end_date: str = None, resolution: str = None, min_points: int = 24, batch_size: int = 500) -> Iterator[SensorDataRollup]:
+        """
+        Iterate over the rollups of a data type over a period, without loading them all in memory.
+
+        Takes the same arguments as fetch_rollups_over_time, plus the number of rollups read
+        from the database at a time (batch_size).
+
+        Returns:
+            Iterator[SensorDataRollup]: The rollups ordered by bucket, with local bucket times.
+        """
+        start_date, end_date = cls._normalize_period(start_date, end_date)
+
+        if resolution is None:
+            resolution = cls.choose_resolution(start_date, end_date, min_points)
+        if resolution not in cls.RESOLUTION_TABLES:
+            raise ValueError(f"Unknown rollup resolution: {resolution}")
+
+        # Convert to utc time, including the bucket the start falls in
+        start_date_utc = cls.bucket_start(DateTimeUtils.local_to_utc(start_date), resolution)
+        end_date_utc = DateTimeUtils.local_to_utc(end_date)
+
+        sql = f"""
+        SELECT * FROM {cls.RESOLUTION_TABLES[resolution]}
+        WHERE data_type = :data_type
+        AND bucket_start BETWEEN :start_date AND :end_date
+        """
+
+        sql_values = {
+            "data_type": data_type,
+            "start_date": start_date_utc,
+            "end_date": end_date_utc
+        }
+
+        try:
+            for row in BaseModel._iter_query(sql, ["bucket_start", "sensor_id"], sql_values, batch_size):
+                yield cls.from_row(row, resolution)
+        except Exception as e:
+            raise DatabaseReadException(f"An unexpected error occurred while fetching sensor data rollups: {e}")
+
+    @classmethod
+    def _day_bucket_period(cls, start_date: str, end_date: str = None) -> dict:
+        # UTC bounds of the day buckets covering a local period
+        start_date, end_date = cls._normalize_period(start_date, end_date)
+        return {
+            "start_date": cls.bucket_start(DateTimeUtils.local_to_utc(start_date), "day"),
+            "end_date": DateTimeUtils.local_to_utc(end_date)
+        }
+
+    @classmethod
+    def count_active_days(cls, start_date: str, end_date: str = None) -> int:
+        """
+        Count the local days of a period on which at least one sensor reported.
+
+        Read from the day rollups, which are never pruned, so the count covers any period.
+
+        Args:
+            start_date (str): The local start date ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS').
+            end_date (str, optional): The local end date. Defaults to the end of start_date.
+
+        Returns:
+            int: The number of days with readings.
+        """
+        sql = f"""
+        SELECT COUNT(DISTINCT bucket_start) FROM {cls.RESOLUTION_TABLES["day"]}
+        WHERE data_type IN (SELECT name FROM SensorDataTypes)
+        AND bucket_start BETWEEN :start_date AND :end_date;
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.execute(sql, cls._day_bucket_period(start_date, end_date))
+                return int(cursor.fetchone()[0])
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occurred while counting the days with sensor readings: {e}")
+
+    @classmethod
+    def fetch_daily_fan_usage(cls, start_date: str, end_date: str = None) -> list[dict]:
+        """
+        Get, for every local day of a period, the temperature readings and the share of fan status readings that were on.
+
+        Read from the day rollups, which are never pruned, so the history covers any period.
+
+        Args:
+            start_date (str): The local start date ('YYYY-MM-DD' or 'YYYY-MM-DD HH:MM:SS').
+            end_date (str, optional): The local end date. Defaults to the end of start_date.
+
+        Returns:
+            list[dict]: The days, newest first, with their "date", "sensor_readings", "avg_temperature",
+                "fan_status_readings" and "fan_on_ratio" (None when the fan did not report).
+        """
+        sql = f"""
+        SELECT
+            bucket_start,
+            SUM(CASE WHEN data_type = 'temperature' THEN sample_count ELSE 0 END) AS sensor_readings,
+            SUM(CASE WHEN data_type = 'temperature' THEN sum_value END)
+                / SUM(CASE WHEN data_type = 'temperature' THEN sample_count END) AS avg_temperature,
+            SUM(CASE WHEN data_type = 'fan_status' THEN sample_count ELSE 0 END) AS fan_status_readings,
+            SUM(CASE WHEN data_type = 'fan_status' THEN sum_value ELSE 0 END) AS fan_on_readings
+        FROM {cls.RESOLUTION_TABLES["day"]}
+        WHERE data_type IN ('temperature', 'fan_status')
+        AND bucket_start BETWEEN :start_date AND :end_date
+        GROUP BY bucket_start
+        ORDER BY bucket_start DESC;
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(sql, cls._day_bucket_period(start_date, end_date))
+                rows = cursor.fetchall()
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occurred while fetching the daily fan usage: {e}")
+
+        return [
+            {
+                "date": DateTimeUtils.utc_to_local(row["bucket_start"])[:10],
+                "sensor_readings": int(row["sensor_readings"]),
+                "avg_temperature": row["avg_temperature"],
+                "fan_status_readings": int(row["fan_status_readings"]),
+                "fan_on_ratio": row["fan_on_readings"] / row["fan_status_readings"] if row["fan_status_readings"] else None
+            }
+            for row in rows
+        ]
+
+    @classmethod
+    def delete_rollups_before(cls, resolution: str, cutoff: str, limit: int) -> int:
+        """
+        Delete at most `limit` rollups of a resolution whose bucket starts before a given time.
+
+        Args:
+            resolution (str): 'minute', 'hour' or 'day'.
+            cutoff (str): The UTC time ('YYYY-MM-DD HH:MM:SS') before which buckets are deleted.
+            limit (int): The maximum number of rollups deleted.
+
+        Returns:
+            int: The number of rollups deleted.
+        """
+        table = cls.RESOLUTION_TABLES[resolution]
+        sql = f"""
+        DELETE FROM {table}
+        WHERE (data_type, bucket_start, sensor_id) IN (
+            SELECT data_type, bucket_start, sensor_id FROM {table}
+            WHERE bucket_start < :cutoff
+            LIMIT :limit
+        );
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                cursor.execute(sql, {"cutoff": cutoff, "limit": limit})
+                return cursor.rowcount
+            except Exception as e:
+                raise DatabaseDeleteException(f"An unexpected error occurred while deleting old {resolution} sensor data rollups: {e}")
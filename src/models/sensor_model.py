@@ -1,6 +1,8 @@
 from __future__ import annotations
 from .base_model import BaseModel
 from .exceptions.database_insert_exception import DatabaseInsertException
+from .exceptions.database_read_exception import DatabaseReadException
+from .exceptions.database_delete_exception import DatabaseDeleteException
 from contextlib import closing
 import sqlite3
 
@@ -8,16 +10,108 @@ class Sensor(BaseModel):
     
     DB_TABLE = "Sensors"
 
-    def __init__(self, sensor_type: str, location: str):
+    # Callbacks notified with the sensor ID after a sensor is added or removed
+    _change_listeners = []
+
+    def __init__(self, sensor_type: str, location: str, topic: str = None):
         super().__init__(Sensor.DB_TABLE)
         self.sensor_id = None
         self.sensor_type = sensor_type
         self.location = location
+        self.topic = topic
 
     def __str__(self) -> str:
         """To string method."""
         sid = self.sensor_id if self.sensor_id is not None else "None"
-        return f"Sensor(sensor_id={sid}, sensor_type='{self.sensor_type}', location='{self.location}')"
+        return f"Sensor(sensor_id={sid}, sensor_type='{self.sensor_type}', location='{self.location}', topic='{self.topic}')"
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> Sensor:
+        sensor = cls(row["sensor_type"], row["location"], row["topic"])
+        sensor.sensor_id = int(row["sensor_id"])
+        return sensor
+
+    @classmethod
+    def add_change_listener(cls, callback) -> None:
+        """Register a callback called with the sensor ID once a sensor insert or delete is committed."""
+        cls._change_listeners.append(callback)
+
+    @classmethod
+    def remove_change_listener(cls, callback) -> None:
+        """Unregister a callback added with add_change_listener, if it is registered."""
+        if callback in cls._change_listeners:
+            cls._change_listeners.remove(callback)
+
+    @classmethod
+    def _notify_change(cls, sensor_id: int) -> None:
+        for callback in cls._change_listeners:
+            BaseModel._after_commit(lambda callback=callback: callback(sensor_id))
+
+    @classmethod
+    def insert_sensor(cls, sensor: Sensor) -> None:
+        sql = f"""
+        INSERT INTO {cls.DB_TABLE} (sensor_type, `location`, topic)
+        VALUES (:sensor_type, :location, :topic);
+        """
+
+        sql_values = {
+            "sensor_type": sensor.sensor_type,
+            "location": sensor.location,
+            "topic": sensor.topic
+        }
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                # Execute sql
+                cursor.execute(sql, sql_values)
+
+                # Set the sensor id
+                sensor.sensor_id = cursor.lastrowid
+
+                # Without a topic, the device publishes under the historical 'Frig<id>' naming
+                if sensor.topic is None:
+                    sensor.topic = f"Frig{sensor.sensor_id}"
+                    cursor.execute(f"UPDATE {cls.DB_TABLE} SET topic = :topic WHERE sensor_id = :sensor_id;", {"topic": sensor.topic, "sensor_id": sensor.sensor_id})
+            except Exception as e:
+                raise DatabaseInsertException(f"An unexpected error occurred while inserting the sensor: {e}")
+
+            cls._notify_change(sensor.sensor_id)
+
+    @classmethod
+    def delete_sensor(cls, sensor_id: int) -> None:
+        sql = f"""
+        DELETE FROM {cls.DB_TABLE} WHERE sensor_id = :sensor_id;
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                # Execute sql
+                cursor.execute(sql, {"sensor_id": sensor_id})
+            except Exception as e:
+                raise DatabaseDeleteException(f"An unexpected error occurred while deleting the sensor with ID {sensor_id}: {e}")
+
+            cls._notify_change(sensor_id)
+
+    @classmethod
+    def fetch_all_sensors(cls) -> list[Sensor]:
+        sql = f"""
+        SELECT * FROM {cls.DB_TABLE};
+        """
+
+        with BaseModel._connectToDB() as connection, closing(connection.cursor()) as cursor:
+            try:
+                # Set fetch result mode
+                cursor.row_factory = sqlite3.Row
+
+                # Execute sql
+                cursor.execute(sql)
+
+                # Fetch rows
+                rows = cursor.fetchall()
+            except Exception as e:
+                raise DatabaseReadException(f"An unexpected error occurred while fetching sensors: {e}")
+
+        return [cls.from_row(row) for row in rows]
 
     @classmethod
     def fetch_sensor_by_id(cls, sensor_id: int) -> Sensor | None:
@@ -44,9 +138,5 @@ class Sensor(BaseModel):
             if row == None:
                 return None
 
-            # Convert to sensor object
-            sensor = Sensor(row["sensor_type"], row["location"])
-            sensor.sensor_id = int(row["sensor_id"])
-
-            # Return sensor
-            return sensor
\ No newline at end of file
+            # Convert to sensor object and return
+            return cls.from_row(row)
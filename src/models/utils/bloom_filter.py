@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set of strings.
+
+    A lookup answers "definitely absent" or "possibly present": there are no
+    false negatives, and false positives happen at about `error_rate` as long
+    as no more than `capacity` items were added. Items cannot be removed.
+
+    Parameters:
+        capacity (int): The number of items the filter is sized for.
+        error_rate (float): The target false positive rate at capacity.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity <= 0:
+            raise ValueError("capacity must be a positive integer.")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # Optimal number of bits and of hash functions for the capacity and error rate
+        self.bit_count = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self._bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> Iterator[int]:
+        # Double hashing: k positions derived from the two 64-bit halves of one 128-bit digest
+        digest = int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest(), "little")
+        h1 = digest & 0xFFFFFFFFFFFFFFFF
+        h2 = (digest >> 64) | 1
+        bit_count = self.bit_count
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % bit_count
+
+    def add(self, item: str) -> None:
+        self.update((item,))
+
+    def update(self, items: Iterable[str]) -> None:
+        bits = self._bits
+        positions = self._positions
+        added = 0
+        for item in items:
+            for position in positions(item):
+                bits[position >> 3] |= 1 << (position & 7)
+            added += 1
+        self.count += added
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_error_rate(self) -> float:
+        """Return the expected false positive rate for the number of items added."""
+        return (1 - math.exp(-self.hash_count * self.count / self.bit_count)) ** self.hash_count
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+from models.exceptions.database_exception import DatabaseException
+import sqlite3
+from typing import Callable
+import threading
+import time
+
+
+class PooledConnection:
+    """
+    Context manager that leases a pooled connection to the calling thread.
+
+    Leases are re-entrant: a model method called while the same thread already
+    holds a lease gets the same connection back. Only the outermost lease commits
+    (or rolls back on error) and returns the connection to the pool, so nested
+    model calls share a single transaction.
+
+    When `immediate` is set, the outermost lease starts the transaction with
+    BEGIN IMMEDIATE so the write lock is taken up front instead of being
+    upgraded (and possibly refused) half way through a unit of work.
+    """
+
+    def __init__(self, pool: ConnectionPool, immediate: bool = False):
+        self._pool = pool
+        self._immediate = immediate
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self._pool._acquire(self._immediate)
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self._pool._release(exc_type is not None)
+        # Never swallow exceptions
+        return False
+
+
+class ConnectionPool:
+    """
+    Bounded pool of reusable SQLite connections.
+
+    Every connection is configured once when it is opened (WAL journal,
+    synchronous=NORMAL, busy timeout and foreign key enforcement) and is then
+    reused across leases. When all connections are leased, callers wait until
+    one is released or until the acquire timeout expires.
+
+    Parameters:
+        database (str): Path to the SQLite database file.
+        max_connections (int): Maximum number of open connections.
+        busy_timeout_ms (int): SQLite busy timeout applied to every connection.
+        acquire_timeout (float): Seconds to wait for a free connection before failing.
+    """
+
+    def __init__(self, database: str, max_connections: int = 8, busy_timeout_ms: int = 5000, acquire_timeout: float = 10.0):
+        if max_connections <= 0:
+            raise ValueError("max_connections must be a positive integer.")
+
+        self.database = database
+        self.max_connections = max_connections
+        self.busy_timeout_ms = busy_timeout_ms
+        self.acquire_timeout = acquire_timeout
+
+        self._condition = threading.Condition()
+        self._idle: list[tuple[sqlite3.Connection, int]] = []  # (connection, ident of the last thread that used it)
+        self._size = 0
+        self._closed = False
+        self._local = threading.local()
+
+        # Counters
+        self._hits = 0
+        self._misses = 0
+        self._reentrant = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._in_use_peak = 0
+
+
+    def connection(self, immediate: bool = False) -> PooledConnection:
+        """
+        Return a context manager leasing a connection to the current thread.
+
+        Args:
+            immediate (bool): Begin a write transaction as soon as the outermost lease is taken.
+        """
+        return PooledConnection(self, immediate)
+
+
+    def _open_connection(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.database, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL;")
+        connection.execute("PRAGMA synchronous = NORMAL;")
+        connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)};")
+        connection.execute("PRAGMA foreign_keys = ON;")
+        return connection
+
+
+    def _take_idle(self, ident: int) -> sqlite3.Connection:
+        # Prefer the connection this thread used last, otherwise take the most recently released one
+        for index, (connection, owner) in enumerate(self._idle):
+            if owner == ident:
+                del self._idle[index]
+                return connection
+        return self._idle.pop()[0]
+
+
+    def _acquire(self, immediate: bool = False) -> sqlite3.Connection:
+        local = self._local
+
+        # Re-entrant lease on the same thread
+        if getattr(local, "depth", 0) > 0:
+            local.depth += 1
+            with self._condition:
+                self._reentrant += 1
+            return local.connection
+
+        ident = threading.get_ident()
+        with self._condition:
+            if self._closed:
+                raise DatabaseException("The connection pool has been closed.")
+
+            if self._idle:
+                self._hits += 1
+                connection = self._take_idle(ident)
+            elif self._size < self.max_connections:
+                self._misses += 1
+                self._size += 1
+                connection = None
+            else:
+                # Wait for another thread to release a connection
+                self._waits += 1
+                started = time.monotonic()
+                available = self._condition.wait_for(lambda: self._idle or self._closed, timeout=self.acquire_timeout)
+                waited = time.monotonic() - started
+                self._total_wait_seconds += waited
+                self._max_wait_seconds = max(self._max_wait_seconds, waited)
+
+                if not available or self._closed:
+                    self._timeouts += 1
+                    raise DatabaseException(f"Timed out after {waited:.2f}s waiting for a database connection.")
+
+                self._hits += 1
+                connection = self._take_idle(ident)
+
+            self._in_use_peak = max(self._in_use_peak, self._size - len(self._idle))
+
+        # Open new connections outside of the lock
+        if connection is None:
+            try:
+                connection = self._open_connection()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+
+        if immediate and not connection.in_transaction:
+            try:
+                connection.execute("BEGIN IMMEDIATE;")
+            except Exception:
+                with self._condition:
+                    self._idle.append((connection, ident))
+                    self._condition.notify()
+                raise
+
+        local.connection = connection
+        local.depth = 1
+        local.after_commit = []
+        return connection
+
+
+    def _release(self, failed: bool) -> None:
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:
+            return
+
+        connection = local.connection
+        callbacks = local.after_commit
+        local.connection = None
+        local.after_commit = []
+
+        try:
+            if failed:
+                connection.rollback()
+                callbacks = []
+            else:
+                connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            with self._condition:
+                if self._closed:
+                    self._size -= 1
+                    connection.close()
+                else:
+                    self._idle.append((connection, threading.get_ident()))
+                self._condition.notify()
+
+        # Run the callbacks of the committed transaction once the connection is back in the pool
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"ERROR: After-commit callback failed: {e}")
+
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Run a callback once the current thread's transaction is committed.
+
+        The callback is discarded if the transaction is rolled back. Without an
+        active lease there is nothing pending, so the callback runs immediately.
+
+        Args:
+            callback (callable): Function called without arguments.
+        """
+        if getattr(self._local, "depth", 0) > 0:
+            self._local.after_commit.append(callback)
+        else:
+            callback()
+
+
+    def stats(self) -> dict:
+        """Return a snapshot of the pool counters."""
+        with self._condition:
+            acquisitions = self._hits + self._misses
+            return {
+                "size": self._size,
+                "max_connections": self.max_connections,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "in_use_peak": self._in_use_peak,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / acquisitions, 4) if acquisitions else 0.0,
+                "reentrant_leases": self._reentrant,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "total_wait_seconds": round(self._total_wait_seconds, 6),
+                "max_wait_seconds": round(self._max_wait_seconds, 6),
+                "avg_wait_seconds": round(self._total_wait_seconds / self._waits, 6) if self._waits else 0.0,
+            }
+
+
+    def close_all(self) -> None:
+        """Close idle connections and make leased ones close when they are released."""
+        with self._condition:
+            self._closed = True
+            for connection, _ in self._idle:
+                connection.close()
+            self._size -= len(self._idle)
+            self._idle.clear()
+            self._condition.notify_all()
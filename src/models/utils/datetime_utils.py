@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import datetime, timezone
+import calendar
 import pytz
 
 class DateTimeUtils:
@@ -22,4 +23,14 @@ class DateTimeUtils:
             return utc.strftime('%Y-%m-%d %H:%M:%S')
         except Exception as e:
             # Fallback to original string
-            return local_datetime
\ No newline at end of file
+            return local_datetime
+
+    @staticmethod
+    def utc_to_epoch(utc_datetime: str) -> int:
+        # 'YYYY-MM-DD HH:MM:SS' in UTC -> seconds since the Unix epoch
+        return calendar.timegm(datetime.fromisoformat(utc_datetime).timetuple())
+
+    @staticmethod
+    def epoch_to_utc(epoch: int) -> str:
+        # Seconds since the Unix epoch -> 'YYYY-MM-DD HH:MM:SS' in UTC
+        return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
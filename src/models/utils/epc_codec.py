@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+
+class EpcCodec:
+    """
+    Compact form of the EPCs stored by ProductItem.
+
+    An EPC such as 'A00000000000000000000123' is split into a prefix ('A'),
+    the width of its numeric tail (23 digits) and its serial (123). The
+    prefix and width are stored once in the EpcPrefixes table and every item
+    only keeps the integer code of its prefix and its serial, so a sequential
+    run of EPCs can be stored as a single serial range.
+
+    Only the last MAX_SERIAL_DIGITS digits make up the serial, so that it fits
+    a 64-bit integer: the other digits stay in the prefix ('A00000' for the
+    EPC above). EPCs that do not end with a digit are kept verbatim: the whole
+    EPC is the prefix, with a width of 0 and the serial VERBATIM_SERIAL.
+    """
+
+    DIGITS = "0123456789"
+    MAX_SERIAL_DIGITS = 18
+    VERBATIM_SERIAL = -1
+
+    @classmethod
+    def split(cls, epc: str) -> tuple[str, int, int]:
+        """
+        Split an EPC into its prefix, digit width and serial.
+
+        Args:
+            epc (str): The EPC.
+
+        Returns:
+            tuple[str, int, int]: The prefix, the width of the numeric tail and the serial.
+        """
+        width = min(len(epc) - len(epc.rstrip(cls.DIGITS)), cls.MAX_SERIAL_DIGITS)
+        if width == 0:
+            return epc, 0, cls.VERBATIM_SERIAL
+        return epc[:-width], width, int(epc[-width:])
+
+    @classmethod
+    def join(cls, prefix: str, width: int, serial: int) -> str:
+        """
+        Build an EPC back from its prefix, digit width and serial.
+
+        Args:
+            prefix (str): The prefix.
+            width (int): The width of the numeric tail, 0 for a verbatim EPC.
+            serial (int): The serial.
+
+        Returns:
+            str: The EPC.
+        """
+        if serial == cls.VERBATIM_SERIAL:
+            return prefix
+        return f"{prefix}{serial:0{width}d}"
+
+    @classmethod
+    def expand(cls, prefix: str, width: int, first_serial: int, last_serial: int) -> Iterator[str]:
+        """Iterate over the EPCs of a serial range, both ends included."""
+        for serial in range(first_serial, last_serial + 1):
+            yield f"{prefix}{serial:0{width}d}"
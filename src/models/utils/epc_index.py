@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from .bloom_filter import BloomFilter
+from .epc_codec import EpcCodec
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterable
+import threading
+import time
+
+# (prefix, width, first_serial, last_serial) of a range of sequential EPCs, see EpcCodec
+EpcRange = tuple[str, int, int, int]
+
+
+class EpcIndex:
+    """
+    In-memory Bloom filter of every known EPC, used to answer scans of unknown tags without a query.
+
+    The filter is built from the database in the background (`load`) and kept
+    up to date as EPCs are inserted. A tag the filter rules out is unknown for
+    sure; any other tag is resolved through the EPC index of the database.
+    Bloom filters cannot forget items, so deleted EPCs only cost a query until
+    the filter is rebuilt, which happens once it is full or once many EPCs were
+    deleted since it was built.
+
+    Ranges of sequential EPCs are not hashed into the filter: they are kept
+    exactly, as sorted serial intervals per prefix, so a batch of a million
+    sequential EPCs costs two integers instead of a million hashes.
+
+    Until the first load completes, every EPC is reported as possibly known.
+
+    Parameters:
+        count_epcs (callable): Returns the number of EPCs loaded by `load_epcs`.
+        load_epcs (callable): Returns an iterable over every EPC in the database not covered by `load_ranges`.
+        error_rate (float): The target false positive rate of the filter.
+        min_capacity (int): The smallest number of EPCs a filter is sized for.
+        load_ranges (callable, optional): Returns an iterable over every EPC range in the database.
+    """
+
+    def __init__(self, count_epcs: Callable[[], int], load_epcs: Callable[[], Iterable[str]], error_rate: float = 0.01, min_capacity: int = 100_000, load_ranges: Callable[[], Iterable[EpcRange]] = None):
+        self.count_epcs = count_epcs
+        self.load_epcs = load_epcs
+        self.load_ranges = load_ranges
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+
+        self._lock = threading.Lock()
+        self._filter: BloomFilter = None
+        self._pending: list[str] = None  # EPCs inserted while a filter is being built
+        # (prefix, width) -> (first serials, last serials) of disjoint sorted ranges, replaced on every change
+        self._ranges: dict[tuple[str, int], tuple[tuple[int, ...], tuple[int, ...]]] = {}
+        self._pending_ranges: list[EpcRange] = None  # Ranges inserted while a filter is being built
+        self._loading = False
+        self._loads_started = 0
+        self._removed = 0
+
+        # Counters
+        self._lookups = 0
+        self._negatives = 0
+        self._false_positives = 0
+        self._loads = 0
+        self._last_load_seconds = 0.0
+        self._last_error = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._filter is not None
+
+    def load(self) -> None:
+        """Build a new filter from the database and swap it in once complete."""
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+            self._loads_started += 1
+            self._pending = []
+            self._pending_ranges = []
+
+        started = time.monotonic()
+        try:
+            # Leave room for growth so that the filter is not rebuilt right away
+            new_filter = BloomFilter(max(self.min_capacity, 2 * self.count_epcs()), self.error_rate)
+            new_filter.update(self.load_epcs())
+            new_ranges = self._build_ranges(self.load_ranges() if self.load_ranges else ())
+        except Exception as e:
+            with self._lock:
+                self._loading = False
+                self._pending = None
+                self._pending_ranges = None
+                self._last_error = str(e)
+            print(f"ERROR: Failed to load the EPC index: {e}")
+            return
+
+        with self._lock:
+            new_filter.update(self._pending)
+            for epc_range in self._pending_ranges:
+                self._merge_range(new_ranges, *epc_range)
+            self._filter = new_filter
+            self._ranges = new_ranges
+            self._pending = None
+            self._pending_ranges = None
+            self._loading = False
+            self._removed = 0
+            self._loads += 1
+            self._last_load_seconds = round(time.monotonic() - started, 6)
+            self._last_error = None
+
+    def load_in_background(self) -> None:
+        threading.Thread(target=self.load, name="EpcIndexLoader", daemon=True).start()
+
+    @staticmethod
+    def _build_ranges(epc_ranges: Iterable[EpcRange]) -> dict[tuple[str, int], tuple[tuple[int, ...], tuple[int, ...]]]:
+        # Sort once and merge overlapping or adjacent ranges in a single pass
+        merged: dict[tuple[str, int], list[list[int]]] = {}
+        for prefix, width, first_serial, last_serial in sorted(epc_ranges):
+            intervals = merged.setdefault((prefix, width), [])
+            if intervals and first_serial <= intervals[-1][1] + 1:
+                intervals[-1][1] = max(intervals[-1][1], last_serial)
+            else:
+                intervals.append([first_serial, last_serial])
+        return {
+            key: (tuple(first for first, _ in intervals), tuple(last for _, last in intervals))
+            for key, intervals in merged.items()
+        }
+
+    @staticmethod
+    def _merge_range(ranges: dict, prefix: str, width: int, first_serial: int, last_serial: int) -> None:
+        # Replace the intervals the range overlaps or touches by their union (copy on write, so readers need no lock)
+        firsts, lasts = ranges.get((prefix, width), ((), ()))
+        start = bisect_left(lasts, first_serial - 1)
+        end = bisect_right(firsts, last_serial + 1)
+        if start < end:
+            first_serial = min(first_serial, firsts[start])
+            last_serial = max(last_serial, lasts[end - 1])
+        ranges[(prefix, width)] = (
+            firsts[:start] + (first_serial,) + firsts[end:],
+            lasts[:start] + (last_serial,) + lasts[end:]
+        )
+
+    def add(self, epcs: list[str], epc_ranges: list[EpcRange] = ()) -> int:
+        """
+        Record inserted EPCs. Call before the insert is committed (a rolled back
+        insert only leaves a false positive), then call `add_if_reloaded` once
+        it is committed.
+
+        Args:
+            epcs (list[str]): The inserted EPCs.
+            epc_ranges (list[EpcRange]): The inserted ranges of sequential EPCs.
+
+        Returns:
+            int: The load generation to pass to `add_if_reloaded`.
+        """
+        with self._lock:
+            generation = self._loads_started
+            if self._pending is not None:
+                self._pending.extend(epcs)
+                self._pending_ranges.extend(epc_ranges)
+            if self._filter is None:
+                return generation
+            for epc_range in epc_ranges:
+                self._merge_range(self._ranges, *epc_range)
+            self._filter.update(epcs)
+            needs_rebuild = self._filter.count > self._filter.capacity
+
+        if needs_rebuild:
+            self.load_in_background()
+        return generation
+
+    def add_if_reloaded(self, epcs: list[str], generation: int, epc_ranges: list[EpcRange] = ()) -> None:
+        """
+        Record committed EPCs again if a load started since `add`: its scan of the
+        database may have missed them, as they were not committed yet.
+        """
+        if self._loads_started != generation:
+            self.add(epcs, epc_ranges)
+
+    def remove(self, count: int) -> None:
+        """Record deleted EPCs; they stay in the filter until it is rebuilt."""
+        with self._lock:
+            self._removed += count
+            needs_rebuild = self._filter is not None and self._removed > self._filter.capacity // 2
+
+        if needs_rebuild:
+            self.load_in_background()
+
+    def might_contain(self, epc: str) -> bool:
+        """
+        Check whether an EPC may exist.
+
+        Returns:
+            bool: False if the EPC is certainly unknown, True if it must be looked up.
+        """
+        current_filter = self._filter
+        if current_filter is None:
+            return True
+
+        found = epc in current_filter
+        if not found and self._ranges:
+            prefix, width, serial = EpcCodec.split(epc)
+            firsts, lasts = self._ranges.get((prefix, width), ((), ()))
+            index = bisect_right(firsts, serial) - 1
+            found = index >= 0 and lasts[index] >= serial
+        with self._lock:
+            self._lookups += 1
+            if not found:
+                self._negatives += 1
+        return found
+
+    def record_false_positive(self, count: int = 1) -> None:
+        """Record lookups the filter let through although the EPC did not exist."""
+        with self._lock:
+            self._false_positives += count
+
+    def stats(self) -> dict:
+        with self._lock:
+            current_filter = self._filter
+            return {
+                "loaded": current_filter is not None,
+                "loading": self._loading,
+                "epcs": current_filter.count if current_filter else 0,
+                "capacity": current_filter.capacity if current_filter else 0,
+                "size_bytes": current_filter.size_bytes if current_filter else 0,
+                "estimated_error_rate": round(current_filter.estimated_error_rate(), 6) if current_filter else None,
+                "ranges": sum(len(firsts) for firsts, _ in self._ranges.values()),
+                "range_epcs": sum(last - first + 1 for firsts, lasts in self._ranges.values() for first, last in zip(firsts, lasts)),
+                "removed_since_load": self._removed,
+                "lookups": self._lookups,
+                "negatives": self._negatives,
+                "false_positives": self._false_positives,
+                "loads": self._loads,
+                "last_load_seconds": self._last_load_seconds,
+                "last_error": self._last_error,
+            }
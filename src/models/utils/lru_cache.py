@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Hashable
+import threading
+import time
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe in-process cache with least-recently-used eviction and a time to live.
+
+    Invalidations bump a generation counter. A value loaded from the database is
+    only stored if no invalidation happened since its load started (see
+    `generation` and `put`), so a reader racing with a writer cannot put back a
+    value the writer just invalidated.
+
+    Parameters:
+        max_size (int): Maximum number of entries kept.
+        ttl (float): Seconds an entry stays valid. 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer.")
+
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[object, float]] = OrderedDict()  # key -> (value, expiry)
+        self._generation = 0
+
+        # Counters
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        """The invalidation counter, to read before loading a value that will be put."""
+        return self._generation
+
+    def get(self, key: Hashable):
+        """
+        Get a cached value.
+
+        Args:
+            key (Hashable): The key of the value.
+
+        Returns:
+            The value, or None if it is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            value, expiry = entry
+            if time.monotonic() >= expiry:
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value, generation: int = None) -> bool:
+        """
+        Cache a value, evicting the least recently used entry when full.
+
+        Args:
+            key (Hashable): The key of the value.
+            value: The value, not None.
+            generation (int, optional): The generation read before the value was loaded.
+                The value is dropped if an invalidation happened since.
+
+        Returns:
+            bool: True if the value was cached.
+        """
+        if self.ttl <= 0:
+            return False
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a key from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self._invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable, object], bool]) -> int:
+        """
+        Remove every entry matching a predicate.
+
+        Args:
+            predicate (callable): Called with the key and value of every entry.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        with self._lock:
+            keys = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+            self._generation += 1
+            self._invalidations += 1
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "expirations": self._expirations,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+from models.exceptions.database_exception import DatabaseException
+from contextlib import closing
+import importlib.util
+import os
+import re
+import sqlite3
+import sys
+
+
+class SchemaMigrator:
+    """
+    Applies the versioned migration scripts of a database.
+
+    Migrations are SQL files named '<version>_<name>.sql' (e.g.
+    '0001_hot_path_indexes.sql') applied in version order. Data migrations that
+    cannot be written in SQL are Python files named '<version>_<name>.py'
+    defining a `migrate(connection)` function. The versions already applied are
+    recorded in the schema_version table, so every script runs exactly once per
+    database. Each script is applied in its own transaction together with its
+    schema_version row: a failing script leaves the database at the previous
+    version.
+
+    Parameters:
+        database (str): Path to the SQLite database file.
+        migrations_dir (str): Directory containing the migration scripts.
+        busy_timeout_ms (int): SQLite busy timeout used while migrating.
+    """
+
+    VERSION_TABLE = "schema_version"
+    MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.(sql|py)$")
+
+    # Queries on hot paths that must be answered through an index
+    HOT_QUERIES = {
+        "latest_sensor_reading": """
+            SELECT * FROM SensorDataPoints
+            WHERE sensor_id = :sensor_id AND data_type_id = :data_type_id
+            ORDER BY created_at DESC, sensor_data_point_id DESC
+            LIMIT 1;
+        """,
+        "sensor_readings_over_time": """
+            SELECT created_at, value FROM SensorDataPoints
+            WHERE data_type_id = :data_type_id AND created_at BETWEEN :start_date AND :end_date;
+        """,
+        "sensor_days_active": """
+            SELECT COUNT(DISTINCT bucket_start) FROM SensorDataRollupsDay
+            WHERE data_type IN (SELECT name FROM SensorDataTypes)
+            AND bucket_start BETWEEN :start_date AND :end_date;
+        """,
+        "daily_fan_usage": """
+            SELECT bucket_start, SUM(sample_count), SUM(sum_value) FROM SensorDataRollupsDay
+            WHERE data_type IN ('temperature', 'fan_status')
+            AND bucket_start BETWEEN :start_date AND :end_date
+            GROUP BY bucket_start;
+        """,
+        "total_sales": """
+            SELECT SUM(total_paid) FROM Payments
+            WHERE date BETWEEN :start_date AND :end_date;
+        """,
+        "customer_payments": """
+            SELECT * FROM Payments
+            WHERE customer_id = :customer_id
+            ORDER BY date DESC, payment_id DESC;
+        """,
+        "product_payments": """
+            SELECT p.* FROM Payments p
+            INNER JOIN PaymentProducts pp ON p.payment_id = pp.payment_id
+            WHERE pp.product_id = :product_id;
+        """,
+        "customer_payment_by_id": """
+            SELECT p.*, pp.* FROM Payments p
+            LEFT JOIN PaymentProducts pp ON pp.payment_id = p.payment_id
+            WHERE p.payment_id = :payment_id AND p.customer_id = :customer_id;
+        """,
+        "customer_payments_page": """
+            SELECT p.* FROM Payments p
+            WHERE p.customer_id = :customer_id AND (p.date, p.payment_id) < (:after_value, :after_id)
+            ORDER BY p.date DESC, p.payment_id DESC LIMIT :page_limit;
+        """,
+        "payment_products_of_payments": """
+            SELECT * FROM PaymentProducts
+            WHERE payment_id IN (SELECT value FROM json_each(:payment_ids));
+        """,
+        "customer_by_membership": """
+            SELECT * FROM Customers WHERE qr_identification = :membership_number;
+        """,
+        "customers_page_by_last_name": """
+            SELECT c.* FROM Customers c
+            WHERE c.customer_id != 0 AND (c.last_name, c.customer_id) > (:after_value, :after_id)
+            ORDER BY c.last_name, c.customer_id LIMIT :page_limit;
+        """,
+        "products_page_by_name": """
+            SELECT p.*, COALESCE(inv.total_stock, 0) AS available_stock FROM Products p
+            LEFT JOIN ProductInventory inv ON inv.product_id = p.product_id
+            WHERE p.product_id != 0 AND (p.name, p.product_id) > (:after_value, :after_id)
+            ORDER BY p.name, p.product_id LIMIT :page_limit;
+        """,
+        "products_page_by_category": """
+            SELECT p.* FROM Products p
+            WHERE p.category = :category AND p.product_id > :after_id
+            ORDER BY p.product_id LIMIT :page_limit;
+        """,
+        "product_inventory_batches": """
+            SELECT * FROM InventoryBatches WHERE product_id = :product_id;
+        """,
+        "sensor_daily_rollups": """
+            SELECT * FROM SensorDataRollupsDay
+            WHERE data_type = :data_type AND bucket_start BETWEEN :start_date AND :end_date
+            ORDER BY bucket_start, sensor_id;
+        """,
+        "product_epcs": """
+            SELECT ep.prefix, ep.width, pi.serial, pi.inventory_batch_id FROM ProductItem pi
+            JOIN InventoryBatches ib ON pi.inventory_batch_id = ib.inventory_batch_id
+            JOIN EpcPrefixes ep ON ep.prefix_id = pi.prefix_id
+            WHERE ib.product_id = :product_id;
+        """,
+        "product_epc_ranges": """
+            SELECT ep.prefix, ep.width, r.first_serial, r.last_serial, r.inventory_batch_id FROM ProductItemRanges r
+            JOIN InventoryBatches ib ON r.inventory_batch_id = ib.inventory_batch_id
+            JOIN EpcPrefixes ep ON ep.prefix_id = r.prefix_id
+            WHERE ib.product_id = :product_id;
+        """,
+        "product_stock_at": """
+            SELECT stock_after FROM InventoryMovements
+            WHERE product_id = :product_id AND created_at <= :at
+            ORDER BY created_at DESC, movement_id DESC LIMIT 1;
+        """,
+        "product_fifo_batches": """
+            SELECT inventory_batch_id, remaining_quantity FROM InventoryBatches
+            WHERE product_id = :product_id AND remaining_quantity > 0
+            ORDER BY received_date, inventory_batch_id;
+        """,
+        "aging_inventory_batches": """
+            SELECT * FROM InventoryBatches
+            WHERE remaining_quantity > 0 AND received_date <= :cutoff
+            ORDER BY received_date, inventory_batch_id;
+        """,
+        "epc_range_by_serial": """
+            SELECT range_id, first_serial, last_serial, inventory_batch_id FROM ProductItemRanges
+            WHERE prefix_id = :prefix_id AND first_serial <= :serial
+            ORDER BY first_serial DESC LIMIT 1;
+        """,
+    }
+
+    def __init__(self, database: str, migrations_dir: str, busy_timeout_ms: int = 5000):
+        self.database = database
+        self.migrations_dir = migrations_dir
+        self.busy_timeout_ms = busy_timeout_ms
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.database)
+        connection.row_factory = sqlite3.Row
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)};")
+        return connection
+
+    def list_migrations(self) -> list[tuple[int, str, str]]:
+        """
+        List the migration scripts in version order.
+
+        Returns:
+            list[tuple[int, str, str]]: The (version, name, path) of every script.
+        """
+        migrations = []
+        if not os.path.isdir(self.migrations_dir):
+            return migrations
+
+        for filename in os.listdir(self.migrations_dir):
+            match = self.MIGRATION_FILE_PATTERN.match(filename)
+            if match is None:
+                continue
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(self.migrations_dir, filename)))
+
+        migrations.sort()
+
+        # Two scripts with the same version would be applied in an arbitrary order
+        versions = [version for version, _, _ in migrations]
+        if len(versions) != len(set(versions)):
+            raise DatabaseException(f"Duplicate migration versions found in {self.migrations_dir}.")
+        return migrations
+
+    @classmethod
+    def _fetch_applied_versions(cls, cursor: sqlite3.Cursor) -> set[int]:
+        cursor.execute(f"SELECT version FROM {cls.VERSION_TABLE};")
+        return {row["version"] for row in cursor.fetchall()}
+
+    def get_current_version(self) -> int:
+        """Return the highest applied migration version (0 when none was applied)."""
+        with closing(self._connect()) as connection, closing(connection.cursor()) as cursor:
+            self._ensure_version_table(connection)
+            applied_versions = self._fetch_applied_versions(cursor)
+        return max(applied_versions, default=0)
+
+    @classmethod
+    def _ensure_version_table(cls, connection: sqlite3.Connection) -> None:
+        connection.execute(f"""
+        CREATE TABLE IF NOT EXISTS {cls.VERSION_TABLE} (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        connection.commit()
+
+    def migrate(self) -> list[int]:
+        """
+        Apply every migration that was not applied yet.
+
+        Returns:
+            list[int]: The versions applied by this call.
+
+        Raises:
+            DatabaseException: If a migration script fails.
+        """
+        applied = []
+        with closing(self._connect()) as connection, closing(connection.cursor()) as cursor:
+            self._ensure_version_table(connection)
+            applied_versions = self._fetch_applied_versions(cursor)
+
+            for version, name, path in self.list_migrations():
+                if version in applied_versions:
+                    continue
+
+                try:
+                    if path.endswith(".py"):
+                        self._apply_python_migration(connection, version, name, path)
+                    else:
+                        self._apply_sql_migration(cursor, version, name, path)
+                except Exception as e:
+                    if connection.in_transaction:
+                        connection.rollback()
+                    # Another process may have applied the same migration concurrently
+                    if version in self._fetch_applied_versions(cursor):
+                        continue
+                    raise DatabaseException(f"Failed to apply migration {version} ({name}): {e}")
+
+                applied.append(version)
+                print(f"INFO: Applied database migration {version:04d} ({name})")
+        return applied
+
+    def _apply_sql_migration(self, cursor: sqlite3.Cursor, version: int, name: str, path: str) -> None:
+        with open(path, encoding="utf-8") as migration_file:
+            script = migration_file.read()
+
+        # The script and its version row are committed together
+        cursor.executescript(
+            f"BEGIN IMMEDIATE;\n{script}\n;\n"
+            f"INSERT INTO {self.VERSION_TABLE} (version, name) VALUES ({version}, '{name}');\n"
+            "COMMIT;"
+        )
+
+    def _apply_python_migration(self, connection: sqlite3.Connection, version: int, name: str, path: str) -> None:
+        spec = importlib.util.spec_from_file_location(f"migration_{version:04d}_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        # The migration and its version row are committed together
+        connection.execute("BEGIN IMMEDIATE;")
+        module.migrate(connection)
+        connection.execute(f"INSERT INTO {self.VERSION_TABLE} (version, name) VALUES (?, ?);", (version, name))
+        connection.commit()
+
+    def find_full_scans(self, queries: dict[str, str] = None) -> dict[str, list[str]]:
+        """
+        Find the queries whose plan falls back to a full table scan.
+
+        Args:
+            queries (dict[str, str], optional): The queries to check by name. Defaults to HOT_QUERIES.
+
+        Returns:
+            dict[str, list[str]]: The full scan steps of every offending query, by query name.
+        """
+        queries = queries if queries is not None else self.HOT_QUERIES
+        full_scans = {}
+        with closing(self._connect()) as connection, closing(connection.cursor()) as cursor:
+            for query_name, sql in queries.items():
+                # Parameters only need to be bound, their values do not change the plan
+                parameters = {name: None for name in re.findall(r":(\w+)", sql)}
+
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+                # Any step scanning a table is a full scan, in rowid or in index order
+                # ("SCAN Payments", "SCAN Payments USING INDEX ..."); table-valued functions
+                # over a bound parameter (json_each) only scan their argument
+                scans = [
+                    row["detail"] for row in cursor.fetchall()
+                    if row["detail"].startswith("SCAN ") and " VIRTUAL TABLE " not in row["detail"]
+                ]
+                if scans:
+                    full_scans[query_name] = scans
+        return full_scans
+
+    def check_query_plans(self) -> bool:
+        """
+        Log a warning for every hot query that falls back to a full table scan.
+
+        Returns:
+            bool: True if every hot query uses an index.
+        """
+        full_scans = self.find_full_scans()
+        for query_name, scans in full_scans.items():
+            print(f"WARNING: Query '{query_name}' falls back to a full table scan: {'; '.join(scans)}")
+        return not full_scans
+
+
+if __name__ == "__main__":
+    # Usage: python -m models.utils.schema_migrator [database]
+    # Applies pending migrations and exits with status 1 if a hot query does a full table scan
+    from models.base_model import BaseModel
+
+    migrator = SchemaMigrator(sys.argv[1] if len(sys.argv) > 1 else BaseModel.DB_NAME, BaseModel.MIGRATIONS_DIR)
+    migrator.migrate()
+    print(f"INFO: Database schema at version {migrator.get_current_version()}")
+    sys.exit(0 if migrator.check_query_plans() else 1)
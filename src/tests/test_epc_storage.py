@@ -0,0 +1,145 @@
+"""
+Compact EPC storage checks: the EpcCodec encoding, the validation of EPC ranges, the
+splitting of stored ranges when some of their items are deleted, and the duplicate
+check between ranges and EPCs stored one per row.
+
+Usage (from the src folder):
+    python -m pytest tests
+"""
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import pytest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from models.base_model import BaseModel
+from models.product_item_model import ProductItem
+from models.utils.epc_codec import EpcCodec
+from models.utils.schema_migrator import SchemaMigrator
+
+BASE_SCHEMA = os.path.join(SRC_DIR, "db", "sql_connected_smarties.sql")
+MIGRATIONS_DIR = os.path.join(SRC_DIR, "db", "migrations")
+
+# A product of the base schema's sample data
+PRODUCT_ID = 1
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database(tmp_path_factory):
+    # Same setup as a fresh install: base schema, then the migrations
+    database = str(tmp_path_factory.mktemp("epc_storage") / "epc_storage.db")
+    with open(BASE_SCHEMA, encoding="utf-8") as schema_file:
+        connection = sqlite3.connect(database)
+        connection.executescript(schema_file.read())
+        connection.close()
+    SchemaMigrator(database, MIGRATIONS_DIR).migrate()
+
+    previous_database = BaseModel.DB_NAME
+    BaseModel.DB_NAME = database
+    yield database
+    BaseModel.DB_NAME = previous_database
+
+
+def epc(prefix: str, number: int) -> str:
+    # The EPC generate_bulk_epcs builds for a number
+    return f"{prefix}{number:0{ProductItem.EPC_LENGTH - len(prefix)}d}"
+
+
+def stored_ranges(prefix: str) -> list[tuple[int, int]]:
+    _, epc_ranges = ProductItem.fetch_epcs_by_product_id(PRODUCT_ID)
+    return sorted((epc_range["start"], epc_range["end"]) for epc_range in epc_ranges if epc_range["first_epc"].startswith(prefix))
+
+
+def delete_epcs(epcs: list[str]) -> dict[int, int]:
+    with BaseModel._transaction() as connection, closing(connection.cursor()) as cursor:
+        return ProductItem._delete_items_from_epcs(epcs, cursor)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("A00000000000000000000123", ("A00000", 18, 123)),
+    # Over-long numeric tail: only the last MAX_SERIAL_DIGITS digits are the serial
+    ("A12345678901234567890123", ("A12345", 18, 678901234567890123)),
+    # Leading zeros of a short tail are kept by its width
+    ("X007", ("X", 3, 7)),
+    # No numeric tail: stored verbatim
+    ("EPC-ABC", ("EPC-ABC", 0, EpcCodec.VERBATIM_SERIAL)),
+])
+def test_codec_round_trip(value: str, expected: tuple[str, int, int]):
+    assert EpcCodec.split(value) == expected
+    assert EpcCodec.join(*expected) == value
+
+
+def test_codec_expand_matches_join():
+    prefix, width, first_serial = EpcCodec.split(epc("A", 998))
+    expanded = list(EpcCodec.expand(prefix, width, first_serial, first_serial + 4))
+    assert expanded == [epc("A", number) for number in range(998, 1003)]
+    assert [EpcCodec.split(value) for value in expanded] == [(prefix, width, serial) for serial in range(first_serial, first_serial + 5)]
+
+
+def test_split_epc_range_encodes_serials():
+    assert ProductItem._split_epc_range("A", 5, 20) == ("A00000", 18, 5, 20)
+
+
+def test_split_epc_range_rejects_ranges_crossing_a_prefix():
+    # 10^18 - 1 and 10^18 differ in the digits kept in the prefix
+    limit = 10 ** EpcCodec.MAX_SERIAL_DIGITS
+    with pytest.raises(ValueError):
+        ProductItem._split_epc_range("A", limit - 1, limit)
+
+
+def test_split_epc_range_rejects_oversized_ranges():
+    with pytest.raises(ValueError):
+        ProductItem._split_epc_range("A", 1, ProductItem.MAX_BATCH_ITEMS + 1)
+
+
+@pytest.mark.parametrize("deleted, expected_ranges", [
+    ("start", [(101, 119)]),
+    ("middle", [(100, 109), (111, 119)]),
+    ("end", [(100, 118)]),
+])
+def test_delete_splits_ranges(deleted: str, expected_ranges: list[tuple[int, int]]):
+    prefix = f"D{deleted[0].upper()}"
+    inventory_batch_id = ProductItem.receive_inventory_batch(PRODUCT_ID, [], [(prefix, 100, 119)])
+    assert stored_ranges(prefix) == [(100, 119)]
+
+    number = {"start": 100, "middle": 110, "end": 119}[deleted]
+    assert delete_epcs([epc(prefix, number)]) == {inventory_batch_id: 1}
+    assert stored_ranges(prefix) == expected_ranges
+
+    # The deleted EPC is gone, its neighbours are still found
+    assert ProductItem.fetch_by_epc(epc(prefix, number)) is None
+    for neighbour in (number - 1, number + 1):
+        if 100 <= neighbour <= 119:
+            assert ProductItem.fetch_by_epc(epc(prefix, neighbour)).inventory_batch_id == inventory_batch_id
+
+    # Deleting it again changes nothing
+    assert delete_epcs([epc(prefix, number)]) == {}
+
+
+def test_range_colliding_with_stored_epc_is_rejected():
+    # Fewer EPCs than RANGE_MIN_LENGTH are stored one per row
+    ProductItem.receive_inventory_batch(PRODUCT_ID, [epc("CR", 5), epc("CR", 50)])
+
+    assert ProductItem.exists_product_item_with_epc_bulk([], [("CR", 40, 60)]) == epc("CR", 50)
+    with pytest.raises(ValueError, match="already exists"):
+        ProductItem.receive_inventory_batch(PRODUCT_ID, [], [("CR", 40, 60)])
+
+    # Ranges next to the stored EPCs do not collide
+    ProductItem.receive_inventory_batch(PRODUCT_ID, [], [("CR", 6, 49)])
+    assert stored_ranges("CR") == [(6, 49)]
+
+
+def test_epc_colliding_with_stored_range_is_rejected():
+    ProductItem.receive_inventory_batch(PRODUCT_ID, [], [("CE", 1, 100)])
+
+    assert ProductItem.exists_product_item_with_epc_bulk([epc("CE", 42)]) == epc("CE", 42)
+    with pytest.raises(ValueError, match="already exists"):
+        ProductItem.receive_inventory_batch(PRODUCT_ID, [epc("CE", 42)])
+    with pytest.raises(ValueError, match="already exists"):
+        ProductItem.receive_inventory_batch(PRODUCT_ID, [], [("CE", 100, 150)])
+
+    assert ProductItem.exists_product_item_with_epc_bulk([epc("CE", 101)], [("CE", 200, 300)]) is None
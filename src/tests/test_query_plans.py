@@ -0,0 +1,58 @@
+"""
+Query plan regression checks: every hot query must keep using an index once the
+schema is migrated, so a dropped or renamed index fails here instead of in production.
+
+Usage (from the src folder):
+    python -m pytest tests
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+from models.utils.schema_migrator import SchemaMigrator
+
+BASE_SCHEMA = os.path.join(SRC_DIR, "db", "sql_connected_smarties.sql")
+MIGRATIONS_DIR = os.path.join(SRC_DIR, "db", "migrations")
+
+
+@pytest.fixture(scope="module")
+def migrator(tmp_path_factory) -> SchemaMigrator:
+    # Same setup as a fresh install: base schema, then the migrations
+    database = str(tmp_path_factory.mktemp("query_plans") / "query_plans.db")
+    with open(BASE_SCHEMA, encoding="utf-8") as schema_file:
+        connection = sqlite3.connect(database)
+        connection.executescript(schema_file.read())
+        connection.close()
+
+    migrator = SchemaMigrator(database, MIGRATIONS_DIR)
+    migrator.migrate()
+    return migrator
+
+
+def test_every_migration_is_applied(migrator: SchemaMigrator):
+    assert migrator.get_current_version() == max(version for version, _, _ in migrator.list_migrations())
+
+
+@pytest.mark.parametrize("query_name", sorted(SchemaMigrator.HOT_QUERIES))
+def test_hot_query_uses_an_index(migrator: SchemaMigrator, query_name: str):
+    full_scans = migrator.find_full_scans({query_name: SchemaMigrator.HOT_QUERIES[query_name]})
+    assert full_scans == {}, f"{query_name} falls back to a full table scan: {full_scans}"
+
+
+def test_full_scans_are_detected(migrator: SchemaMigrator):
+    # Guards the check itself: a filter on an unindexed column must be reported
+    full_scans = migrator.find_full_scans({"unindexed": "SELECT * FROM Payments WHERE total_paid > :amount;"})
+    assert list(full_scans) == ["unindexed"]
+    assert full_scans["unindexed"][0].startswith("SCAN ")
+
+
+def test_full_scans_in_index_order_are_detected(migrator: SchemaMigrator):
+    # Walking a whole index to return rows in order is still a full scan
+    full_scans = migrator.find_full_scans({"index_order": "SELECT * FROM Payments WHERE total_paid > :amount ORDER BY date;"})
+    assert list(full_scans) == ["index_order"]
+    assert " USING " in full_scans["index_order"][0]